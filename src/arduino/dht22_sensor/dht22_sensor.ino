@@ -12,6 +12,12 @@
  * Required Libraries:
  * - DHT sensor library by Adafruit
  * - Adafruit Unified Sensor
+ *
+ * Output protocol:
+ * - USE_BINARY_PROTOCOL 0: one JSON line per reading (default)
+ * - USE_BINARY_PROTOCOL 1: 16-byte binary frames with CRC-16, see
+ *   src/python/utils/binary_protocol.py for the layout. The Python
+ *   reader detects either protocol automatically.
  */
 
 #include <DHT.h>
@@ -19,9 +25,55 @@
 
 #define DHT_PIN 2
 #define DHT_TYPE DHT22
+#define USE_BINARY_PROTOCOL 0
+#define SENSOR_ID 0
+
+#define FLAG_READ_ERROR 0x01
 
 DHT dht(DHT_PIN, DHT_TYPE);
 
+uint16_t sequence = 0;
+
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+uint16_t crc16(const uint8_t *data, size_t length) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < length; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (uint8_t bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+// Send one little-endian binary frame
+void sendBinaryFrame(float temperature, float humidity, uint8_t flags) {
+  uint8_t frame[16];
+  uint32_t now = millis();
+  int16_t centiTemperature = (int16_t)round(temperature * 100.0);
+  uint16_t centiHumidity = (uint16_t)round(humidity * 100.0);
+
+  frame[0] = 0xAA;
+  frame[1] = 0x55;
+  frame[2] = sequence & 0xFF;
+  frame[3] = sequence >> 8;
+  for (uint8_t i = 0; i < 4; i++) {
+    frame[4 + i] = (now >> (8 * i)) & 0xFF;
+  }
+  frame[8] = centiTemperature & 0xFF;
+  frame[9] = (uint16_t)centiTemperature >> 8;
+  frame[10] = centiHumidity & 0xFF;
+  frame[11] = centiHumidity >> 8;
+  frame[12] = flags;
+  frame[13] = SENSOR_ID;
+  uint16_t crc = crc16(frame + 2, 12);
+  frame[14] = crc & 0xFF;
+  frame[15] = crc >> 8;
+
+  Serial.write(frame, sizeof(frame));
+  sequence++;
+}
+
 void setup() {
   Serial.begin(9600);
   dht.begin();
@@ -32,7 +84,11 @@ void setup() {
   }
 
   Serial.println("DHT22 Environmental Monitor Started");
+#if USE_BINARY_PROTOCOL
+  Serial.println("Sending binary frames every 2 seconds...");
+#else
   Serial.println("Sending JSON data every 2 seconds...");
+#endif
 }
 
 void loop() {
@@ -42,11 +98,22 @@ void loop() {
 
   // Check if readings are valid
   if (isnan(humidity) || isnan(temperature)) {
+#if USE_BINARY_PROTOCOL
+    sendBinaryFrame(0, 0, FLAG_READ_ERROR);
+#else
     Serial.println("{\"error\":\"Failed to read from DHT sensor!\"}");
+#endif
     delay(2000);
     return;
   }
 
+#if USE_BINARY_PROTOCOL
+  // No heat index in the frame: process_sensor_data computes it on the host
+  sendBinaryFrame(temperature, humidity, 0);
+  delay(2000); // Send data every 2 seconds
+  return;
+#endif
+
   // Calculate heat index
   float heatIndex = dht.computeHeatIndex(temperature, humidity, false);
 
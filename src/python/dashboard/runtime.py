@@ -0,0 +1,432 @@
+"""
+Data side of the dashboard: sensor registry, snapshots and ingestion
+
+Nothing here imports Dash or Plotly, so a headless collector only loads
+what it needs to read sensors, store readings and publish them. Sensor
+sources are created and started by ``DashboardRuntime.start``, never at
+import time.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from utils import metrics
+from utils.data_processor import get_comfort_code, get_comfort_level
+from utils.env_loader import (
+    load_pipeline_config,
+    load_sensor_config,
+    load_server_config,
+    load_simulator_config,
+    load_storage_config,
+)
+from utils.pipeline import Pipeline
+from utils.pubsub import Broadcaster
+from utils.reading import SENSOR_LABELS, Reading
+from utils.sensor_registry import (
+    ALL_SENSORS,
+    SensorChannel,
+    SensorRegistry,
+    normalize_sensor_id,
+    sensor_id_for,
+)
+from utils.serial_reader import (
+    STATE_CONNECTED,
+    STATE_CONNECTING,
+    STATE_DISCONNECTED,
+    STATE_RECONNECTING,
+)
+from utils.shared_plane import PLANE_FIELDS, SharedDataPlane
+from utils.snapshot import SnapshotPublisher
+from utils.storage import SegmentStore
+
+USE_SIMULATOR = True  # Set to False when Arduino is connected
+
+# "standalone" collects and serves in one process. A "collector" owns the
+# serial ports and publishes through shared memory; any number of read-only
+# "worker" processes (e.g. gunicorn workers) serve the dashboard from it.
+ROLES = ("standalone", "collector", "worker")
+
+PLANE_POLL_SECONDS = 0.25  # How often workers check the shared data plane
+
+# Fields sent to the browser for the metric cards
+LATEST_READING_FIELDS = (
+    "temperature",
+    "humidity",
+    "dew_point",
+    "discomfort_index",
+    "comfort_level",
+    "python_timestamp",
+)
+
+
+def load_config() -> dict:
+    """Every setting the dashboard uses, read from the environment/.env"""
+    return {
+        "server": load_server_config(),
+        "sensor": load_sensor_config(),
+        "storage": load_storage_config(),
+        "simulator": load_simulator_config(),
+        "pipeline": load_pipeline_config(),
+        "use_simulator": USE_SIMULATOR,
+    }
+
+
+def compact_reading(data_point) -> dict:
+    """Fields of a reading needed by the metric cards"""
+    return {field: data_point.get(field) for field in LATEST_READING_FIELDS}
+
+
+def combine_readings(readings: list[dict]) -> dict:
+    """Average several sensors' compact readings into one"""
+    combined = {}
+    for field in LATEST_READING_FIELDS:
+        values = [r[field] for r in readings if isinstance(r.get(field), (int, float))]
+        if field == "python_timestamp":
+            combined[field] = max(values) if values else None
+        elif values:
+            combined[field] = sum(values) / len(values)
+    discomfort_index = combined.get("discomfort_index")
+    combined["comfort_level"] = (
+        get_comfort_level(discomfort_index) if discomfort_index is not None else None
+    )
+    return combined
+
+
+class DashboardRuntime:
+    """
+    Registry, snapshots and the sensor source behind one dashboard process
+
+    The constructor only warms per-sensor buffers from stored history;
+    ``start`` opens the sensor source (serial port, simulator, replay or the
+    collector's data plane for workers) and starts the background threads.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.role = config["server"]["role"]
+        if self.role not in ROLES:
+            raise ValueError(f"Unknown DASHBOARD_ROLE: {self.role}")
+        # Workers take this from the collector's state
+        self.simulated = config["use_simulator"] and self.role != "worker"
+        metrics.set_enabled(config["server"]["metrics_enabled"])
+
+        # Per-sensor buffers, stats and rollup tiers, warmed from stored history
+        data_dir = config["storage"]["data_dir"]
+        self.registry = SensorRegistry(
+            buffer_size=200, store_factory=self.open_sensor_store
+        )
+        if os.path.isdir(data_dir):
+            for entry in sorted(os.scandir(data_dir), key=lambda e: e.name):
+                if entry.is_dir():
+                    self.registry.channel(normalize_sensor_id(entry.name))
+        for group_name, members in config["sensor"]["sensor_groups"].items():
+            self.registry.set_group(group_name, members)
+
+        # Versioned snapshot shared by every callback and client
+        self.snapshots = SnapshotPublisher()
+        warm = [c for c in self.registry.resolve(ALL_SENSORS) if c.latest]
+        if warm:
+            self.snapshots.publish(warm[-1].latest, warm[-1].get_stats())
+
+        # Push channel for server-sent events
+        self.broadcaster = Broadcaster()
+
+        # Serial connection state per port/source, shown by the status indicator
+        self.connection_states: dict[str, str] = {}
+
+        self.sensor = None
+        self.ingestor = None
+        self.pipeline: Optional[Pipeline] = None
+        # Shared memory written by a collector process (None in other roles)
+        self.plane: Optional[SharedDataPlane] = None
+        self._started = False
+
+    def open_sensor_store(self, sensor_id: str) -> SegmentStore:
+        """Segment store for one sensor under DATA_DIR/<sensor_id>"""
+        storage_config = self.config["storage"]
+        return SegmentStore(
+            os.path.join(storage_config["data_dir"], sensor_id),
+            segment_seconds=storage_config["segment_seconds"],
+            queue_size=storage_config["write_queue_size"],
+            read_only=self.role == "worker",
+        )
+
+    def plane_state(self) -> dict:
+        """Collector state shared with worker processes"""
+        return {
+            "connections": dict(self.connection_states),
+            "simulated": self.simulated,
+        }
+
+    def update_connection_state(self, source: str, state: str) -> None:
+        """Record a connection state change and push it to clients"""
+        self.connection_states[source] = state
+        if self.plane is not None:
+            self.plane.set_state(self.plane_state())
+        snapshot = self.snapshots.current
+        self.publish_snapshot(
+            self.snapshots.publish(snapshot.latest or {}, snapshot.stats)
+        )
+
+    def connection_summary(self) -> dict:
+        """Overall serial connection state for the status indicator"""
+        states = list(self.connection_states.values())
+        if self.simulated or STATE_CONNECTED in states:
+            state = STATE_CONNECTED
+        elif STATE_RECONNECTING in states:
+            state = STATE_RECONNECTING
+        elif STATE_CONNECTING in states:
+            state = STATE_CONNECTING
+        else:
+            state = STATE_DISCONNECTED
+        return {
+            "state": state,
+            "connected": states.count(STATE_CONNECTED),
+            "total": len(states),
+        }
+
+    def build_latest_reading(self, snapshot) -> dict:
+        """
+        Compact JSON payload of the newest readings for the metric cards
+
+        ``readings`` maps every selection key (sensor, group, aggregate) to
+        its reading so the browser can switch sensors without a round trip;
+        ``connection`` drives the status indicator.
+        """
+        readings = {}
+        for channel in self.registry.resolve(ALL_SENSORS):
+            if channel.latest:
+                readings[channel.sensor_id] = compact_reading(channel.latest)
+        for selection in self.registry.selections():
+            if selection in readings:
+                continue
+            members = [
+                readings[channel.sensor_id]
+                for channel in self.registry.resolve(selection)
+                if channel.sensor_id in readings
+            ]
+            if members:
+                readings[selection] = combine_readings(members)
+        return {
+            "version": snapshot.version,
+            "simulated": self.simulated,
+            "connection": self.connection_summary(),
+            "readings": readings,
+        }
+
+    def latest_reading(self, snapshot=None) -> dict:
+        """build_latest_reading for a snapshot (default current), cached"""
+        snapshot = snapshot or self.snapshots.current
+        return snapshot.get_or_build(
+            "latest-reading", lambda: self.build_latest_reading(snapshot)
+        )
+
+    def publish_snapshot(self, snapshot) -> None:
+        """Push a published snapshot's payload to stream subscribers"""
+        if self.broadcaster.subscriber_count:
+            self.broadcaster.publish(json.dumps(self.latest_reading(snapshot)))
+
+    def publish_reading(self, channel: SensorChannel, data_point: dict) -> None:
+        """Publish a processed reading as a new snapshot and push it to streams"""
+        self.publish_snapshot(self.snapshots.publish(data_point, channel.get_stats()))
+
+    def store_readings(self, readings: list[dict]) -> None:
+        """Route processed readings to their sensors' buffers, rollups, stores"""
+        self.registry.add_batch(readings)
+
+    def publish_readings(self, readings: list[dict]) -> None:
+        """Publish the newest reading of a processed batch"""
+        data_point = readings[-1]
+        channel = self.registry.get(sensor_id_for(data_point))
+        if channel is not None:
+            self.publish_reading(channel, data_point)
+
+    def apply_plane_view(self, view: dict, last_seen: dict[str, float]) -> None:
+        """Add the readings of a data plane view not seen yet to the registry"""
+        self.simulated = view["state"].get("simulated", False)
+        self.connection_states.update(view["state"].get("connections", {}))
+
+        newest = None
+        for sensor_id, columns in view["sensors"].items():
+            channel = self.registry.channel(sensor_id)
+            if channel is None:
+                continue
+            since = last_seen.get(sensor_id)
+            if since is None:
+                # Readings already warmed from the stored history
+                since = channel.latest["python_timestamp"] if channel.latest else -1.0
+            timestamps = columns["python_timestamp"]
+            fresh = timestamps > since
+            if not fresh.any():
+                continue
+            source_code = SENSOR_LABELS.code(sensor_id)
+            rows = zip(*(columns[field][fresh].tolist() for field in PLANE_FIELDS))
+            for row in rows:
+                data_point = Reading(**dict(zip(PLANE_FIELDS, row)))
+                data_point.source_code = source_code
+                if data_point.discomfort_index == data_point.discomfort_index:
+                    data_point.comfort_code = get_comfort_code(
+                        data_point.discomfort_index
+                    )
+                channel.add(data_point)
+            channel.capture_stats()
+            last_seen[sensor_id] = float(timestamps[fresh].max())
+            if newest is None or last_seen[sensor_id] > newest[0]:
+                newest = (last_seen[sensor_id], channel)
+
+        if newest is not None:
+            self.publish_reading(newest[1], newest[1].latest)
+        else:
+            # Only the connection state changed
+            snapshot = self.snapshots.current
+            self.publish_snapshot(
+                self.snapshots.publish(snapshot.latest or {}, snapshot.stats)
+            )
+
+    def follow_data_plane(self) -> None:
+        """Worker thread: mirror the collector's data plane into the registry"""
+        name = self.config["server"]["shared_memory_name"]
+        while True:
+            try:
+                shared = SharedDataPlane.attach(name)
+                break
+            except FileNotFoundError:
+                time.sleep(1)  # Collector not started yet
+        print(f"Attached to data plane {name}")
+        last_seen: dict[str, float] = {}
+        version = None
+        while True:
+            if shared.version != version:
+                view = shared.read()
+                if view is not None:
+                    version = view["version"]
+                    self.apply_plane_view(view, last_seen)
+            time.sleep(PLANE_POLL_SECONDS)
+
+    def _create_source(self) -> None:
+        """Open the configured sensor source (imports only what it needs)"""
+        sensor_config = self.config["sensor"]
+        simulator_config = self.config["simulator"]
+        if sensor_config["replay_file"]:
+            from utils.serial_capture import ReplaySource
+
+            # Offline reproduction of a captured serial stream
+            self.simulated = False
+            self.sensor = ReplaySource(
+                sensor_config["replay_file"],
+                speed=sensor_config["replay_speed"] or None,
+                protocol=sensor_config["protocol"],
+                on_state_change=self.update_connection_state,
+            )
+            print(f"Replaying {self.sensor.port} at {self.sensor.speed or 'max'} speed")
+        elif self.simulated and simulator_config["sensors"] > 0:
+            from utils.simulator import SimulatorFleet
+
+            # Load generation: many seeded virtual sensors in real time
+            self.sensor = SimulatorFleet(
+                sensors=simulator_config["sensors"],
+                rate=simulator_config["rate"],
+                seed=simulator_config["seed"],
+                dropout_probability=simulator_config["dropout_probability"],
+                spike_probability=simulator_config["spike_probability"],
+            )
+            print(f"Using simulator fleet of {self.sensor.sensors} sensors")
+        elif self.simulated:
+            from utils.serial_reader import DHT22Simulator
+
+            self.sensor = DHT22Simulator()
+            print("Using DHT22 Simulator")
+        elif sensor_config["serial_ports"]:
+            from utils.async_ingest import AsyncSerialIngestor
+
+            # Several Arduinos: one asyncio loop reads every port
+            self.ingestor = AsyncSerialIngestor(
+                sensor_config["serial_ports"],
+                baudrate=sensor_config["baud_rate"],
+                protocol=sensor_config["protocol"],
+                on_state_change=self.update_connection_state,
+                processor=None,  # Processed by the pipeline workers
+            )
+            print(f"Ingesting from {len(self.ingestor.ports)} serial ports")
+        else:
+            from utils.serial_capture import CaptureWriter
+            from utils.serial_reader import DHT22SerialReader
+
+            self.sensor = DHT22SerialReader(
+                port=sensor_config["serial_port"],
+                baudrate=sensor_config["baud_rate"],
+                protocol=sensor_config["protocol"],
+                on_state_change=self.update_connection_state,
+                capture=(
+                    CaptureWriter(sensor_config["capture_file"])
+                    if sensor_config["capture_file"]
+                    else None
+                ),
+            )
+            print(f"Connecting to {self.sensor.port} in the background")
+
+    def data_collection_thread(self) -> None:
+        """Background thread for collecting simulated sensor data"""
+        while True:
+            try:
+                self.pipeline.submit(self.sensor.read_batch())
+            except Exception as e:
+                print(f"Error collecting data: {e}")
+            time.sleep(2)
+
+    def start(self) -> None:
+        """Open the sensor source and start the background threads (once)"""
+        if self._started:
+            return
+        self._started = True
+        name = self.config["server"]["shared_memory_name"]
+        if self.role == "worker":
+            # Readings arrive from the collector process through shared memory
+            print(f"Serving data plane {name} read-only")
+            threading.Thread(target=self.follow_data_plane, daemon=True).start()
+            return
+
+        if self.role == "collector":
+            # Claim the data plane before opening any serial port
+            self.plane = SharedDataPlane.create(name)
+        self._create_source()
+        if self.plane is not None:
+            self.plane.set_state(self.plane_state())
+            print(f"Publishing to data plane {name}")
+
+        # Staged ingestion: readers -> bounded queue -> processing -> sinks
+        pipeline_config = self.config["pipeline"]
+        sinks = [self.store_readings, self.publish_readings]
+        if self.plane is not None:
+            sinks.append(self.plane.publish)
+        self.pipeline = Pipeline(
+            sinks,
+            queue_size=pipeline_config["queue_size"],
+            policy=pipeline_config["policy"],
+            workers=pipeline_config["workers"],
+            batch_size=pipeline_config["batch_size"],
+        )
+        self.pipeline.start()
+
+        if self.ingestor is not None:
+            target, args = self.ingestor.run_forever, (self.pipeline.submit,)
+        elif hasattr(self.sensor, "run_forever"):
+            target, args = self.sensor.run_forever, (self.pipeline.submit,)
+        else:
+            target, args = self.data_collection_thread, ()
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop ingestion, close the sensor stores and release the data plane"""
+        for source in (self.sensor, self.ingestor):
+            if source is not None and hasattr(source, "stop"):
+                source.stop()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        self.registry.close()
+        if self.plane is not None:
+            self.plane.close()
+            self.plane = None
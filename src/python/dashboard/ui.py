@@ -0,0 +1,936 @@
+"""
+Dash user interface: layout, callbacks and HTTP routes
+
+Importing this module loads Dash, Flask and Plotly, so headless collectors
+never import it. ``build_dash_app`` wires a Dash app to a DashboardRuntime.
+"""
+
+import json
+import math
+import queue
+import time
+from typing import Optional
+
+import dash
+import flask
+import numpy as np
+import plotly.graph_objs as go
+from dash import Input, Output, State, dcc, html
+from dashboard.runtime import DashboardRuntime
+from utils import metrics
+from utils.downsample import lttb_indices
+from utils.query import DEFAULT_QUERY_FIELDS, iter_json, parse_time
+from utils.sensor_registry import (
+    ALL_SENSORS,
+    GROUP_PREFIX,
+    SensorChannel,
+    SensorRegistry,
+)
+
+SSE_RETRY_MS = 3000
+SSE_KEEPALIVE_SECONDS = 15
+
+# Chart windows in seconds (None = latest LIVE_POINTS readings)
+CHART_WINDOWS = {"live": None, "1h": 3600, "1d": 24 * 3600, "1w": 7 * 24 * 3600}
+LIVE_POINTS = 50
+MAX_CHART_POINTS = 1500
+RAW_WINDOW_SECONDS = 3600  # Longer windows are drawn from rollup tiers
+
+# Rows (readings or buckets) per /api/query page
+QUERY_PAGE_SIZE = 10000
+MAX_QUERY_PAGE_SIZE = 100000
+
+CHARTS = {
+    "temperature": {
+        "name": "온도",
+        "title": "온도 추이",
+        "yaxis_title": "온도 (°C)",
+        "color": "#ff6b6b",
+        "band_color": "rgba(255, 107, 107, 0.2)",
+    },
+    "humidity": {
+        "name": "습도",
+        "title": "습도 추이",
+        "yaxis_title": "습도 (%)",
+        "color": "#4ecdc4",
+        "band_color": "rgba(78, 205, 196, 0.2)",
+    },
+}
+
+
+def build_layout(stream_mode: str) -> html.Div:
+    """Page layout; ``stream_mode`` "sse" disables polling"""
+    return html.Div(
+        [
+            html.Div(
+                [
+                    html.H1("🌡️ DHT22 환경 모니터링", className="header-title"),
+                    html.P(
+                        "실시간 온도, 습도 및 체감 지수 모니터링",
+                        className="header-subtitle",
+                    ),
+                    html.Div(id="status-indicator", className="status-indicator"),
+                    dcc.Dropdown(
+                        id="sensor-select",
+                        placeholder="센서 선택",
+                        clearable=False,
+                        className="sensor-select",
+                    ),
+                ],
+                className="header",
+            ),
+            # Current readings cards (2x2 grid, full width)
+            html.Div(
+                [
+                    html.Div(
+                        [
+                            # 온도 카드
+                            html.Div(
+                                [
+                                    html.Div(
+                                        [
+                                            html.Span("🌡️", className="metric-icon"),
+                                            html.Div(
+                                                id="current-temperature",
+                                                className="metric-value",
+                                            ),
+                                            html.Span("°C", className="metric-unit"),
+                                        ],
+                                        className="metric-row",
+                                    ),
+                                    html.H3("온도", className="card-title"),
+                                ],
+                                className="metric-card",
+                            ),
+                            # 습도 카드
+                            html.Div(
+                                [
+                                    html.Div(
+                                        [
+                                            html.Span("💧", className="metric-icon"),
+                                            html.Div(
+                                                id="current-humidity",
+                                                className="metric-value",
+                                            ),
+                                            html.Span("%", className="metric-unit"),
+                                        ],
+                                        className="metric-row",
+                                    ),
+                                    html.H3("습도", className="card-title"),
+                                ],
+                                className="metric-card",
+                            ),
+                            # 이슬점 카드
+                            html.Div(
+                                [
+                                    html.Div(
+                                        [
+                                            html.Span("🌫️", className="metric-icon"),
+                                            html.Div(
+                                                id="current-dewpoint",
+                                                className="metric-value",
+                                            ),
+                                            html.Span("°C", className="metric-unit"),
+                                        ],
+                                        className="metric-row",
+                                    ),
+                                    html.H3("이슬점", className="card-title"),
+                                ],
+                                className="metric-card",
+                            ),
+                            # 체감 지수 카드
+                            html.Div(
+                                [
+                                    html.Div(
+                                        [
+                                            html.Div(
+                                                id="current-discomfort",
+                                                className="metric-value",
+                                            ),
+                                            html.Div(
+                                                id="comfort-level",
+                                                className="comfort-level-inline",
+                                            ),
+                                        ],
+                                        className="metric-row",
+                                    ),
+                                    html.H3("체감 지수", className="card-title"),
+                                ],
+                                className="metric-card",
+                            ),
+                        ],
+                        className="metrics-grid-2x2",
+                    ),
+                ],
+                className="metrics-full",
+            ),
+            # Charts
+            html.Div(
+                [
+                    html.H2("📊 실시간 차트"),
+                    dcc.RadioItems(
+                        id="chart-window",
+                        options=[
+                            {"label": "최근 50개", "value": "live"},
+                            {"label": "1시간", "value": "1h"},
+                            {"label": "1일", "value": "1d"},
+                            {"label": "1주", "value": "1w"},
+                        ],
+                        value="live",
+                        inline=True,
+                        className="chart-window",
+                    ),
+                    dcc.Graph(id="temperature-chart"),
+                    dcc.Graph(id="humidity-chart"),
+                ],
+                className="charts-section",
+            ),
+            # Statistics
+            html.Div(
+                [html.H2("📈 통계"), html.Div(id="statistics-table")],
+                className="stats-section",
+            ),
+            # Auto-refresh interval
+            dcc.Interval(
+                id="interval-component",
+                interval=2000,  # Update every 2 seconds
+                n_intervals=0,
+                disabled=stream_mode == "sse",  # Server push replaces polling
+            ),
+            # Snapshot version last delivered to this client
+            dcc.Store(id="snapshot-version"),
+            # Newest reading, rendered into the metric cards client-side
+            dcc.Store(id="latest-reading"),
+            # Window and newest timestamp each chart has received
+            dcc.Store(id="temperature-chart-cursor"),
+            dcc.Store(id="humidity-chart-cursor"),
+        ],
+        className="container",
+    )
+
+
+def to_datetime64(timestamps: np.ndarray) -> np.ndarray:
+    """Convert epoch seconds to datetime64[ms] for Plotly time axes"""
+    return (timestamps * 1000).astype("datetime64[ms]")
+
+
+def selection_label(selection: str) -> str:
+    """Dropdown label for a registry selection key"""
+    if selection == ALL_SENSORS:
+        return "전체 평균"
+    if selection.startswith(GROUP_PREFIX):
+        return f"그룹: {selection[len(GROUP_PREFIX) :]}"
+    return selection
+
+
+def get_chart_series(channel: SensorChannel, field: str, window_key: str) -> tuple:
+    """
+    Select the points to plot for one sensor in a chart window
+
+    Short windows use raw readings, longer ones the coarsest-needed rollup
+    tier; both are capped at MAX_CHART_POINTS with LTTB.
+
+    Returns:
+        (timestamps, values, lower, upper); lower/upper are the min/max band
+        for rollup data and None for raw readings
+    """
+    window = CHART_WINDOWS.get(window_key)
+    if window is None:
+        columns = channel.buffer.get_columns(LIVE_POINTS, copy=True)
+        return columns["python_timestamp"], columns[field], None, None
+
+    end = time.time()
+    start = end - window
+    if window <= RAW_WINDOW_SECONDS:
+        columns = channel.buffer.get_range(start, end)
+        timestamps = columns["python_timestamp"]
+        values = columns[field]
+        indices = lttb_indices(timestamps, values, MAX_CHART_POINTS)
+        return timestamps[indices], values[indices], None, None
+
+    tier = channel.rollups.select(start, end, MAX_CHART_POINTS * 4)
+    buckets = tier.get_range(start, end)
+    has_data = buckets[f"{field}_count"] > 0
+    timestamps = buckets["time"][has_data]
+    values = buckets[f"{field}_mean"][has_data]
+    indices = lttb_indices(timestamps, values, MAX_CHART_POINTS)
+    return (
+        timestamps[indices],
+        values[indices],
+        buckets[f"{field}_min"][has_data][indices],
+        buckets[f"{field}_max"][has_data][indices],
+    )
+
+
+def build_chart_figure(
+    series_by_sensor: dict[str, tuple], window_key: str, chart: dict
+) -> go.Figure:
+    """
+    Build a time-series figure from get_chart_series output
+
+    A single sensor is drawn in the chart colour with its min/max band;
+    several sensors get one line each.
+    """
+    fig = go.Figure()
+    single = len(series_by_sensor) == 1
+    for sensor_id, (timestamps, values, lower, upper) in series_by_sensor.items():
+        if not len(timestamps):
+            continue
+        x = to_datetime64(timestamps)
+        if single and lower is not None:
+            fig.add_trace(
+                go.Scatter(
+                    x=x,
+                    y=lower,
+                    mode="lines",
+                    line={"width": 0},
+                    hoverinfo="skip",
+                    showlegend=False,
+                )
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=x,
+                    y=upper,
+                    mode="lines",
+                    line={"width": 0},
+                    fill="tonexty",
+                    fillcolor=chart["band_color"],
+                    name="최소/최대",
+                )
+            )
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=values,
+                mode="lines+markers" if window_key == "live" else "lines",
+                name=chart["name"] if single else sensor_id,
+                line={"color": chart["color"], "width": 2} if single else {"width": 2},
+            )
+        )
+
+    if not fig.data:
+        return go.Figure()
+
+    fig.update_layout(
+        title=chart["title"],
+        xaxis_title="시간",
+        yaxis_title=chart["yaxis_title"],
+        height=300,
+        margin={"l": 50, "r": 50, "t": 50, "b": 50},
+        uirevision=window_key,
+    )
+
+    return fig
+
+
+def build_chart(
+    registry: SensorRegistry, field: str, window_key: str, selection: Optional[str]
+) -> dict:
+    """Full figure for a chart plus the newest timestamp it shows"""
+    series_by_sensor = {
+        channel.sensor_id: get_chart_series(channel, field, window_key)
+        for channel in registry.resolve(selection)
+    }
+    last_ts = max(
+        (
+            float(series[0][-1])
+            for series in series_by_sensor.values()
+            if len(series[0])
+        ),
+        default=None,
+    )
+    return {
+        "figure": build_chart_figure(series_by_sensor, window_key, CHARTS[field]),
+        "last_ts": last_ts,
+    }
+
+
+def build_chart_extension(channel: SensorChannel, field: str, last_ts: float) -> dict:
+    """
+    Live-chart extendData payload with one sensor's readings after ``last_ts``
+
+    Returns:
+        ``{"data": extendData, "last_ts": float}``, ``{}`` when there is
+        nothing new, or ``{"rebuild": True}`` when the client is too far
+        behind for the buffer to fill the gap
+    """
+    buffer = channel.buffer
+    columns = buffer.get_columns(copy=True)
+    timestamps = columns["python_timestamp"]
+    lo = int(np.searchsorted(timestamps, last_ts, "right"))
+    if lo == len(timestamps):
+        return {}
+    if lo == 0 and len(buffer) == buffer.max_size:
+        return {"rebuild": True}
+
+    x = np.datetime_as_string(to_datetime64(timestamps[lo:]), unit="ms")
+    return {
+        "data": [
+            {"x": [x.tolist()], "y": [columns[field][lo:].tolist()]},
+            [0],
+            LIVE_POINTS,
+        ],
+        "last_ts": float(timestamps[-1]),
+    }
+
+
+def update_chart(
+    runtime: DashboardRuntime,
+    field: str,
+    window_key: str,
+    selection: Optional[str],
+    cursor: Optional[dict],
+) -> tuple:
+    """
+    Shared body of the chart callbacks
+
+    A full figure is sent when the window or sensor selection changes (or
+    the client needs a rebuild); otherwise a single sensor's live chart only
+    receives newer points via extendData. Time windows are downsampled, so
+    appending raw points would shrink them: the raw (1h) window is redrawn
+    when the sensor has a newer reading, rollup windows when a new bucket
+    starts. Multi-sensor selections are redrawn on each version.
+
+    Returns:
+        (figure, extendData, cursor) with dash.no_update where unchanged
+    """
+    snapshot = runtime.snapshots.current
+    window = CHART_WINDOWS[window_key]
+    channels = runtime.registry.resolve(selection)
+    last_ts = cursor.get("last_ts") if cursor else None
+    rebuild = (
+        last_ts is None
+        or len(channels) != 1
+        or cursor.get("window") != window_key
+        or cursor.get("selection") != selection
+    )
+
+    if not rebuild and window is not None:
+        if window > RAW_WINDOW_SECONDS:
+            end = time.time()
+            tier = channels[0].rollups.select(end - window, end, MAX_CHART_POINTS * 4)
+            newest = tier.newest_time
+        else:
+            latest = channels[0].latest
+            newest = latest["python_timestamp"] if latest else math.nan
+        if not newest > last_ts:
+            return dash.no_update, dash.no_update, dash.no_update
+        rebuild = True
+
+    if not rebuild:
+        extension = snapshot.get_or_build(
+            (f"{field}-extension", selection, last_ts),
+            lambda: build_chart_extension(channels[0], field, last_ts),
+        )
+        if not extension:
+            return dash.no_update, dash.no_update, dash.no_update
+        if not extension.get("rebuild"):
+            new_cursor = {
+                "window": window_key,
+                "selection": selection,
+                "last_ts": extension["last_ts"],
+            }
+            return dash.no_update, extension["data"], new_cursor
+
+    chart = snapshot.get_or_build(
+        (f"{field}-chart", window_key, selection),
+        lambda: build_chart(runtime.registry, field, window_key, selection),
+    )
+    return (
+        chart["figure"],
+        dash.no_update,
+        {"window": window_key, "selection": selection, "last_ts": chart["last_ts"]},
+    )
+
+
+def build_statistics_table(stats):
+    """Build the statistics table for a snapshot's stats"""
+    if not stats:
+        return html.P("통계 데이터가 없습니다.")
+
+    table_rows = []
+    for metric, values in stats.items():
+        if metric in ["temperature", "humidity", "dew_point", "discomfort_index"]:
+            korean_names = {
+                "temperature": "온도 (°C)",
+                "humidity": "습도 (%)",
+                "dew_point": "이슬점 (°C)",
+                "discomfort_index": "불쾌지수",
+            }
+
+            table_rows.append(
+                html.Tr(
+                    [
+                        html.Td(korean_names[metric]),
+                        html.Td(f"{values['min']:.1f}"),
+                        html.Td(f"{values['max']:.1f}"),
+                        html.Td(f"{values['mean']:.1f}"),
+                        html.Td(f"{values['current']:.1f}"),
+                    ]
+                )
+            )
+
+    return html.Table(
+        [
+            html.Thead(
+                [
+                    html.Tr(
+                        [
+                            html.Th("측정값"),
+                            html.Th("최소값"),
+                            html.Th("최대값"),
+                            html.Th("평균값"),
+                            html.Th("현재값"),
+                        ]
+                    )
+                ]
+            ),
+            html.Tbody(table_rows),
+        ],
+        className="stats-table",
+    )
+
+
+def timed_callback(function):
+    """Record every call of a Dash callback in dht22_callback_seconds"""
+    return metrics.histogram(
+        "dht22_callback_seconds",
+        "Server-side Dash callback duration",
+        callback=function.__name__,
+    ).time(function)
+
+
+# CSS styling and the server-sent event client
+INDEX_STRING = """
+<!DOCTYPE html>
+<html>
+    <head>
+        {%metas%}
+        <title>{%title%}</title>
+        {%favicon%}
+        {%css%}
+        <style>
+            /* 전체 페이지 배경 및 폰트 설정 */
+            body {
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                margin: 0;
+                padding: 0;
+                background-color: #f5f7fa;
+            }
+            /* 대시보드 전체 컨테이너 */
+            .container {
+                max-width: 1200px;
+                margin: 0 auto;
+                padding: 20px;
+            }
+            /* 상단 헤더 영역 */
+            .header {
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 30px;
+                border-radius: 12px;
+                margin-bottom: 30px;
+                text-align: center;
+            }
+            /* 헤더 타이틀 */
+            .header-title {
+                margin: 0 0 10px 0;
+                font-size: 2.5em;
+            }
+            /* 헤더 서브타이틀 */
+            .header-subtitle {
+                margin: 0;
+                opacity: 0.9;
+                font-size: 1.2em;
+            }
+            /* 연결 상태 표시 */
+            .status-indicator {
+                margin-top: 15px;
+                font-size: 1.1em;
+                font-weight: bold;
+            }
+            /* 측정값 카드 전체 영역 (가운데 정렬) */
+            .metrics-full {
+                width: 100%;
+                display: flex;
+                justify-content: center;
+                align-items: center;
+                margin-bottom: 30px;
+            }
+            /* 2x2 측정값 카드 그리드 (온도/습도/이슬점/체감지수) */
+            .metrics-grid-2x2 {
+                display: grid;
+                grid-template-columns: 1fr 1fr;
+                grid-template-rows: 1fr 1fr;
+                column-gap: 130px;
+                row-gap: 30px;
+                width: 100%;
+                max-width: 600px;
+            }
+            /* 개별 측정값 카드 스타일 */
+            .metric-card {
+                background: white;
+                padding: 32px 0 32px 0;
+                border-radius: 12px;
+                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+                text-align: center;
+                width: 100%;
+                min-width: 0;
+                min-height: 160px;
+                display: flex;
+                flex-direction: column;
+                align-items: center;
+                justify-content: center;
+            }
+            /* 값+아이콘+단위 한 줄 배치 */
+            .metric-row {
+                display: flex;
+                flex-direction: row;
+                align-items: center;
+                justify-content: center;
+                gap: 10px;
+                margin-bottom: 8px;
+            }
+            .metric-icon {
+                font-size: 2em;
+                margin-left: 2px;
+                margin-right: 2px;
+            }
+            .comfort-level-inline {
+                margin-left: 8px;
+                padding: 6px 14px;
+                border-radius: 20px;
+                font-weight: bold;
+                color: white;
+                background-color: #3498db;
+                font-size: 1em;
+                display: inline-block;
+            }
+            /* 개별 측정값 카드 스타일 (중복 정의, 필요시 하나만 유지) */
+            .metric-card {
+                background: white;
+                padding: 25px;
+                border-radius: 12px;
+                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+                text-align: center;
+            }
+            /* 카드 타이틀 (예: 온도, 습도 등) */
+            .card-title {
+                margin: 0 0 15px 0;
+                color: #333;
+                font-size: 1.2em;
+            }
+            /* 카드 내 값 표시 (숫자) */
+            .metric-value {
+                font-size: 2.5em;
+                font-weight: bold;
+                color: #2c3e50;
+                margin-bottom: 5px;
+            }
+            /* 단위 표시 (°C, %) */
+            .metric-unit {
+                color: #7f8c8d;
+                font-size: 2.5em;
+            }
+            /* 체감 지수 레벨 표시 (쾌적 등) */
+            .comfort-level {
+                margin-top: 10px;
+                padding: 8px 16px;
+                border-radius: 20px;
+                font-weight: bold;
+                color: white;
+                background-color: #3498db;
+            }
+            /* 차트/통계 영역 카드 스타일 */
+            .charts-section, .stats-section {
+                background: white;
+                padding: 25px;
+                border-radius: 12px;
+                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+                margin-bottom: 30px;
+            }
+            /* 센서 선택 */
+            .sensor-select {
+                width: 240px;
+                margin: 15px auto 0;
+                color: #2c3e50;
+                text-align: left;
+            }
+            /* 차트 기간 선택 */
+            .chart-window label {
+                margin-right: 16px;
+                cursor: pointer;
+            }
+            /* 통계 테이블 전체 */
+            .stats-table {
+                width: 100%;
+                border-collapse: collapse;
+                margin-top: 20px;
+            }
+            /* 통계 테이블 셀 스타일 */
+            .stats-table th, .stats-table td {
+                padding: 12px;
+                text-align: left;
+                border-bottom: 1px solid #ddd;
+            }
+            /* 통계 테이블 헤더 셀 스타일 */
+            .stats-table th {
+                background-color: #f8f9fa;
+                font-weight: bold;
+            }
+        </style>
+    </head>
+    <body>
+        {%app_entry%}
+        <footer>
+            {%config%}
+            {%scripts%}
+            {%renderer%}
+            <script>
+                /* 서버 푸시(SSE) 수신: 새 측정값이 올 때만 화면 갱신 */
+                (function () {
+                    if (!window.EventSource || !window.dash_clientside) {
+                        return;
+                    }
+                    var failures = 0;
+                    var source = new EventSource("/api/stream");
+                    source.onmessage = function (event) {
+                        var reading = JSON.parse(event.data);
+                        failures = 0;
+                        dash_clientside.set_props("latest-reading", {data: reading});
+                        dash_clientside.set_props(
+                            "snapshot-version", {data: reading.version}
+                        );
+                    };
+                    source.onerror = function () {
+                        failures += 1;
+                        if (failures >= 3) {
+                            /* 스트림 실패 시 폴링으로 전환 */
+                            source.close();
+                            dash_clientside.set_props(
+                                "interval-component", {disabled: false}
+                            );
+                        }
+                    };
+                })();
+            </script>
+        </footer>
+    </body>
+</html>
+"""
+
+
+def build_dash_app(runtime: DashboardRuntime) -> dash.Dash:
+    """
+    Dash app serving ``runtime``: layout, callbacks and the HTTP API
+
+    The returned app is also the WSGI callable (``app.server`` is Flask).
+    """
+    app = dash.Dash(__name__)
+    app.title = "DHT22 Environmental Monitor"
+    app.layout = build_layout(runtime.config["server"]["stream_mode"])
+    app.index_string = INDEX_STRING
+    snapshots = runtime.snapshots
+    registry = runtime.registry
+
+    @app.server.route("/api/stream")
+    def api_stream():
+        """Server-sent event stream with one message per processed reading"""
+        subscription = runtime.broadcaster.subscribe()
+        if snapshots.current.latest:
+            subscription.put(json.dumps(runtime.latest_reading()))
+
+        def events():
+            try:
+                yield f"retry: {SSE_RETRY_MS}\n\n"
+                while True:
+                    try:
+                        message = subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"data: {message}\n\n"
+            finally:
+                runtime.broadcaster.unsubscribe(subscription)
+
+        return flask.Response(
+            flask.stream_with_context(events()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.server.route("/api/pipeline")
+    def api_pipeline():
+        """Ingestion pipeline queue depths and counters as JSON"""
+        if runtime.pipeline is None:
+            flask.abort(404)  # Workers do not ingest
+        return flask.jsonify(runtime.pipeline.metrics())
+
+    @app.server.route("/metrics")
+    def prometheus_metrics():
+        """Hot-path timings and counters in Prometheus text format"""
+        if not metrics.is_enabled():
+            flask.abort(404)
+        return flask.Response(
+            metrics.render_prometheus(), mimetype="text/plain; version=0.0.4"
+        )
+
+    @app.server.route("/api/query")
+    def api_query():
+        """
+        One sensor's history as streamed columnar JSON
+
+        Query parameters: sensor, start/end (epoch seconds or ISO 8601),
+        fields (comma-separated), agg (mean/min/max/p95), bucket (e.g. 1m,
+        or raw), limit and cursor (next_cursor of the previous page).
+        """
+        args = flask.request.args
+        try:
+            result = registry.query(
+                args.get("sensor", ""),
+                start=parse_time(args.get("start")),
+                end=parse_time(args.get("end")),
+                fields=args.get("fields", ",".join(DEFAULT_QUERY_FIELDS)).split(","),
+                agg=args.get("agg", "mean"),
+                bucket=args.get("bucket", "1m"),
+                limit=min(
+                    args.get("limit", QUERY_PAGE_SIZE, type=int), MAX_QUERY_PAGE_SIZE
+                ),
+                cursor=args.get("cursor"),
+            )
+        except KeyError:
+            return flask.jsonify({"error": "Unknown sensor"}), 404
+        except ValueError as e:
+            return flask.jsonify({"error": str(e)}), 400
+        return flask.Response(iter_json(result), mimetype="application/json")
+
+    @app.server.route("/api/latest")
+    def api_latest():
+        """Latest processed reading as JSON"""
+        return flask.jsonify(runtime.latest_reading())
+
+    @app.callback(
+        [Output("snapshot-version", "data"), Output("latest-reading", "data")],
+        [Input("interval-component", "n_intervals")],
+        [State("snapshot-version", "data")],
+    )
+    @timed_callback
+    def sync_snapshot_version(n, client_version):
+        """Advance the client's snapshot version only when new data exists"""
+        snapshot = snapshots.current
+        if snapshot.version == client_version:
+            return dash.no_update, dash.no_update
+        return snapshot.version, runtime.latest_reading(snapshot)
+
+    @app.callback(
+        [Output("sensor-select", "options"), Output("sensor-select", "value")],
+        [Input("snapshot-version", "data")],
+        [State("sensor-select", "value")],
+    )
+    @timed_callback
+    def update_sensor_options(version, selection):
+        """List known sensors, groups and the aggregate in the sensor dropdown"""
+        selections = registry.selections()
+        options = [{"label": selection_label(key), "value": key} for key in selections]
+        if selection not in selections:
+            selection = ALL_SENSORS if ALL_SENSORS in selections else None
+            if selection is None and selections:
+                selection = selections[0]
+        return options, selection
+
+    # Metric cards and status are formatted in the browser
+    app.clientside_callback(
+        """
+        function(payload, selection) {
+            const connection = (payload && payload.connection) || {};
+            let status = "🔴 연결 안됨";
+            if (payload && payload.simulated) {
+                status = "🟢 연결됨 (시뮬)";
+            } else if (connection.state === "connected") {
+                status = connection.total > 1
+                    ? `🟢 연결됨 (${connection.connected}/${connection.total})`
+                    : "🟢 연결됨";
+            } else if (connection.state === "reconnecting") {
+                status = "🟡 재연결 중";
+            } else if (connection.state === "connecting") {
+                status = "🟡 연결 중";
+            }
+
+            const readings = payload && payload.readings;
+            const reading = readings && (readings[selection] || Object.values(readings)[0]);
+            if (!reading) {
+                return ["—", "—", "—", "—", "데이터 없음", status];
+            }
+            const format = (value) =>
+                value === null || value === undefined ? "—" : Number(value).toFixed(1);
+            return [
+                format(reading.temperature),
+                format(reading.humidity),
+                format(reading.dew_point),
+                format(reading.discomfort_index),
+                reading.comfort_level || "—",
+                status,
+            ];
+        }
+        """,
+        [
+            Output("current-temperature", "children"),
+            Output("current-humidity", "children"),
+            Output("current-dewpoint", "children"),
+            Output("current-discomfort", "children"),
+            Output("comfort-level", "children"),
+            Output("status-indicator", "children"),
+        ],
+        [Input("latest-reading", "data"), Input("sensor-select", "value")],
+    )
+
+    @app.callback(
+        [
+            Output("temperature-chart", "figure"),
+            Output("temperature-chart", "extendData"),
+            Output("temperature-chart-cursor", "data"),
+        ],
+        [
+            Input("snapshot-version", "data"),
+            Input("chart-window", "value"),
+            Input("sensor-select", "value"),
+        ],
+        [State("temperature-chart-cursor", "data")],
+    )
+    @timed_callback
+    def update_temperature_chart(version, window_key, selection, cursor=None):
+        """Update temperature chart"""
+        return update_chart(runtime, "temperature", window_key, selection, cursor)
+
+    @app.callback(
+        [
+            Output("humidity-chart", "figure"),
+            Output("humidity-chart", "extendData"),
+            Output("humidity-chart-cursor", "data"),
+        ],
+        [
+            Input("snapshot-version", "data"),
+            Input("chart-window", "value"),
+            Input("sensor-select", "value"),
+        ],
+        [State("humidity-chart-cursor", "data")],
+    )
+    @timed_callback
+    def update_humidity_chart(version, window_key, selection, cursor=None):
+        """Update humidity chart"""
+        return update_chart(runtime, "humidity", window_key, selection, cursor)
+
+    @app.callback(
+        Output("statistics-table", "children"),
+        [Input("snapshot-version", "data"), Input("sensor-select", "value")],
+    )
+    @timed_callback
+    def update_statistics(version, selection):
+        """Update statistics table"""
+        return snapshots.current.get_or_build(
+            ("statistics-table", selection),
+            lambda: build_statistics_table(registry.aggregate_stats(selection)),
+        )
+
+    return app
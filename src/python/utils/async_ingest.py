@@ -0,0 +1,219 @@
+"""
+asyncio-based ingestion of DHT22 readings from many serial ports
+
+All ports are served by one event loop: each port is opened non-blocking,
+its bytes are decoded by a per-port StreamDecoder (JSON lines or binary
+frames, detected automatically), and parsed records tagged with
+their source id go into one shared queue consumed by a processing task.
+"""
+
+import asyncio
+import logging
+import os
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from typing import Callable, Optional, Union
+
+import serial
+
+from . import metrics
+from .data_processor import process_sensor_data
+from .serial_reader import (
+    RECONNECTS,
+    STATE_CONNECTED,
+    STATE_CONNECTING,
+    STATE_DISCONNECTED,
+    STATE_RECONNECTING,
+    Backoff,
+    StreamDecoder,
+)
+
+logger = logging.getLogger(__name__)
+
+INGEST_DROPPED = metrics.counter(
+    "dht22_readings_dropped_total",
+    "Readings discarded before processing",
+    reason="ingest_queue_full",
+)
+
+
+class AsyncSerialIngestor:
+    """
+    Read N serial ports concurrently without a thread per port
+
+    On POSIX the serial file descriptors are registered with the event loop
+    (``add_reader``); where that is not available (Windows COM ports) each
+    port is polled with non-blocking reads every ``poll_interval`` seconds.
+    A port that fails is reopened with exponential backoff starting at
+    ``reconnect_delay`` seconds; per-port states are kept in ``states`` and
+    reported to ``on_state_change(source_id, state)``.
+    """
+
+    def __init__(
+        self,
+        ports: Union[Mapping[str, str], Iterable[str]],
+        baudrate: int = 9600,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        poll_interval: float = 0.05,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        protocol: str = "auto",
+        on_state_change: Optional[Callable[[str, str], None]] = None,
+        processor: Optional[Callable[[dict], dict]] = process_sensor_data,
+    ):
+        # Source id -> serial port; plain port lists use the port as the id
+        if isinstance(ports, Mapping):
+            self.ports = dict(ports)
+        else:
+            self.ports = {port: port for port in ports}
+        self.baudrate = baudrate
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.protocol = protocol
+        self.on_state_change = on_state_change
+        self.processor = processor
+
+        self.received: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.dropped = 0
+        self.states = dict.fromkeys(self.ports, STATE_DISCONNECTED)
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def _set_state(self, source_id: str, state: str) -> None:
+        if self.states.get(source_id) == state:
+            return
+        self.states[source_id] = state
+        if self.on_state_change is not None:
+            try:
+                self.on_state_change(source_id, state)
+            except Exception as e:
+                logger.warning(f"State change callback failed: {e}")
+
+    def _open(self, port: str) -> serial.Serial:
+        """Open a port in non-blocking mode"""
+        return serial.Serial(port=port, baudrate=self.baudrate, timeout=0)
+
+    def _drain(
+        self, source_id: str, connection: serial.Serial, decoder: StreamDecoder
+    ) -> None:
+        """Read whatever is available and queue the parsed records"""
+        data = connection.read(connection.in_waiting or 1)
+        if not data:
+            return
+        errors = decoder.errors
+        records = decoder.feed(data)
+        self.errors[source_id] += decoder.errors - errors
+        for record in records:
+            record["source"] = source_id
+            self.received[source_id] += 1
+            try:
+                self._queue.put_nowait(record)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                INGEST_DROPPED.inc()
+
+    async def _read_port(self, source_id: str, port: str) -> None:
+        """Keep one port open and feed its records into the shared queue"""
+        loop = asyncio.get_running_loop()
+        backoff = Backoff(self.reconnect_delay, self.max_reconnect_delay)
+        while True:
+            try:
+                connection = self._open(port)
+            except serial.SerialException as e:
+                logger.error(f"Failed to open {port} ({source_id}): {e}")
+                self._set_state(source_id, STATE_RECONNECTING)
+                await asyncio.sleep(backoff.next())
+                continue
+
+            logger.info(f"Ingesting {source_id} from {port} at {self.baudrate} baud")
+            self._set_state(source_id, STATE_CONNECTED)
+            backoff.reset()
+            decoder = StreamDecoder(self.protocol)
+            fd = connection.fileno() if os.name == "posix" else None
+            ready = asyncio.Event()
+            try:
+                if fd is not None:
+                    loop.add_reader(fd, ready.set)
+                while True:
+                    if fd is not None:
+                        await ready.wait()
+                        ready.clear()
+                    else:
+                        await asyncio.sleep(self.poll_interval)
+                    self._drain(source_id, connection, decoder)
+            except (serial.SerialException, OSError) as e:
+                logger.warning(f"Lost {port} ({source_id}): {e}")
+                self.errors[source_id] += 1
+                RECONNECTS.inc()
+                self._set_state(source_id, STATE_RECONNECTING)
+            finally:
+                if fd is not None:
+                    loop.remove_reader(fd)
+                connection.close()
+            await asyncio.sleep(backoff.next())
+
+    async def _process(self, sink: Callable[[list[dict]], None]) -> None:
+        """
+        Drain the shared queue in batches, process and hand to ``sink``
+
+        Without a ``processor`` the raw records are passed on as they are
+        (e.g. to a Pipeline that processes them on its own workers).
+        """
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if self.processor is None:
+                sink(batch)
+                continue
+            processed = []
+            for record in batch:
+                try:
+                    processed.append(self.processor(record))
+                except Exception as e:
+                    logger.warning(f"Error processing {record.get('source')}: {e}")
+            if processed:
+                sink(processed)
+
+    async def run(self, sink: Callable[[list[dict]], None]) -> None:
+        """
+        Ingest from every port until ``stop`` is called
+
+        Args:
+            sink: Called with each batch of processed records
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        for source_id in self.ports:
+            self._set_state(source_id, STATE_CONNECTING)
+        self._tasks = [
+            asyncio.create_task(self._read_port(source_id, port))
+            for source_id, port in self.ports.items()
+        ]
+        self._tasks.append(asyncio.create_task(self._process(sink)))
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            for source_id in self.ports:
+                self._set_state(source_id, STATE_DISCONNECTED)
+
+    def run_forever(self, sink: Callable[[list[dict]], None]) -> None:
+        """Run the ingestion loop in the calling thread"""
+        asyncio.run(self.run(sink))
+
+    def stop(self) -> None:
+        """Stop ingestion (safe to call from any thread)"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        for task in self._tasks:
+            self._loop.call_soon_threadsafe(task.cancel)
@@ -1,11 +1,46 @@
 """
 Data processing utilities for DHT22 environmental monitoring
+
+The live path works on NumPy columns only; pandas is imported on demand for
+export and analytics (DataBuffer.to_dataframe, DataFrame batches).
 """
 
 import math
+import sys
+import time
+from bisect import bisect_right
+from collections.abc import Mapping
 from datetime import datetime
+from typing import TYPE_CHECKING, Optional, Union
+
+import numpy as np
+
+from . import metrics
+from .reading import (
+    COMFORT_LEVELS,
+    LABEL_CODES,
+    LABEL_FIELDS,
+    MISSING,
+    NUMERIC_FIELDS,
+    Reading,
+)
+from .running_stats import SlidingWindowStats
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .storage import SegmentStore
 
-import pandas as pd
+# Discomfort-index boundaries between the COMFORT_LEVELS
+COMFORT_THRESHOLDS = np.array([21.0, 24.0, 27.0, 29.0, 32.0])
+_COMFORT_BOUNDS = tuple(COMFORT_THRESHOLDS.tolist())
+
+PROCESS_SECONDS = metrics.histogram(
+    "dht22_process_seconds", "Time to process one reading (process_sensor_data)"
+)
+BUFFER_APPEND_SECONDS = metrics.histogram(
+    "dht22_buffer_append_seconds", "Time to append one reading to a DataBuffer"
+)
 
 
 def calculate_dew_point(temperature: float, humidity: float) -> float:
@@ -102,7 +137,12 @@ def get_comfort_level(discomfort_index: float) -> str:
         return "매우 불쾌"
 
 
-def process_sensor_data(raw_data: dict) -> dict:
+def get_comfort_code(discomfort_index: float) -> int:
+    """Index into COMFORT_LEVELS of get_comfort_level(discomfort_index)"""
+    return bisect_right(_COMFORT_BOUNDS, discomfort_index)
+
+
+def process_sensor_data(raw_data: Mapping) -> Reading:
     """
     Process raw sensor data and add calculated values
 
@@ -110,75 +150,416 @@ def process_sensor_data(raw_data: dict) -> dict:
         raw_data: Raw sensor data from Arduino
 
     Returns:
-        Processed data with additional calculated values
+        Processed reading with additional calculated values (``heat_index``
+        too when the sensor did not send one, as binary frames do not); its
+        ``datetime`` is formatted only when looked up
     """
+    started = time.perf_counter()
     temperature = raw_data.get("temperature", 0)
     humidity = raw_data.get("humidity", 0)
+    discomfort_index = calculate_discomfort_index(temperature, humidity)
 
-    processed = raw_data.copy()
+    # Add timestamp if not present
+    python_timestamp = raw_data.get("python_timestamp")
+    if python_timestamp is None:
+        python_timestamp = datetime.now().timestamp()
+
+    calculated = {}
+    if raw_data.get("heat_index") is None:
+        calculated["heat_index"] = calculate_heat_index(temperature, humidity)
+
+    processed = Reading.from_mapping(
+        raw_data,
+        dew_point=calculate_dew_point(temperature, humidity),
+        discomfort_index=discomfort_index,
+        comfort_code=get_comfort_code(discomfort_index),
+        python_timestamp=python_timestamp,
+        **calculated,
+    )
 
-    # Add calculated values
-    processed["dew_point"] = calculate_dew_point(temperature, humidity)
-    processed["discomfort_index"] = calculate_discomfort_index(temperature, humidity)
-    processed["comfort_level"] = get_comfort_level(processed["discomfort_index"])
+    PROCESS_SECONDS.observe(time.perf_counter() - started)
+    return processed
 
-    # Add timestamp if not present
-    if "python_timestamp" not in processed:
-        processed["python_timestamp"] = datetime.now().timestamp()
 
-    # Add formatted datetime
-    processed["datetime"] = datetime.fromtimestamp(
-        processed["python_timestamp"]
-    ).strftime("%Y-%m-%d %H:%M:%S")
+def dew_point_array(temperature: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """
+    Vectorized Magnus dew point, see calculate_dew_point
+
+    Args:
+        temperature: Temperatures in Celsius
+        humidity: Relative humidities as percentage (0-100)
 
+    Returns:
+        Dew points in Celsius (NaN where humidity is not positive)
+    """
+    a = 17.27
+    b = 237.7
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = (a * temperature) / (b + temperature) + np.log(humidity / 100.0)
+        dew_point = (b * alpha) / (a - alpha)
+    dew_point[~np.isfinite(dew_point)] = np.nan
+
+    return np.round(dew_point, 2)
+
+
+def heat_index_array(temperature: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """
+    Vectorized heat index, see calculate_heat_index
+
+    Args:
+        temperature: Temperatures in Celsius
+        humidity: Relative humidities as percentage (0-100)
+
+    Returns:
+        Heat indices in Celsius (the input temperature below 80°F)
+    """
+    temp_f = temperature * 9 / 5 + 32
+    temp_f2 = temp_f * temp_f
+    humidity2 = humidity * humidity
+
+    hi = (
+        -42.379
+        + 2.04901523 * temp_f
+        + 10.14333127 * humidity
+        - 0.22475541 * temp_f * humidity
+        - 6.83783e-3 * temp_f2
+        - 5.481717e-2 * humidity2
+        + 1.22874e-3 * temp_f2 * humidity
+        + 8.5282e-4 * temp_f * humidity2
+        - 1.99e-6 * temp_f2 * humidity2
+    )
+
+    heat_index_c = np.round((hi - 32) * 5 / 9, 2)
+    return np.where(temp_f < 80, temperature, heat_index_c)
+
+
+def discomfort_index_array(temperature: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """
+    Vectorized Thom discomfort index, see calculate_discomfort_index
+
+    Args:
+        temperature: Temperatures in Celsius
+        humidity: Relative humidities as percentage (0-100)
+
+    Returns:
+        Discomfort indices
+    """
+    di = temperature - (0.55 - 0.0055 * humidity) * (temperature - 14.5)
+    return np.round(di, 2)
+
+
+def comfort_level_codes(discomfort_index: np.ndarray) -> np.ndarray:
+    """
+    Vectorized get_comfort_level returning indices into COMFORT_LEVELS
+
+    Args:
+        discomfort_index: Calculated discomfort indices
+
+    Returns:
+        int8 comfort codes (0 = 매우 쾌적 ... 5 = 매우 불쾌)
+    """
+    return np.digitize(discomfort_index, COMFORT_THRESHOLDS).astype(np.int8)
+
+
+def _is_dataframe(data) -> bool:
+    """isinstance(data, pd.DataFrame) without importing pandas"""
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(data, pandas.DataFrame)
+
+
+def process_sensor_batch(
+    data: Union["pd.DataFrame", Mapping[str, np.ndarray]],
+) -> Union["pd.DataFrame", dict[str, np.ndarray]]:
+    """
+    Process many sensor readings at once with vectorized formulas
+
+    Batch counterpart of process_sensor_data for backfills. Formatted
+    ``datetime`` strings are not generated; ``comfort_code`` indexes
+    COMFORT_LEVELS.
+
+    Args:
+        data: DataFrame or mapping of equal-length arrays with at least
+            ``temperature`` and ``humidity``
+
+    Returns:
+        Same kind of container as the input with ``dew_point``,
+        ``heat_index`` (if not already present), ``discomfort_index`` and
+        ``comfort_code`` added; DataFrames also get a categorical
+        ``comfort_level``
+    """
+    temperature = np.asarray(data["temperature"], dtype=np.float64)
+    humidity = np.asarray(data["humidity"], dtype=np.float64)
+
+    discomfort_index = discomfort_index_array(temperature, humidity)
+    calculated = {
+        "dew_point": dew_point_array(temperature, humidity),
+        "discomfort_index": discomfort_index,
+        "comfort_code": comfort_level_codes(discomfort_index),
+    }
+    if "heat_index" not in data:
+        calculated["heat_index"] = heat_index_array(temperature, humidity)
+
+    if _is_dataframe(data):
+        import pandas as pd
+
+        processed = data.copy()
+        for column, values in calculated.items():
+            processed[column] = values
+        processed["comfort_level"] = pd.Categorical.from_codes(
+            calculated["comfort_code"], categories=list(COMFORT_LEVELS)
+        )
+        return processed
+
+    processed = {key: np.asarray(values) for key, values in data.items()}
+    processed.update(calculated)
     return processed
 
 
+# Label field -> its Reading code slot (also the DataBuffer column name)
+LABEL_SLOTS = {field: LABEL_CODES[field][0] for field in LABEL_FIELDS}
+
+# Fields summarised by DataBuffer.get_stats
+STATS_FIELDS = ("temperature", "humidity", "dew_point", "discomfort_index")
+
+
 class DataBuffer:
-    """Ring buffer for storing recent sensor readings"""
+    """
+    Columnar ring buffer for storing recent sensor readings
+
+    Every field is a preallocated NumPy array of twice the buffer size and each
+    point is written at ``i`` and ``i + max_size``. The most recent ``n``
+    points are therefore always one contiguous slice, so appends are O(1) and
+    ``get_columns`` can hand out views without copying. Labels are kept as
+    int16 codes into their LabelTables. Statistics for ``STATS_FIELDS`` are
+    updated on every add and eviction.
+
+    With a ``store`` the buffer acts as a read-through cache: every added
+    point is also queued for the store, the buffer is warmed from the store's
+    newest records on start, and ``get_range`` falls back to the store for
+    points older than the buffer.
+    """
 
-    def __init__(self, max_size: int = 100):
+    def __init__(self, max_size: int = 100, store: Optional["SegmentStore"] = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
         self.max_size = max_size
-        self.data: list[dict] = []
-
-    def add(self, data_point: dict) -> None:
-        """Add a data point to the buffer"""
-        self.data.append(data_point)
-        if len(self.data) > self.max_size:
-            self.data.pop(0)
-
-    def get_recent(self, count: int = None) -> list[dict]:
-        """Get recent data points"""
-        if count is None:
-            return self.data.copy()
-        return self.data[-count:] if count <= len(self.data) else self.data.copy()
-
-    def to_dataframe(self) -> pd.DataFrame:
-        """Convert buffer to pandas DataFrame"""
-        if not self.data:
+        self._numeric = {
+            field: np.full(2 * max_size, np.nan) for field in NUMERIC_FIELDS
+        }
+        self._labels = {
+            slot: np.full(2 * max_size, MISSING, dtype=np.int16)
+            for slot in LABEL_SLOTS.values()
+        }
+        self._stats = {field: SlidingWindowStats(max_size) for field in STATS_FIELDS}
+        self._head = 0  # next write slot in [0, max_size)
+        self._size = 0
+        self._sequence = 0  # odd while a point is being written
+
+        self.store = store
+        if store is not None:
+            self._warm_from_store()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def data(self) -> list[Reading]:
+        """Buffered points as Readings (oldest first), kept for compatibility"""
+        return self.get_recent()
+
+    def add(self, data_point: Mapping) -> None:
+        """Add a data point to the buffer (and queue it for the store)"""
+        started = time.perf_counter()
+        self._append(data_point)
+        BUFFER_APPEND_SECONDS.observe(time.perf_counter() - started)
+        if self.store is not None:
+            self.store.append(data_point)
+
+    def _warm_from_store(self) -> None:
+        """Load the newest stored records into the buffer"""
+        records = self.store.tail(self.max_size)
+        names = records.dtype.names
+        for row in records.tolist():
+            reading = Reading.from_mapping(dict(zip(names, row)))
+            if reading.discomfort_index == reading.discomfort_index:
+                reading.comfort_code = get_comfort_code(reading.discomfort_index)
+            self._append(reading)
+
+    def _append(self, data_point: Mapping) -> None:
+        reading = Reading.from_mapping(data_point)
+        i = self._head
+        j = i + self.max_size
+        full = self._size == self.max_size
+
+        self._sequence += 1
+        for field, column in self._numeric.items():
+            value = getattr(reading, field)
+            value = np.nan if value is None else float(value)
+            stats = self._stats.get(field)
+            if stats is not None:
+                stats.push(value, float(column[i]) if full else None)
+            column[i] = column[j] = value
+        for slot, column in self._labels.items():
+            column[i] = column[j] = getattr(reading, slot)
+
+        self._head = (i + 1) % self.max_size
+        if self._size < self.max_size:
+            self._size += 1
+        self._sequence += 1
+
+    def _window(self, count: Optional[int] = None) -> slice:
+        """Slice covering the most recent ``count`` points (all if None)"""
+        n = self._size if count is None else max(0, min(count, self._size))
+        end = self._head + self.max_size
+        return slice(end - n, end)
+
+    def get_columns(
+        self, count: Optional[int] = None, copy: bool = False
+    ) -> dict[str, np.ndarray]:
+        """
+        Get recent data points as read-only column views (or copies)
+
+        Views alias the ring buffer: once it is full, every later ``add``
+        overwrites the oldest slot of a view taken earlier. Callers on
+        another thread than the one adding points must pass ``copy=True``;
+        the copy is retried until no point was added while it was taken.
+
+        Args:
+            count: Number of most recent points (all buffered points if None)
+            copy: Return consistent copies instead of views
+
+        Returns:
+            Mapping of numeric field name, and label code slot
+            (``sensor_code``, ``status_code``, ``comfort_code``), to a NumPy
+            array, oldest point first
+        """
+        while True:
+            sequence = self._sequence
+            window = self._window(count)
+            columns = {}
+            for field, column in (*self._numeric.items(), *self._labels.items()):
+                if copy:
+                    columns[field] = column[window].copy()
+                else:
+                    view = column[window]
+                    view.flags.writeable = False
+                    columns[field] = view
+            if not copy or (not sequence & 1 and self._sequence == sequence):
+                return columns
+            time.sleep(0)
+
+    def get_range(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Get numeric columns for points with python_timestamp in ``[start, end)``
+
+        Points still in the buffer are copied out of memory, so this is safe
+        to call while another thread adds points; older points are read from
+        the store, if there is one.
+
+        Args:
+            start: Inclusive lower bound (None for no bound)
+            end: Exclusive upper bound (None for no bound)
+
+        Returns:
+            Mapping of numeric field name to array, oldest point first
+        """
+        columns = self.get_columns(copy=True)
+        timestamps = columns["python_timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, "left"))
+        hi = len(timestamps)
+        if end is not None:
+            hi = int(np.searchsorted(timestamps, end, "left"))
+        cached = {field: columns[field][lo:hi] for field in NUMERIC_FIELDS}
+
+        oldest = timestamps[0] if len(timestamps) else None
+        if self.store is None or (
+            oldest is not None and start is not None and start >= oldest
+        ):
+            return cached
+
+        stored_end = oldest if end is None or oldest is None else min(end, oldest)
+        parts = list(self.store.reader.iter_range(start, stored_end))
+        if not parts:
+            return cached
+        # One copy per field, straight from the segment views
+        stored_count = sum(len(part) for part in parts)
+        return {
+            field: np.concatenate(
+                [*(part[field] for part in parts), cached[field]], dtype=np.float64
+            )
+            if field in parts[0].dtype.names
+            else np.concatenate([np.full(stored_count, np.nan), cached[field]])
+            for field in NUMERIC_FIELDS
+        }
+
+    def get_recent(self, count: int = None) -> list[Reading]:
+        """Get recent data points (safe while another thread adds points)"""
+        columns = self.get_columns(count, copy=True)
+        fields = [(field, columns[field].tolist()) for field in NUMERIC_FIELDS]
+        slots = [(slot, columns[slot].tolist()) for slot in self._labels]
+        points = []
+        for k in range(len(columns["python_timestamp"])):
+            point = Reading()
+            for field, values in fields:
+                value = values[k]
+                if value == value:  # not NaN
+                    setattr(point, field, int(value) if field == "timestamp" else value)
+            for slot, codes in slots:
+                setattr(point, slot, codes[k])
+            points.append(point)
+        return points
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        """
+        Convert buffer to pandas DataFrame (imports pandas on first use)
+
+        Labels become categorical columns over their LabelTable.
+        """
+        import pandas as pd
+
+        if not self._size:
             return pd.DataFrame()
-        return pd.DataFrame(self.data)
+        columns = self.get_columns(copy=True)
+        data = {field: columns[field] for field in NUMERIC_FIELDS}
+        for field, slot in LABEL_SLOTS.items():
+            data[field] = pd.Categorical.from_codes(
+                columns[slot], categories=LABEL_CODES[field][1].labels()
+            )
+        return pd.DataFrame(data)
 
     def clear(self) -> None:
         """Clear all data from buffer"""
-        self.data.clear()
+        self._sequence += 1
+        for column in self._numeric.values():
+            column.fill(np.nan)
+        for column in self._labels.values():
+            column.fill(MISSING)
+        for stats in self._stats.values():
+            stats.clear()
+        self._head = 0
+        self._size = 0
+        self._sequence += 1
 
     def get_stats(self) -> dict:
-        """Get basic statistics from buffered data"""
-        if not self.data:
+        """
+        Get statistics for the buffered data
+
+        The values are maintained incrementally, so this is a constant-time
+        lookup regardless of buffer size. They change in place on every add,
+        so call this from the thread adding points (see
+        ``SensorChannel.capture_stats`` for other threads).
+
+        Returns:
+            Mapping of field name to min/max/mean/std/count/current
+        """
+        if not self._size:
             return {}
 
-        df = self.to_dataframe()
-        numeric_columns = ["temperature", "humidity", "dew_point", "discomfort_index"]
-
-        stats = {}
-        for col in numeric_columns:
-            if col in df.columns:
-                stats[col] = {
-                    "min": df[col].min(),
-                    "max": df[col].max(),
-                    "mean": df[col].mean(),
-                    "current": df[col].iloc[-1] if len(df) > 0 else None,
-                }
-
-        return stats
+        return {
+            field: stats.as_dict()
+            for field, stats in self._stats.items()
+            if stats.count
+        }
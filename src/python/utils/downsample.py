@@ -0,0 +1,291 @@
+"""
+Downsampling utilities for DHT22 dashboard charts
+
+A RollupPyramid keeps min/max/mean buckets at several resolutions, updated
+as each reading arrives, so a chart of any time range can start from a tier
+with a bounded number of buckets. LTTB then reduces the result to the number
+of points the browser actually needs.
+"""
+
+import math
+from collections.abc import Iterable, Mapping
+from typing import Optional
+
+import numpy as np
+
+# Fields rolled up by default
+ROLLUP_FIELDS = ("temperature", "humidity", "dew_point", "discomfort_index")
+
+# Bucket widths in seconds: 10s, 1m, 10m, 1h
+DEFAULT_TIERS = (10, 60, 600, 3600)
+
+# How far back every tier reaches by default (7 days)
+DEFAULT_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select points with Largest-Triangle-Three-Buckets
+
+    Args:
+        x: Monotonic x values (e.g. epoch seconds)
+        y: y values
+        threshold: Maximum number of points to keep
+
+    Returns:
+        Sorted indices of the selected points (all indices if already small)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64), nan=np.nanmean(y))
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    edges[-1] = n - 1
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        indices[i + 1] = a
+
+    return indices
+
+
+class RollupTier:
+    """
+    Fixed-resolution min/max/mean buckets in a ring buffer
+
+    Uses the same double-written layout as DataBuffer so the newest buckets
+    are always one contiguous slice. Readings older than the current bucket
+    are ignored.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int,
+        capacity: int,
+        fields: Iterable[str] = ROLLUP_FIELDS,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.fields = tuple(fields)
+
+        size = 2 * capacity
+        self._start = np.full(size, np.nan)
+        self._min = {field: np.full(size, np.nan) for field in self.fields}
+        self._max = {field: np.full(size, np.nan) for field in self.fields}
+        self._sum = {field: np.zeros(size) for field in self.fields}
+        self._count = {field: np.zeros(size, dtype=np.int64) for field in self.fields}
+        self._head = 0  # next slot in [0, capacity)
+        self._size = 0
+        self._current: Optional[int] = None  # bucket number of the newest slot
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def newest_time(self) -> float:
+        """Start time of the newest bucket (NaN when empty)"""
+        if not self._size:
+            return np.nan
+        return float(self._start[(self._head - 1) % self.capacity])
+
+    def _advance(self, bucket: int) -> None:
+        """Start a new bucket in the next ring slot"""
+        i = self._head
+        j = i + self.capacity
+        self._start[i] = self._start[j] = bucket * self.bucket_seconds
+        for field in self.fields:
+            self._min[field][i] = self._min[field][j] = np.nan
+            self._max[field][i] = self._max[field][j] = np.nan
+            self._sum[field][i] = self._sum[field][j] = 0.0
+            self._count[field][i] = self._count[field][j] = 0
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._current = bucket
+
+    def merge(self, bucket: int, partials: Mapping[str, tuple]) -> None:
+        """
+        Fold partial aggregates into a bucket
+
+        Args:
+            bucket: Bucket number (``timestamp // bucket_seconds``)
+            partials: Field name to ``(min, max, sum, count)``
+        """
+        if self._current is not None and bucket < self._current:
+            return
+        if self._current is None or bucket > self._current:
+            self._advance(bucket)
+
+        i = (self._head - 1) % self.capacity
+        j = i + self.capacity
+        for field, (lo, hi, total, count) in partials.items():
+            if not count or field not in self._sum:
+                continue
+            low = self._min[field][i]
+            high = self._max[field][i]
+            self._min[field][i] = self._min[field][j] = lo if not low <= lo else low
+            self._max[field][i] = self._max[field][j] = hi if not high >= hi else high
+            self._sum[field][i] = self._sum[field][j] = self._sum[field][i] + total
+            self._count[field][i] = self._count[field][j] = (
+                self._count[field][i] + count
+            )
+
+    def add(self, timestamp: float, values: Mapping[str, float]) -> None:
+        """Add one reading"""
+        partials = {}
+        for field in self.fields:
+            value = values.get(field)
+            if value is not None and not math.isnan(value):
+                partials[field] = (value, value, value, 1)
+        self.merge(int(timestamp // self.bucket_seconds), partials)
+
+    def extend(self, timestamps: np.ndarray, columns: Mapping[str, np.ndarray]) -> None:
+        """Add many time-ordered readings with vectorized per-bucket reductions"""
+        if not len(timestamps):
+            return
+        buckets = (np.asarray(timestamps) // self.bucket_seconds).astype(np.int64)
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+
+        reduced = {}
+        for field in self.fields:
+            if field not in columns:
+                continue
+            values = np.asarray(columns[field], dtype=np.float64)
+            valid = ~np.isnan(values)
+            reduced[field] = (
+                np.fmin.reduceat(values, starts),
+                np.fmax.reduceat(values, starts),
+                np.add.reduceat(np.where(valid, values, 0.0), starts),
+                np.add.reduceat(valid.astype(np.int64), starts),
+            )
+
+        # The first group may continue the current bucket
+        self.merge(
+            int(buckets[starts[0]]),
+            {
+                field: (lo[0], hi[0], total[0], count[0])
+                for field, (lo, hi, total, count) in reduced.items()
+            },
+        )
+
+        # Later groups are all new buckets: write them into the ring in bulk
+        new = np.arange(1, len(starts))[-self.capacity :]
+        new = new[buckets[starts[new]] > (self._current or 0)]
+        if not len(new):
+            return
+        slots = (self._head + np.arange(len(new))) % self.capacity
+        bucket_ids = buckets[starts[new]]
+        for slot_set in (slots, slots + self.capacity):
+            self._start[slot_set] = bucket_ids * self.bucket_seconds
+            for field in self.fields:
+                if field in reduced:
+                    lo, hi, total, count = reduced[field]
+                    self._min[field][slot_set] = lo[new]
+                    self._max[field][slot_set] = hi[new]
+                    self._sum[field][slot_set] = total[new]
+                    self._count[field][slot_set] = count[new]
+                else:
+                    self._min[field][slot_set] = np.nan
+                    self._max[field][slot_set] = np.nan
+                    self._sum[field][slot_set] = 0.0
+                    self._count[field][slot_set] = 0
+        self._head = int((slots[-1] + 1) % self.capacity)
+        self._size = min(self._size + len(new), self.capacity)
+        self._current = int(bucket_ids[-1])
+
+    def get_range(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Buckets overlapping ``[start, end)``
+
+        Returns:
+            ``time`` (bucket start, epoch seconds) plus ``<field>_min``,
+            ``<field>_max``, ``<field>_mean`` and ``<field>_count`` arrays
+        """
+        end_slot = self._head + self.capacity
+        window = slice(end_slot - self._size, end_slot)
+        times = self._start[window]
+        lo = 0
+        hi = len(times)
+        if start is not None:
+            lo = int(np.searchsorted(times, start - self.bucket_seconds, "right"))
+        if end is not None:
+            hi = int(np.searchsorted(times, end, "left"))
+        selected = slice(window.start + lo, window.start + hi)
+
+        result = {"time": self._start[selected].copy()}
+        for field in self.fields:
+            count = self._count[field][selected]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = self._sum[field][selected] / count
+            result[f"{field}_min"] = self._min[field][selected].copy()
+            result[f"{field}_max"] = self._max[field][selected].copy()
+            result[f"{field}_mean"] = np.where(count > 0, mean, np.nan)
+            result[f"{field}_count"] = count.copy()
+        return result
+
+
+class RollupPyramid:
+    """
+    Set of RollupTiers at increasing bucket widths, fed together
+
+    Each tier keeps ``retention_seconds`` worth of buckets, optionally capped
+    at ``max_buckets`` to bound memory; ``select`` never picks a tier whose
+    capacity cannot cover the requested span.
+    """
+
+    def __init__(
+        self,
+        tiers: Iterable[int] = DEFAULT_TIERS,
+        retention_seconds: int = DEFAULT_RETENTION_SECONDS,
+        fields: Iterable[str] = ROLLUP_FIELDS,
+        max_buckets: Optional[int] = None,
+    ):
+        self.tiers = []
+        for seconds in sorted(tiers):
+            capacity = max(1, retention_seconds // seconds)
+            if max_buckets is not None:
+                capacity = min(capacity, max_buckets)
+            self.tiers.append(RollupTier(seconds, capacity, fields))
+
+    def add(self, data_point: Mapping) -> None:
+        """Add a processed data point to every tier"""
+        timestamp = data_point.get("python_timestamp")
+        if timestamp is None:
+            return
+        for tier in self.tiers:
+            tier.add(timestamp, data_point)
+
+    def extend(self, columns: Mapping[str, np.ndarray]) -> None:
+        """Add time-ordered column arrays (e.g. a backfill from storage)"""
+        timestamps = columns["python_timestamp"]
+        for tier in self.tiers:
+            tier.extend(timestamps, columns)
+
+    def select(self, start: float, end: float, max_buckets: int) -> RollupTier:
+        """
+        Pick the finest tier that covers ``[start, end)`` in at most
+        ``max_buckets`` buckets (the coarsest tier if none does)
+        """
+        span = max(end - start, 0.0)
+        for tier in self.tiers:
+            buckets = span / tier.bucket_seconds
+            if buckets <= max_buckets and buckets <= tier.capacity:
+                return tier
+        return self.tiers[-1]
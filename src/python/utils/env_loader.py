@@ -5,9 +5,10 @@
 .env 파일에서 환경변수를 로드하고 기본값을 제공합니다.
 """
 
+import functools
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 
 class EnvLoader:
@@ -156,15 +157,60 @@ class EnvLoader:
         return [item.strip() for item in value.split(separator) if item.strip()]
 
 
-# 전역 환경변수 로더 인스턴스
-env_loader = EnvLoader()
+# 전역 환경변수 로더 인스턴스 (처음 값을 읽을 때 .env 로드)
+_env_loader: Optional[EnvLoader] = None
+
+
+def get_env_loader() -> EnvLoader:
+    """전역 환경변수 로더 반환 (최초 호출 시 .env 파일 로드)"""
+    global _env_loader
+    if _env_loader is None:
+        _env_loader = EnvLoader()
+    return _env_loader
+
+
+def __getattr__(name: str):
+    # 기존 전역 변수 `env_loader` 호환 (임포트 시점에는 .env를 읽지 않음)
+    if name == "env_loader":
+        return get_env_loader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _after_loading(getter: Callable) -> Callable:
+    """.env 로드 후 환경변수를 읽는 편의 함수 생성"""
+
+    @functools.wraps(getter)
+    def wrapper(*args, **kwargs):
+        get_env_loader()
+        return getter(*args, **kwargs)
+
+    return wrapper
+
 
 # 편의 함수들
-get_str = EnvLoader.get_str
-get_int = EnvLoader.get_int
-get_float = EnvLoader.get_float
-get_bool = EnvLoader.get_bool
-get_list = EnvLoader.get_list
+get_str = _after_loading(EnvLoader.get_str)
+get_int = _after_loading(EnvLoader.get_int)
+get_float = _after_loading(EnvLoader.get_float)
+get_bool = _after_loading(EnvLoader.get_bool)
+get_list = _after_loading(EnvLoader.get_list)
+
+
+def resolve_path(value: str) -> str:
+    """
+    경로 환경변수 값을 절대 경로로 변환
+
+    Args:
+        value: 경로 문자열 (상대 경로는 프로젝트 루트 기준)
+
+    Returns:
+        절대 경로 문자열 (빈 값은 그대로)
+    """
+    if not value:
+        return value
+    path = Path(value)
+    if not path.is_absolute():
+        path = get_env_loader().project_root / path
+    return str(path)
 
 
 def load_database_config() -> dict:
@@ -186,6 +232,10 @@ def load_server_config() -> dict:
         "debug": get_bool("DEBUG", False),
         "ws_host": get_str("WS_HOST", "localhost"),
         "ws_port": get_int("WS_PORT", 8001),
+        "stream_mode": get_str("STREAM_MODE", "sse"),
+        "metrics_enabled": get_bool("METRICS_ENABLED", True),
+        "role": get_str("DASHBOARD_ROLE", "standalone"),
+        "shared_memory_name": get_str("SHARED_MEMORY_NAME", "dht22_dashboard"),
     }
 
 
@@ -195,7 +245,62 @@ def load_sensor_config() -> dict:
         "pin": get_int("SENSOR_PIN", 2),
         "type": get_str("SENSOR_TYPE", "DHT22"),
         "serial_port": get_str("SERIAL_PORT", "COM3"),
+        "serial_ports": get_list("SERIAL_PORTS"),
         "baud_rate": get_int("BAUD_RATE", 9600),
+        "protocol": get_str("SERIAL_PROTOCOL", "auto"),
+        "capture_file": resolve_path(get_str("SERIAL_CAPTURE_FILE", "")),
+        "replay_file": resolve_path(get_str("SERIAL_REPLAY_FILE", "")),
+        "replay_speed": get_float("SERIAL_REPLAY_SPEED", 1.0),
+        "sensor_groups": parse_sensor_groups(get_list("SENSOR_GROUPS", ";")),
+    }
+
+
+def parse_sensor_groups(items: list) -> dict:
+    """
+    센서 그룹 정의 파싱
+
+    Args:
+        items: "그룹명=센서1,센서2" 형식의 문자열 리스트
+
+    Returns:
+        그룹명 -> 센서 ID 리스트 딕셔너리
+    """
+    groups = {}
+    for item in items:
+        name, _, members = item.partition("=")
+        members = [member.strip() for member in members.split(",") if member.strip()]
+        if name.strip() and members:
+            groups[name.strip()] = members
+    return groups
+
+
+def load_simulator_config() -> dict:
+    """시뮬레이터 설정 로드"""
+    return {
+        "sensors": get_int("SIM_SENSORS", 0),
+        "rate": get_float("SIM_RATE", 0.5),
+        "seed": get_int("SIM_SEED", 0),
+        "dropout_probability": get_float("SIM_DROPOUT", 0.01),
+        "spike_probability": get_float("SIM_SPIKE", 0.001),
+    }
+
+
+def load_pipeline_config() -> dict:
+    """수집 파이프라인 설정 로드"""
+    return {
+        "queue_size": get_int("PIPELINE_QUEUE_SIZE", 10000),
+        "policy": get_str("PIPELINE_POLICY", "drop_oldest"),
+        "workers": get_int("PIPELINE_WORKERS", 1),
+        "batch_size": get_int("PIPELINE_BATCH_SIZE", 256),
+    }
+
+
+def load_storage_config() -> dict:
+    """저장소 설정 로드"""
+    return {
+        "data_dir": resolve_path(get_str("DATA_DIR", "data")),
+        "segment_seconds": get_int("SEGMENT_SECONDS", 3600),
+        "write_queue_size": get_int("WRITE_QUEUE_SIZE", 10000),
     }
 
 
@@ -215,4 +320,7 @@ if __name__ == "__main__":
     print(f"데이터베이스 설정: {load_database_config()}")
     print(f"서버 설정: {load_server_config()}")
     print(f"센서 설정: {load_sensor_config()}")
+    print(f"시뮬레이터 설정: {load_simulator_config()}")
+    print(f"파이프라인 설정: {load_pipeline_config()}")
+    print(f"저장소 설정: {load_storage_config()}")
     print(f"로깅 설정: {load_logging_config()}")
@@ -0,0 +1,181 @@
+"""
+Lightweight hot-path instrumentation exported in Prometheus text format
+
+Metrics are created once at import time (``counter``/``histogram``) and
+updated in place on preallocated storage, so recording a sample creates no
+lists, dicts or metric objects. Histograms use log-linear buckets: every
+power of two from HISTOGRAM_MIN seconds up is split into HISTOGRAM_STEPS
+equal steps.
+``set_enabled(False)`` turns every update into a no-op.
+"""
+
+import functools
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+HISTOGRAM_MIN = 1e-6  # seconds; smaller values land in the first bucket
+HISTOGRAM_OCTAVES = 26  # up to HISTOGRAM_MIN * 2**26 (about 67 s)
+HISTOGRAM_STEPS = 2  # linear steps per power of two
+
+# Upper bounds of the finite buckets (an overflow bucket follows)
+BUCKET_BOUNDS = tuple(
+    HISTOGRAM_MIN * 2**octave * (1 + (step + 1) / HISTOGRAM_STEPS)
+    for octave in range(HISTOGRAM_OCTAVES)
+    for step in range(HISTOGRAM_STEPS)
+)
+
+_enabled = True
+_registry: dict[tuple[str, tuple], "Metric"] = {}
+_documentation: dict[str, tuple[str, str]] = {}
+_registry_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turn recording on or off for every metric"""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class Metric:
+    """A named series with fixed labels"""
+
+    kind = ""
+
+    def __init__(self, name: str, labels: dict[str, str]):
+        self.name = name
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def label_text(self, extra: str = "") -> str:
+        pairs = [f'{key}="{value}"' for key, value in self.labels.items()]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, labels: dict[str, str]):
+        super().__init__(name, labels)
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        if _enabled and amount:
+            with self._lock:
+                self.value += amount
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{self.label_text()} {self.value}"]
+
+
+class Histogram(Metric):
+    """Distribution of durations in seconds over log-linear buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, labels: dict[str, str]):
+        super().__init__(name, labels)
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one sample (seconds)"""
+        if not _enabled:
+            return
+        ratio = value / HISTOGRAM_MIN
+        if ratio < 1.0:
+            index = 0
+        else:
+            # ratio = mantissa * 2**exponent with mantissa in [0.5, 1)
+            mantissa, exponent = math.frexp(ratio)
+            index = min(
+                (exponent - 1) * HISTOGRAM_STEPS
+                + int((2.0 * mantissa - 1.0) * HISTOGRAM_STEPS),
+                len(BUCKET_BOUNDS),
+            )
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self, function: Callable) -> Callable:
+        """Decorator recording the duration of every call"""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    def render(self) -> list[str]:
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(BUCKET_BOUNDS, counts):
+            cumulative += count
+            le = self.label_text(f'le="{bound:.6g}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        cumulative += counts[-1]
+        le = self.label_text('le="+Inf"')
+        lines.append(f"{self.name}_bucket{le} {cumulative}")
+        lines.append(f"{self.name}_sum{self.label_text()} {total:.9g}")
+        lines.append(f"{self.name}_count{self.label_text()} {cumulative}")
+        return lines
+
+
+def _get_or_create(cls: type, name: str, documentation: str, labels: dict) -> Metric:
+    key = (name, tuple(sorted(labels.items())))
+    with _registry_lock:
+        metric = _registry.get(key)
+        if metric is None:
+            known = _documentation.setdefault(name, (cls.kind, documentation))
+            if known[0] != cls.kind:
+                raise ValueError(f"Metric {name} is already a {known[0]}")
+            metric = _registry[key] = cls(name, labels)
+        return metric
+
+
+def counter(name: str, documentation: str, **labels: str) -> Counter:
+    """The counter ``name`` with the given labels (created on first use)"""
+    return _get_or_create(Counter, name, documentation, labels)
+
+
+def histogram(name: str, documentation: str, **labels: str) -> Histogram:
+    """The duration histogram ``name`` with the given labels"""
+    return _get_or_create(Histogram, name, documentation, labels)
+
+
+def render_prometheus(names: Optional[set[str]] = None) -> str:
+    """All metrics (or those in ``names``) in Prometheus text format"""
+    with _registry_lock:
+        metrics = sorted(_registry.items(), key=lambda item: item[0])
+        documentation = dict(_documentation)
+    lines = []
+    current = None
+    for (name, _), metric in metrics:
+        if names is not None and name not in names:
+            continue
+        if name != current:
+            kind, help_text = documentation[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            current = name
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
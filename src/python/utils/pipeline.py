@@ -0,0 +1,304 @@
+"""
+Staged ingestion pipeline: reader -> bounded queue -> workers -> sinks
+
+Readers only enqueue raw readings, so slow processing or storage never
+delays the next serial read. Processing workers drain the queue in batches
+and hand processed batches to a sink stage that fans them out (buffers and
+storage, snapshot publishing, push channels) in the order they were read.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterable
+from typing import Callable, Optional
+
+from . import metrics
+from .data_processor import process_sensor_data
+
+logger = logging.getLogger(__name__)
+
+# Backpressure policies for a full queue
+POLICY_DROP_OLDEST = "drop_oldest"  # discard the oldest queued reading
+POLICY_BLOCK = "block"  # make the producer wait for space
+POLICY_SAMPLE = "sample"  # above half full, admit one reading in N
+POLICIES = (POLICY_DROP_OLDEST, POLICY_BLOCK, POLICY_SAMPLE)
+
+QUEUE_DROPPED = metrics.counter(
+    "dht22_readings_dropped_total",
+    "Readings discarded before processing",
+    reason="queue_full",
+)
+QUEUE_SAMPLED = metrics.counter(
+    "dht22_readings_dropped_total",
+    "Readings discarded before processing",
+    reason="sampled",
+)
+
+
+class BoundedQueue:
+    """
+    Thread-safe FIFO of bounded size with a backpressure policy
+
+    ``put_many``/``get_batch`` move whole batches under one lock. Under
+    ``POLICY_SAMPLE`` a queue more than half full admits only every
+    ``sample_every``-th reading, and drops new readings once full.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        policy: str = POLICY_DROP_OLDEST,
+        sample_every: int = 4,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.sample_every = sample_every
+        self.max_depth = 0
+        self.dropped = 0
+        self.sampled = 0
+        self._items: deque = deque()
+        self._seen = 0
+        self._batches = 0  # Non-empty batches taken so far
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def close(self) -> None:
+        """Wake all waiters; later puts are ignored"""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def put_many(self, items: Iterable) -> None:
+        """Enqueue items, applying the backpressure policy when full"""
+        with self._lock:
+            for item in items:
+                if self._closed:
+                    return
+                if self.policy == POLICY_SAMPLE:
+                    self._seen += 1
+                    if len(self._items) >= self.maxsize // 2 and (
+                        self._seen % self.sample_every
+                    ):
+                        self.sampled += 1
+                        QUEUE_SAMPLED.inc()
+                        continue
+                    if len(self._items) >= self.maxsize:
+                        self.dropped += 1
+                        QUEUE_DROPPED.inc()
+                        continue
+                elif len(self._items) >= self.maxsize:
+                    if self.policy == POLICY_BLOCK:
+                        while len(self._items) >= self.maxsize and not self._closed:
+                            self._not_full.wait()
+                        if self._closed:
+                            return
+                    else:
+                        self._items.popleft()
+                        self.dropped += 1
+                        QUEUE_DROPPED.inc()
+                self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._not_empty.notify()
+
+    def get_batch(self, max_items: int, timeout: Optional[float] = None) -> list:
+        """
+        Dequeue up to ``max_items``, waiting up to ``timeout`` for the first
+
+        Returns:
+            The items (empty on timeout or once closed and drained)
+        """
+        return self.get_numbered_batch(max_items, timeout)[1]
+
+    def get_numbered_batch(
+        self, max_items: int, timeout: Optional[float] = None
+    ) -> tuple[int, list]:
+        """
+        get_batch, also returning the batch's sequence number
+
+        Non-empty batches are numbered 0, 1, 2, ... in dequeue order, so
+        consumers working in parallel can restore that order later.
+        """
+        with self._lock:
+            if not self._items and not self._closed:
+                self._not_empty.wait(timeout)
+            count = min(max_items, len(self._items))
+            batch = [self._items.popleft() for _ in range(count)]
+            number = self._batches
+            if batch:
+                self._batches += 1
+                self._not_full.notify_all()
+            return number, batch
+
+    def metrics(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "capacity": self.maxsize,
+            "dropped": self.dropped,
+            "sampled": self.sampled,
+        }
+
+
+def process_records(records: list[dict]) -> list[dict]:
+    """Process a batch of raw readings, skipping any that fail"""
+    processed = []
+    for record in records:
+        try:
+            processed.append(process_sensor_data(record))
+        except Exception as e:
+            logger.warning(f"Error processing reading: {e}")
+    return processed
+
+
+class Pipeline:
+    """
+    Bounded, batched processing between readers and sinks
+
+    ``submit`` (the readers' sink) enqueues raw readings into the
+    ``ingest`` queue. ``workers`` threads process batches of up to
+    ``batch_size`` readings and pass them to the ``sink`` queue, whose single
+    thread calls every sink with each batch. Batches carry their ingest
+    sequence number and wait in a small reorder buffer until all earlier
+    ones are delivered, so sinks (and the segment store's sorted
+    timestamps) see readings in arrival order with any number of workers.
+    """
+
+    def __init__(
+        self,
+        sinks: Iterable[Callable[[list[dict]], None]],
+        process: Callable[[list[dict]], list[dict]] = process_records,
+        queue_size: int = 10000,
+        policy: str = POLICY_DROP_OLDEST,
+        workers: int = 1,
+        batch_size: int = 256,
+        batch_timeout: float = 0.5,
+    ):
+        self.sinks = list(sinks)
+        self.process = process
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+
+        self.ingest = BoundedQueue(queue_size, policy)
+        # Processed batches; blocking so workers slow down with the sinks
+        self.output = BoundedQueue(max(1, queue_size // batch_size), POLICY_BLOCK)
+        self.counters: Counter = Counter()
+        self.sink_errors: Counter = Counter()
+        self._counters_lock = threading.Lock()  # Counters change on every thread
+        self.max_reorder = 0  # Most batches held back waiting for an earlier one
+        self._workers: list[threading.Thread] = []
+        self._sink_thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def _count(self, **amounts: float) -> None:
+        with self._counters_lock:
+            self.counters.update(amounts)
+
+    def submit(self, records: list[dict]) -> None:
+        """Queue raw readings for processing"""
+        self._count(submitted=len(records))
+        self.ingest.put_many(records)
+
+    def _work(self) -> None:
+        while self._running or len(self.ingest):
+            number, batch = self.ingest.get_numbered_batch(
+                self.batch_size, self.batch_timeout
+            )
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                processed = self.process(batch)
+            except Exception as e:
+                logger.warning(f"Error processing batch: {e}")
+                processed = []
+            self._count(
+                process_seconds=time.perf_counter() - started,
+                processed=len(processed),
+                failed=len(batch) - len(processed),
+            )
+            # Empty results are passed on too, or later batches would wait
+            self.output.put_many([(number, processed)])
+
+    def _deliver(self, processed: list[dict]) -> None:
+        for sink in self.sinks:
+            try:
+                sink(processed)
+            except Exception as e:
+                name = getattr(sink, "__name__", repr(sink))
+                with self._counters_lock:
+                    self.sink_errors[name] += 1
+                logger.warning(f"Sink {sink!r} failed: {e}")
+        self._count(delivered=len(processed))
+
+    def _fan_out(self) -> None:
+        pending: dict[int, list[dict]] = {}  # Batches waiting for earlier ones
+        expected = 0
+        while (
+            self._running
+            or len(self.output)
+            or any(worker.is_alive() for worker in self._workers)
+        ):
+            for number, processed in self.output.get_batch(1, self.batch_timeout):
+                pending[number] = processed
+                while expected in pending:
+                    processed = pending.pop(expected)
+                    expected += 1
+                    if processed:
+                        self._deliver(processed)
+            self.max_reorder = max(self.max_reorder, len(pending))
+
+        # Only a worker that did not stop in time leaves a gap
+        if pending:
+            logger.warning(f"Delivering {len(pending)} batches after gap {expected}")
+            for number in sorted(pending):
+                processed = pending.pop(number)
+                if processed:
+                    self._deliver(processed)
+
+    def start(self) -> None:
+        """Start the worker and sink threads"""
+        if self._running:
+            return
+        self._running = True
+        self._workers = [
+            threading.Thread(target=self._work, daemon=True, name=f"pipeline-{i}")
+            for i in range(self.workers)
+        ]
+        self._sink_thread = threading.Thread(
+            target=self._fan_out, daemon=True, name="pipeline-sink"
+        )
+        for thread in (*self._workers, self._sink_thread):
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Drain what is queued, then stop the threads"""
+        self._running = False
+        for worker in self._workers:
+            worker.join(timeout)
+        if self._sink_thread is not None:
+            self._sink_thread.join(timeout)
+        self.ingest.close()
+        self.output.close()
+
+    def metrics(self) -> dict:
+        """Per-stage queue depths and counters"""
+        with self._counters_lock:
+            counters = dict(self.counters)
+            sink_errors = dict(self.sink_errors)
+        return {
+            "stages": {"ingest": self.ingest.metrics(), "sink": self.output.metrics()},
+            "counters": counters,
+            "sink_errors": sink_errors,
+            "max_reorder": self.max_reorder,
+        }
@@ -0,0 +1,75 @@
+"""
+In-process publish/subscribe fan-out for pushing readings to clients
+"""
+
+import queue
+import threading
+from typing import Any
+
+
+class Subscription:
+    """Bounded per-subscriber message queue"""
+
+    def __init__(self, queue_size: int):
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def put(self, message: Any) -> None:
+        """Queue a message, discarding the oldest one if the queue is full"""
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float) -> Any:
+        """
+        Wait for the next message
+
+        Raises:
+            queue.Empty: If nothing arrives within ``timeout`` seconds
+        """
+        return self._queue.get(timeout=timeout)
+
+
+class Broadcaster:
+    """
+    Fan a published message out to every subscriber
+
+    Messages are published once (e.g. already JSON-encoded) and handed to
+    each subscriber's queue, so a slow client only loses its own oldest
+    messages and never blocks the publisher.
+    """
+
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        """Register a new subscriber"""
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, message: Any) -> None:
+        """Deliver a message to all current subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(message)
@@ -0,0 +1,342 @@
+"""
+Historical queries over a sensor's stored segments
+
+``query`` reads the columns of a time range straight from the segment files
+(plus buffered readings not written yet) and returns them either as stored
+or reduced into fixed time buckets. Every reduction is vectorized over the
+whole range: ``reduceat`` for mean/min/max and one row-wise sort of a
+padded bucket grid for percentiles. Results are columnar and paginated with
+a cursor; ``iter_json`` streams one as JSON without building the document
+in memory.
+"""
+
+import json
+import math
+import re
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Optional, Union
+
+import numpy as np
+
+from .data_processor import DataBuffer
+from .storage import RECORD_DTYPE
+
+AGGREGATIONS = ("mean", "min", "max", "p95")
+
+# Stored numeric fields that can be queried
+QUERY_FIELDS = tuple(name for name in RECORD_DTYPE.names if name != "python_timestamp")
+DEFAULT_QUERY_FIELDS = ("temperature", "humidity")
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 24 * 3600, "w": 7 * 24 * 3600}
+
+JSON_CHUNK_ROWS = 4096  # Values per streamed JSON piece
+JSON_DECIMALS = 4  # Rounding of values in JSON (time: milliseconds)
+
+
+def parse_duration(value: Union[str, float, None]) -> Optional[float]:
+    """
+    Seconds of a bucket size such as ``"30s"``, ``"1m"``, ``"1.5h"`` or 60
+
+    Returns:
+        The duration, or None for no bucketing (None, "" or "raw")
+
+    Raises:
+        ValueError: If the value is not a positive duration
+    """
+    if value is None or value in ("", "raw"):
+        return None
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", value)
+        if match is None:
+            raise ValueError(f"Invalid duration: {value!r}")
+        seconds = float(match.group(1)) * DURATION_UNITS.get(match.group(2), 1)
+    if not seconds > 0:
+        raise ValueError(f"Duration must be positive: {value!r}")
+    return seconds
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """
+    Epoch seconds from a number or an ISO 8601 time (local if naive)
+
+    Raises:
+        ValueError: If the value is neither, or not finite ("nan", "inf")
+    """
+    if value is None or value == "":
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            raise ValueError(f"Invalid time: {value!r}") from None
+    if not math.isfinite(seconds):
+        raise ValueError(f"Invalid time: {value!r}")
+    return seconds
+
+
+def _iter_parts(
+    buffer: DataBuffer,
+    fields: tuple[str, ...],
+    start: Optional[float],
+    end: Optional[float],
+) -> Iterator[dict[str, np.ndarray]]:
+    """Per-segment column views in ``[start, end)``, then unwritten readings"""
+    names = ("python_timestamp", *fields)
+    stored_until = -math.inf
+    store = buffer.store
+    if store is not None:
+        segments = store.segments()
+        if segments:
+            stored_until = max(info.max_ts for info in segments)
+        for records in store.reader.iter_range(start, end):
+            yield {name: records[name] for name in names}
+
+    # Buffered readings newer than anything the store has written
+    columns = buffer.get_columns(copy=True)
+    timestamps = columns["python_timestamp"]
+    lo = int(np.searchsorted(timestamps, stored_until, "right"))
+    if start is not None:
+        lo = max(lo, int(np.searchsorted(timestamps, start, "left")))
+    hi = len(timestamps)
+    if end is not None:
+        hi = int(np.searchsorted(timestamps, end, "left"))
+    if hi > lo:
+        yield {name: columns[name][lo:hi] for name in names}
+
+
+def read_columns(
+    buffer: DataBuffer,
+    fields: tuple[str, ...],
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    bucket_seconds: Optional[float] = None,
+    max_groups: Optional[int] = None,
+) -> dict[str, np.ndarray]:
+    """
+    float64 columns of a time range, oldest first
+
+    Reading stops once more than ``max_groups`` rows (or buckets of
+    ``bucket_seconds``, if given) have been seen, so a page of a long range
+    only touches the segments it needs.
+    """
+    parts: dict[str, list[np.ndarray]] = {
+        name: [] for name in ("python_timestamp", *fields)
+    }
+    groups = 0
+    last_key = None
+    for part in _iter_parts(buffer, fields, start, end):
+        for name, values in part.items():
+            parts[name].append(values)
+        if max_groups is None:
+            continue
+        timestamps = part["python_timestamp"]
+        if bucket_seconds is None:
+            groups += len(timestamps)
+        else:
+            keys = np.floor(timestamps / bucket_seconds)
+            groups += int(np.count_nonzero(np.diff(keys))) + 1
+            groups -= int(keys[0] == last_key)
+            last_key = keys[-1]
+        if groups > max_groups:
+            break
+    return {
+        name: np.concatenate(values, dtype=np.float64) if values else np.empty(0)
+        for name, values in parts.items()
+    }
+
+
+def bucket_percentile(values: np.ndarray, starts: np.ndarray, q: float) -> np.ndarray:
+    """
+    Linearly interpolated ``q``-th percentile of each bucket (NaN ignored)
+
+    Args:
+        values: Values, grouped by bucket
+        starts: Index of the first value of every bucket
+        q: Percentile in [0, 100]
+    """
+    buckets = len(starts)
+    counts = np.diff(np.append(starts, len(values)))
+    valid_counts = np.add.reduceat(~np.isnan(values), starts, dtype=np.int64)
+    width = int(counts.max())
+    if buckets * width <= 4 * len(values):
+        # Buckets as rows of a NaN-padded grid, each sorted (NaN last)
+        grid = np.full(buckets * width, np.nan)
+        grid[
+            np.arange(len(values))
+            + np.repeat(np.arange(buckets) * width - starts, counts)
+        ] = values
+        ordered = np.sort(grid.reshape(buckets, width), axis=1).ravel()
+        offsets = np.arange(buckets) * width
+    else:
+        # Very uneven buckets: one sort, rank * span keeps the buckets apart
+        valid = ~np.isnan(values)
+        ranks = np.repeat(np.arange(buckets), counts)[valid]
+        kept = values[valid]
+        low = kept.min() if len(kept) else 0.0
+        span = (kept.max() if len(kept) else 0.0) - low + 1.0
+        ordered = np.sort(ranks * span + (kept - low)) - ranks * span + low
+        offsets = np.cumsum(valid_counts) - valid_counts
+
+    result = np.full(buckets, np.nan)
+    has_data = valid_counts > 0
+    position = q / 100 * (valid_counts[has_data] - 1)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, valid_counts[has_data] - 1)
+    lower = ordered[offsets[has_data] + below]
+    upper = ordered[offsets[has_data] + above]
+    result[has_data] = lower + (upper - lower) * (position - below)
+    return result
+
+
+def aggregate(
+    timestamps: np.ndarray,
+    columns: dict[str, np.ndarray],
+    bucket_seconds: float,
+    agg: str,
+) -> dict[str, np.ndarray]:
+    """
+    Reduce time-ordered columns into buckets of ``bucket_seconds``
+
+    Returns:
+        ``time`` (bucket start), ``count`` (readings per bucket) and one
+        column per field; only buckets holding readings are returned
+    """
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {agg}")
+    if not len(timestamps):
+        return {
+            "time": np.empty(0),
+            "count": np.empty(0, np.int64),
+            **{field: np.empty(0) for field in columns},
+        }
+    keys = np.floor(timestamps / bucket_seconds)
+    changed = np.diff(keys, prepend=keys[0] - 1) != 0
+    starts = np.flatnonzero(changed)
+    result = {
+        "time": keys[starts] * bucket_seconds,
+        "count": np.diff(np.append(starts, len(keys))),
+    }
+    for field, values in columns.items():
+        if agg == "min":
+            result[field] = np.fmin.reduceat(values, starts)
+        elif agg == "max":
+            result[field] = np.fmax.reduceat(values, starts)
+        elif agg == "mean":
+            valid = ~np.isnan(values)
+            total = np.add.reduceat(np.where(valid, values, 0.0), starts)
+            count = np.add.reduceat(valid, starts, dtype=np.int64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result[field] = total / count
+        else:
+            result[field] = bucket_percentile(values, starts, 95.0)
+    return result
+
+
+def query(
+    buffer: DataBuffer,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    fields: Iterable[str] = DEFAULT_QUERY_FIELDS,
+    agg: Optional[str] = "mean",
+    bucket: Union[str, float, None] = "1m",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> dict:
+    """
+    Query one sensor's history
+
+    Args:
+        buffer: The sensor's DataBuffer (its store holds the history)
+        start: Inclusive lower bound on python_timestamp (None for all)
+        end: Exclusive upper bound on python_timestamp (None for all)
+        fields: Fields to return, from QUERY_FIELDS
+        agg: One of AGGREGATIONS; ignored without a bucket
+        bucket: Bucket size (see parse_duration); None returns raw readings
+        limit: Maximum rows (readings or buckets) per page
+        cursor: ``next_cursor`` of the previous page, which replaces ``start``
+
+    Returns:
+        ``{"start", "end", "fields", "agg", "bucket", "columns",
+        "next_cursor"}``: ``columns`` holds ``time`` (reading time or bucket
+        start), ``count`` per bucket when aggregating, and one float64
+        array per field. ``next_cursor`` is None on the last page.
+
+    Raises:
+        ValueError: On an unknown field or aggregation, an invalid bucket,
+            limit or cursor
+    """
+    fields = tuple(fields)
+    unknown = [field for field in fields if field not in QUERY_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Fields must be from {', '.join(QUERY_FIELDS)}")
+    bucket_seconds = parse_duration(bucket)
+    if bucket_seconds is not None and agg not in AGGREGATIONS:
+        raise ValueError(f"Aggregation must be one of {', '.join(AGGREGATIONS)}")
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be positive")
+    if cursor is not None:
+        try:
+            start = float(cursor)
+        except ValueError:
+            start = math.nan
+        if not math.isfinite(start):
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+
+    data = read_columns(buffer, fields, start, end, bucket_seconds, limit)
+    timestamps = data.pop("python_timestamp")
+    if bucket_seconds is None:
+        columns = {"time": timestamps, **data}
+    else:
+        columns = aggregate(timestamps, data, bucket_seconds, agg)
+
+    next_cursor = None
+    if limit is not None and len(columns["time"]) > limit:
+        following = columns["time"][limit]
+        size = limit
+        if bucket_seconds is None:
+            # Keep readings sharing the next page's first timestamp together
+            size = int(np.searchsorted(columns["time"], following, "left")) or limit
+            if size == limit and columns["time"][size - 1] == following:
+                # More such readings than fit a page: return them all at once
+                size = int(np.searchsorted(columns["time"], following, "right"))
+                if size < len(columns["time"]):
+                    following = columns["time"][size]
+                else:
+                    following = np.nextafter(following, math.inf)
+        columns = {name: values[:size] for name, values in columns.items()}
+        next_cursor = repr(float(following))
+
+    return {
+        "start": start,
+        "end": end,
+        "fields": list(fields),
+        "agg": agg if bucket_seconds is not None else None,
+        "bucket": bucket_seconds,
+        "columns": columns,
+        "next_cursor": next_cursor,
+    }
+
+
+def iter_json(result: dict, chunk_rows: int = JSON_CHUNK_ROWS) -> Iterator[str]:
+    """
+    Serialize a query result as JSON in pieces
+
+    Columns are written ``chunk_rows`` values at a time, NaN as null and
+    values rounded to JSON_DECIMALS (times to milliseconds).
+    """
+    header = {key: value for key, value in result.items() if key != "columns"}
+    yield json.dumps(header)[:-1] + ', "columns": {'
+    for index, (name, values) in enumerate(result["columns"].items()):
+        yield ("," if index else "") + json.dumps(name) + ": ["
+        decimals = 3 if name == "time" else JSON_DECIMALS
+        for offset in range(0, len(values), chunk_rows):
+            chunk = np.round(values[offset : offset + chunk_rows], decimals)
+            items = [None if value != value else value for value in chunk.tolist()]
+            yield ("," if offset else "") + json.dumps(items)[1:-1]
+        yield "]"
+    yield "}}"
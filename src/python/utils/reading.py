@@ -0,0 +1,244 @@
+"""
+Compact representation of one processed sensor reading
+
+A Reading keeps its numbers in fixed slots and its sensor, source, status
+and comfort level as small integer codes into process-wide label tables,
+instead of an 11-key dict holding a formatted ``datetime`` string. It
+implements the read-only Mapping interface, so code written against reading
+dicts (``reading["temperature"]``, ``reading.get("source")``,
+``dict(reading)``) keeps working; ``datetime`` is formatted only when it is
+looked up.
+"""
+
+import sys
+import threading
+from collections.abc import Iterator, Mapping
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+# Numeric fields of a reading (float64 columns in buffers and shared memory)
+NUMERIC_FIELDS = (
+    "temperature",
+    "humidity",
+    "dew_point",
+    "discomfort_index",
+    "heat_index",
+    "python_timestamp",
+    "timestamp",
+)
+_NUMERIC_SLOTS = frozenset(NUMERIC_FIELDS)
+
+# Short categorical fields, stored as codes into LabelTables
+LABEL_FIELDS = ("sensor", "status", "comfort_level")
+
+# Comfort levels indexed by comfort code
+COMFORT_LEVELS = ("매우 쾌적", "쾌적", "보통", "약간 불쾌", "불쾌", "매우 불쾌")
+
+MISSING = -1  # Code of an absent label
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class LabelTable:
+    """
+    Interned labels and their small integer codes
+
+    Codes are assigned in first-seen order and never change, so they can be
+    kept in integer arrays and shared between readings and buffers.
+    """
+
+    def __init__(self, labels: tuple[str, ...] = ()):
+        self._labels: list[str] = []
+        self._codes: dict[str, int] = {}
+        self._lock = threading.Lock()
+        for label in labels:
+            self.code(label)
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def code(self, label: Optional[str]) -> int:
+        """Code of ``label`` (assigned on first use), MISSING for None"""
+        if label is None:
+            return MISSING
+        code = self._codes.get(label)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(label)
+                if code is None:
+                    code = len(self._labels)
+                    self._labels.append(sys.intern(str(label)))
+                    self._codes[label] = code
+        return code
+
+    def label(self, code: int) -> Optional[str]:
+        """Label of ``code``, None for MISSING"""
+        return self._labels[code] if code >= 0 else None
+
+    def labels(self) -> tuple[str, ...]:
+        """Every label so far, indexed by code"""
+        return tuple(self._labels)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Object array of the labels of ``codes`` (None for MISSING)"""
+        table = np.array([*self._labels, None], dtype=object)
+        return table[codes]  # MISSING (-1) selects the trailing None
+
+
+SENSOR_LABELS = LabelTable()  # Sensor names and source ids
+STATUS_LABELS = LabelTable(("OK",))
+COMFORT_LABELS = LabelTable(COMFORT_LEVELS)
+
+# Label field -> (code slot, table)
+LABEL_CODES = {
+    "sensor": ("sensor_code", SENSOR_LABELS),
+    "source": ("source_code", SENSOR_LABELS),
+    "status": ("status_code", STATUS_LABELS),
+    "comfort_level": ("comfort_code", COMFORT_LABELS),
+}
+
+
+def _label_getter(slot: str, table: LabelTable) -> Callable[["Reading"], Any]:
+    code_of = attrgetter(slot)
+    return lambda reading: table.label(code_of(reading))
+
+
+def _format_datetime(reading: "Reading") -> Optional[str]:
+    if reading.python_timestamp is None:
+        return None
+    return datetime.fromtimestamp(reading.python_timestamp).strftime(DATETIME_FORMAT)
+
+
+# Mapping key -> function returning its value (None when absent)
+_GETTERS: dict[str, Callable[["Reading"], Any]] = {
+    **{field: attrgetter(field) for field in NUMERIC_FIELDS},
+    **{field: _label_getter(*codes) for field, codes in LABEL_CODES.items()},
+    "datetime": _format_datetime,
+}
+
+# from_mapping key -> (slot, table interning the value or None)
+_TARGETS: dict[str, tuple[str, Optional[LabelTable]]] = {
+    **{field: (field, None) for field in NUMERIC_FIELDS},
+    **LABEL_CODES,
+    **{slot: (slot, None) for slot, _ in LABEL_CODES.values()},
+}
+
+
+class Reading(Mapping):
+    """
+    One processed reading with slots instead of a dict
+
+    Absent numbers are None; absent labels have the MISSING code. Keys of
+    the raw reading that are not known fields (e.g. a frame ``seq``) are
+    kept in ``extra``, which is None for most readings.
+    """
+
+    __slots__ = (
+        *NUMERIC_FIELDS,
+        "sensor_code",
+        "source_code",
+        "status_code",
+        "comfort_code",
+        "extra",
+    )
+
+    def __init__(
+        self,
+        temperature: Optional[float] = None,
+        humidity: Optional[float] = None,
+        dew_point: Optional[float] = None,
+        discomfort_index: Optional[float] = None,
+        heat_index: Optional[float] = None,
+        python_timestamp: Optional[float] = None,
+        timestamp: Optional[float] = None,
+        sensor_code: int = MISSING,
+        source_code: int = MISSING,
+        status_code: int = MISSING,
+        comfort_code: int = MISSING,
+        extra: Optional[dict] = None,
+    ):
+        self.temperature = temperature
+        self.humidity = humidity
+        self.dew_point = dew_point
+        self.discomfort_index = discomfort_index
+        self.heat_index = heat_index
+        self.python_timestamp = python_timestamp
+        self.timestamp = timestamp
+        self.sensor_code = sensor_code
+        self.source_code = source_code
+        self.status_code = status_code
+        self.comfort_code = comfort_code
+        self.extra = extra
+
+    @classmethod
+    def from_mapping(cls, data: Mapping, **values: Any) -> "Reading":
+        """
+        Reading from a reading dict, with ``values`` overriding its fields
+
+        Labels are interned; ``datetime`` is dropped since it is derived.
+        """
+        if isinstance(data, Reading) and not values:
+            return data
+        reading = cls()
+        extra = None
+        for items in (data.items(), values.items()):
+            for key, value in items:
+                target = _TARGETS.get(key)
+                if target is not None:
+                    slot, table = target
+                    setattr(
+                        reading, slot, value if table is None else table.code(value)
+                    )
+                elif key != "datetime":
+                    if extra is None:
+                        extra = {}
+                    extra[key] = value
+        reading.extra = extra
+        return reading
+
+    def __getitem__(self, key: str) -> Any:
+        getter = _GETTERS.get(key)
+        value = getter(self) if getter is not None else None
+        if value is None and self.extra is not None:
+            value = self.extra.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        getter = _GETTERS.get(key)
+        if getter is not None:
+            value = getter(self)
+            if value is not None:
+                return value
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def _has(self, key: str) -> bool:
+        if key in _NUMERIC_SLOTS:
+            return getattr(self, key) is not None
+        if key in LABEL_CODES:
+            return getattr(self, LABEL_CODES[key][0]) != MISSING
+        if key == "datetime":  # Without formatting it
+            return self.python_timestamp is not None
+        return self.extra is not None and self.extra.get(key) is not None
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._has(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in _GETTERS:
+            if self._has(key):
+                yield key
+        if self.extra is not None:
+            yield from (key for key in self.extra if key not in _GETTERS)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Reading({dict(self)!r})"
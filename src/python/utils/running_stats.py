@@ -0,0 +1,110 @@
+"""
+Incremental sliding-window statistics for DHT22 sensor readings
+"""
+
+import math
+from collections import deque
+from typing import Optional
+
+
+class SlidingWindowStats:
+    """
+    Running count/mean/stddev/min/max over the last ``window`` samples
+
+    Mean and variance use Welford's update with a matching removal step for
+    evicted samples, min and max use monotonic deques. Every update is
+    amortised O(1) and reading the statistics is O(1). NaN samples occupy a
+    slot in the window but are not counted.
+    """
+
+    def __init__(self, window: int):
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.clear()
+
+    def clear(self) -> None:
+        """Reset all statistics"""
+        self.count = 0
+        self.current: Optional[float] = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._pushed = 0
+        self._min: deque[tuple[int, float]] = deque()
+        self._max: deque[tuple[int, float]] = deque()
+
+    def push(self, value: float, evicted: Optional[float] = None) -> None:
+        """
+        Add a sample, removing the one that fell out of the window
+
+        Args:
+            value: New sample (NaN for a missing reading)
+            evicted: Sample leaving the window, or None while the window fills
+        """
+        if evicted is not None and not math.isnan(evicted):
+            self._remove(evicted)
+
+        seq = self._pushed
+        self._pushed += 1
+        self.current = value
+
+        if not math.isnan(value):
+            self.count += 1
+            delta = value - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (value - self._mean)
+
+            while self._min and self._min[-1][1] >= value:
+                self._min.pop()
+            self._min.append((seq, value))
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((seq, value))
+
+        oldest = self._pushed - self.window
+        while self._min and self._min[0][0] < oldest:
+            self._min.popleft()
+        while self._max and self._max[0][0] < oldest:
+            self._max.popleft()
+
+    def _remove(self, value: float) -> None:
+        """Reverse Welford update for a sample leaving the window"""
+        self.count -= 1
+        if self.count <= 0:
+            self.count = 0
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / self.count
+        self._m2 = max(0.0, self._m2 - delta * (value - self._mean))
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, same as pandas)"""
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    @property
+    def min(self) -> float:
+        return self._min[0][1] if self._min else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._max[0][1] if self._max else math.nan
+
+    def as_dict(self) -> dict:
+        """Statistics in the DataBuffer.get_stats format"""
+        return {
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "std": self.std,
+            "count": self.count,
+            "current": self.current,
+        }
@@ -0,0 +1,258 @@
+"""
+Registry of per-sensor buffers, statistics and rollups
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+from collections.abc import Iterable
+from typing import Callable, Optional
+
+from .data_processor import STATS_FIELDS, DataBuffer
+from .downsample import DEFAULT_RETENTION_SECONDS, ROLLUP_FIELDS, RollupPyramid
+from .query import query
+from .storage import SegmentStore
+
+logger = logging.getLogger(__name__)
+
+# Selection key for the aggregate over every sensor
+ALL_SENSORS = "__all__"
+
+# Prefix of selection keys that refer to sensor groups
+GROUP_PREFIX = "group:"
+
+# Sensor id used when a reading carries neither ``source`` nor ``sensor``
+DEFAULT_SENSOR_ID = "default"
+
+
+def normalize_sensor_id(sensor_id: str) -> str:
+    """Make a sensor id safe to use as a directory name and selection key"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(sensor_id)).strip(".") or (
+        DEFAULT_SENSOR_ID
+    )
+
+
+def sensor_id_for(data_point: dict) -> str:
+    """Sensor id of a reading: its ingestion source, else its sensor name"""
+    sensor_id = data_point.get("source") or data_point.get("sensor")
+    return normalize_sensor_id(sensor_id) if sensor_id else DEFAULT_SENSOR_ID
+
+
+def combine_stats(stats_list: Iterable[dict]) -> dict:
+    """
+    Combine per-sensor get_stats results into one aggregate
+
+    Means are count-weighted, standard deviations pooled with the parallel
+    variance formula and ``current`` is the mean of the current values.
+    """
+    stats_list = list(stats_list)
+    combined: dict = {}
+    for field in STATS_FIELDS:
+        parts = [stats[field] for stats in stats_list if field in stats]
+        parts = [part for part in parts if part["count"]]
+        if not parts:
+            continue
+
+        count = sum(part["count"] for part in parts)
+        mean = sum(part["count"] * part["mean"] for part in parts) / count
+        m2 = 0.0
+        for part in parts:
+            std = part["std"]
+            if part["count"] > 1 and not math.isnan(std):
+                m2 += std * std * (part["count"] - 1)
+            m2 += part["count"] * (part["mean"] - mean) ** 2
+        currents = [
+            part["current"]
+            for part in parts
+            if part["current"] is not None and not math.isnan(part["current"])
+        ]
+        combined[field] = {
+            "min": min(part["min"] for part in parts),
+            "max": max(part["max"] for part in parts),
+            "mean": mean,
+            "std": math.sqrt(m2 / (count - 1)) if count > 1 else math.nan,
+            "count": count,
+            "current": sum(currents) / len(currents) if currents else math.nan,
+        }
+    return combined
+
+
+class SensorChannel:
+    """Compact buffer, running stats and rollups for one sensor"""
+
+    def __init__(
+        self,
+        sensor_id: str,
+        buffer_size: int,
+        store: Optional[SegmentStore] = None,
+        rollup_max_buckets: Optional[int] = None,
+    ):
+        self.sensor_id = sensor_id
+        self.buffer = DataBuffer(max_size=buffer_size, store=store)
+        self.rollups = RollupPyramid(max_buckets=rollup_max_buckets)
+        self.latest: Optional[dict] = (
+            self.buffer.get_recent(1)[0] if len(self.buffer) else None
+        )
+        self.stats = self.buffer.get_stats()
+
+    def add(self, data_point: dict) -> None:
+        """Add a processed reading (call ``capture_stats`` after a batch)"""
+        self.buffer.add(data_point)
+        self.rollups.add(data_point)
+        self.latest = data_point
+
+    def capture_stats(self) -> None:
+        """
+        Copy the running statistics for readers on other threads
+
+        The running statistics change in place on every add, so only the
+        thread adding readings reads them directly; ``get_stats`` serves
+        the last copy taken here.
+        """
+        self.stats = self.buffer.get_stats()
+
+    def get_stats(self) -> dict:
+        """Running statistics over the buffered readings, as last captured"""
+        return self.stats
+
+
+class SensorRegistry:
+    """
+    Sensor id -> SensorChannel with O(1) lookup
+
+    Channels are created on the first reading from a sensor, each with a
+    fixed-size buffer and capped rollup tiers so memory per sensor is
+    bounded; ``max_sensors`` bounds the number of channels.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 200,
+        store_factory: Optional[Callable[[str], SegmentStore]] = None,
+        rollup_max_buckets: Optional[int] = 6000,
+        max_sensors: int = 256,
+    ):
+        self.buffer_size = buffer_size
+        self.store_factory = store_factory
+        self.rollup_max_buckets = rollup_max_buckets
+        self.max_sensors = max_sensors
+
+        self._lock = threading.Lock()
+        self._channels: dict[str, SensorChannel] = {}
+        self._groups: dict[str, tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def __contains__(self, sensor_id: str) -> bool:
+        return sensor_id in self._channels
+
+    def sensor_ids(self) -> list[str]:
+        """Known sensor ids in registration order"""
+        return list(self._channels)
+
+    def get(self, sensor_id: str) -> Optional[SensorChannel]:
+        """Channel for a sensor id, None if unknown"""
+        return self._channels.get(sensor_id)
+
+    def channel(self, sensor_id: str) -> Optional[SensorChannel]:
+        """
+        Channel for a sensor id, creating it if needed
+
+        Returns:
+            The channel, or None if ``max_sensors`` channels already exist
+        """
+        channel = self._channels.get(sensor_id)
+        if channel is not None:
+            return channel
+        with self._lock:
+            channel = self._channels.get(sensor_id)
+            if channel is None:
+                if len(self._channels) >= self.max_sensors:
+                    logger.warning(f"Sensor limit reached, ignoring {sensor_id}")
+                    return None
+                store = self.store_factory(sensor_id) if self.store_factory else None
+                channel = SensorChannel(
+                    sensor_id, self.buffer_size, store, self.rollup_max_buckets
+                )
+                if store is not None:
+                    channel.rollups.extend(
+                        store.reader.read_columns(
+                            ("python_timestamp", *ROLLUP_FIELDS),
+                            start=time.time() - DEFAULT_RETENTION_SECONDS,
+                        )
+                    )
+                self._channels[sensor_id] = channel
+        return channel
+
+    def add(self, data_point: dict) -> Optional[SensorChannel]:
+        """Route a processed reading to its sensor's channel"""
+        channel = self.channel(sensor_id_for(data_point))
+        if channel is not None:
+            channel.add(data_point)
+            channel.capture_stats()
+        return channel
+
+    def add_batch(self, readings: Iterable[dict]) -> None:
+        """Route processed readings, capturing each channel's stats once"""
+        touched = {}
+        for data_point in readings:
+            channel = self.channel(sensor_id_for(data_point))
+            if channel is not None:
+                channel.add(data_point)
+                touched[channel.sensor_id] = channel
+        for channel in touched.values():
+            channel.capture_stats()
+
+    def query(self, sensor_id: str, **options) -> dict:
+        """
+        Query one sensor's stored history, see utils.query.query
+
+        Raises:
+            KeyError: If the sensor is unknown
+            ValueError: On invalid options
+        """
+        channel = self._channels.get(sensor_id)
+        if channel is None:
+            raise KeyError(sensor_id)
+        return {"sensor": sensor_id, **query(channel.buffer, **options)}
+
+    def close(self) -> None:
+        """Flush and close every channel's segment store"""
+        for channel in list(self._channels.values()):
+            if channel.buffer.store is not None:
+                channel.buffer.store.close()
+
+    def set_group(self, name: str, sensor_ids: Iterable[str]) -> None:
+        """Define (or replace) a named group of sensors"""
+        self._groups[name] = tuple(normalize_sensor_id(i) for i in sensor_ids)
+
+    def groups(self) -> dict[str, tuple[str, ...]]:
+        return dict(self._groups)
+
+    def selections(self) -> list[str]:
+        """Selection keys: every sensor, every group and the aggregate"""
+        keys = self.sensor_ids()
+        keys += [GROUP_PREFIX + name for name in self._groups]
+        if len(self._channels) > 1:
+            keys.append(ALL_SENSORS)
+        return keys
+
+    def resolve(self, selection: Optional[str]) -> list[SensorChannel]:
+        """Channels for a sensor id, ``group:<name>`` or ALL_SENSORS"""
+        if selection is None or selection == ALL_SENSORS:
+            return list(self._channels.values())
+        if selection.startswith(GROUP_PREFIX):
+            members = self._groups.get(selection[len(GROUP_PREFIX) :], ())
+            return [self._channels[i] for i in members if i in self._channels]
+        channel = self._channels.get(selection)
+        return [channel] if channel is not None else []
+
+    def aggregate_stats(self, selection: Optional[str] = None) -> dict:
+        """Statistics for a selection (combined across sensors if several)"""
+        channels = self.resolve(selection)
+        if len(channels) == 1:
+            return channels[0].get_stats()
+        return combine_stats(channel.get_stats() for channel in channels)
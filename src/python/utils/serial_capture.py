@@ -0,0 +1,214 @@
+"""
+Capture raw serial bytes to a file and replay them later
+
+A capture file is a 16-byte header followed by one record per received
+chunk: an 8-byte epoch timestamp, a 4-byte length and the bytes exactly as
+read from the port. ReplaySource feeds a capture back through the normal
+DHT22SerialReader decoding path at real-time, accelerated or maximum speed.
+"""
+
+import logging
+import struct
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Callable, Optional
+
+from .serial_reader import DHT22SerialReader
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"DHT22CAP"
+CAPTURE_VERSION = 1
+CAPTURE_HEADER = struct.Struct("<8sHxxxxxx")
+CHUNK_HEADER = struct.Struct("<dI")
+
+
+class CaptureWriter:
+    """
+    Append timestamped serial chunks to a capture file
+
+    Writes are buffered and flushed at most every ``flush_interval``
+    seconds, so a crash loses at most that much of the capture.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._file = open(self.path, "wb")
+        self._file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION))
+        self._flushed = time.monotonic()
+        self.chunks = 0
+        self.bytes = 0
+
+    def write(self, data: bytes, timestamp: Optional[float] = None) -> None:
+        """Record one chunk as received at ``timestamp`` (default now)"""
+        if not data:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        self._file.write(CHUNK_HEADER.pack(timestamp, len(data)))
+        self._file.write(data)
+        self.chunks += 1
+        self.bytes += len(data)
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self._file.flush()
+            self._flushed = time.monotonic()
+
+    def close(self) -> None:
+        """Flush and close the file"""
+        if not self._file.closed:
+            self._file.close()
+            logger.info(f"Captured {self.chunks} chunks ({self.bytes} bytes)")
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_capture(path: str) -> Iterator[tuple[float, bytes]]:
+    """
+    Iterate over the ``(timestamp, data)`` chunks of a capture file
+
+    Raises:
+        ValueError: If the file is not a capture file
+    """
+    with open(path, "rb") as f:
+        header = f.read(CAPTURE_HEADER.size)
+        if len(header) < CAPTURE_HEADER.size:
+            raise ValueError(f"{path} is not a capture file")
+        magic, version = CAPTURE_HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION:
+            raise ValueError(f"{path} is not a version {CAPTURE_VERSION} capture")
+        while True:
+            chunk_header = f.read(CHUNK_HEADER.size)
+            if len(chunk_header) < CHUNK_HEADER.size:
+                return
+            timestamp, size = CHUNK_HEADER.unpack(chunk_header)
+            data = f.read(size)
+            if len(data) < size:
+                logger.warning(f"Truncated chunk at the end of {path}")
+                return
+            yield timestamp, data
+
+
+class ReplaySerial:
+    """
+    Serial-like connection that releases captured chunks on schedule
+
+    A chunk becomes readable once ``speed`` times the elapsed wall time has
+    reached its offset in the capture; ``speed=None`` releases everything
+    immediately.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0, timeout: float = 1.0):
+        self.speed = speed
+        self.timeout = timeout
+        self.is_open = True
+        self._chunks = read_capture(path)
+        self._next: Optional[tuple[float, bytes]] = next(self._chunks, None)
+        self._first = self._next[0] if self._next else 0.0
+        self._started = time.monotonic()
+        self._buffer = bytearray()
+
+    @property
+    def exhausted(self) -> bool:
+        """Every captured byte has been read"""
+        return self._next is None and not self._buffer
+
+    def _due_in(self) -> float:
+        """Seconds until the next chunk is released"""
+        if self._next is None:
+            return float("inf")
+        if not self.speed:
+            return 0.0
+        offset = (self._next[0] - self._first) / self.speed
+        return offset - (time.monotonic() - self._started)
+
+    def _release(self) -> None:
+        while self._next is not None and self._due_in() <= 0:
+            self._buffer += self._next[1]
+            self._next = next(self._chunks, None)
+
+    @property
+    def in_waiting(self) -> int:
+        self._release()
+        return len(self._buffer)
+
+    def read(self, size: int = 1) -> bytes:
+        """Read up to ``size`` bytes, waiting up to ``timeout`` for data"""
+        self._release()
+        if not self._buffer:
+            if self._next is None:
+                return b""
+            delay = self._due_in()
+            if delay > self.timeout:
+                time.sleep(self.timeout)
+                return b""
+            time.sleep(max(0.0, delay))
+            self._release()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self.is_open = False
+        self._chunks.close()
+
+
+class ReplaySource(DHT22SerialReader):
+    """
+    DHT22SerialReader that reads from a capture file instead of a port
+
+    Decoding, ``read_batch``, ``read_sensor_data`` and ``run_forever``
+    behave as for a live port; ``run_forever`` returns once the capture has
+    been replayed. Readings are timestamped when they are decoded, so
+    accelerated replays compress the time axis.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: Optional[float] = 1.0,
+        timeout: float = 1.0,
+        protocol: str = "auto",
+        on_state_change: Optional[Callable[[str, str], None]] = None,
+    ):
+        super().__init__(
+            port=str(path),
+            timeout=timeout,
+            protocol=protocol,
+            on_state_change=on_state_change,
+        )
+        self.speed = speed
+        self.finished = False
+
+    def connect(self) -> bool:
+        """Start replaying the capture from the beginning"""
+        try:
+            replay = ReplaySerial(self.port, speed=self.speed, timeout=self.timeout)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to open capture {self.port}: {e}")
+            self.last_error = str(e)
+            return False
+        self.connection = replay
+        self._start_decoding()
+        logger.info(f"Replaying {self.port} at {self.speed or 'max'} speed")
+        return True
+
+    def read_batch(self) -> list[dict]:
+        records = super().read_batch()
+        if not records and self.connection is not None and self.connection.exhausted:
+            self.finished = True
+            self._stop.set()
+        return records
+
+    def get_available_ports(self) -> list:
+        return [self.port]
@@ -4,75 +4,399 @@ Serial communication module for reading DHT22 sensor data from Arduino
 
 import json
 import logging
+import threading
 import time
-from typing import Optional
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Optional
 
 import serial
 
+from . import metrics
+from .binary_protocol import SYNC, FrameDecoder, decode_frames, frames_to_records
+
+if TYPE_CHECKING:
+    from .serial_capture import CaptureWriter
+
 logger = logging.getLogger(__name__)
 
+# Connection states reported to on_state_change callbacks
+STATE_DISCONNECTED = "disconnected"
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED = "connected"
+STATE_RECONNECTING = "reconnecting"
+
+SERIAL_READ_SECONDS = metrics.histogram(
+    "dht22_serial_read_seconds", "Time spent in one serial read call"
+)
+DECODE_SECONDS = {
+    protocol: metrics.histogram(
+        "dht22_decode_seconds",
+        "Time to decode one received chunk into readings",
+        protocol=protocol,
+    )
+    for protocol in ("auto", "json", "binary")
+}
+PARSE_ERRORS = metrics.counter(
+    "dht22_parse_errors_total", "JSON lines that failed to parse or reported an error"
+)
+DISCARDED_BYTES = metrics.counter(
+    "dht22_discarded_bytes_total", "Binary stream bytes dropped as garbage or bad CRC"
+)
+RECONNECTS = metrics.counter(
+    "dht22_reconnects_total", "Serial connections lost and scheduled to reconnect"
+)
+
+
+class Backoff:
+    """Exponential reconnect delays: initial, initial * factor, ... maximum"""
+
+    def __init__(
+        self, initial: float = 1.0, maximum: float = 30.0, factor: float = 2.0
+    ):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.attempts = 0
+
+    def next(self) -> float:
+        """Delay before the next attempt"""
+        delay = min(self.maximum, self.initial * self.factor**self.attempts)
+        self.attempts += 1
+        return delay
+
+    def reset(self) -> None:
+        """Start over after a successful connection"""
+        self.attempts = 0
+
+
+class LineFramer:
+    """
+    Split a serial byte stream into complete lines
+
+    Bytes are accumulated in one reusable bytearray and split only at the
+    last newline, so partial lines are kept for the next chunk. A partial
+    line that grows past ``max_line`` is discarded to resync.
+    """
+
+    def __init__(self, max_line: int = 1024):
+        self.max_line = max_line
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """Add received bytes and return the complete, non-empty lines"""
+        self._buffer += data
+        end = self._buffer.rfind(b"\n")
+        lines = []
+        if end >= 0:
+            lines = bytes(self._buffer[:end]).splitlines()
+            del self._buffer[: end + 1]
+        if len(self._buffer) > self.max_line:
+            logger.warning(f"Discarding {len(self._buffer)} bytes without newline")
+            self._buffer.clear()
+        return [line for line in map(bytes.strip, lines) if line]
+
+
+def parse_json_line(line: bytes) -> Optional[dict]:
+    """
+    Parse one JSON line from the Arduino
+
+    Args:
+        line: Raw line without the trailing newline
+
+    Returns:
+        Parsed data with ``python_timestamp`` added, or None if the line is
+        not a JSON object (e.g. the startup banner)
+    """
+    try:
+        data = json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.warning(f"Error parsing sensor data {line[:40]!r}: {e}")
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    # Add Python timestamp
+    data["python_timestamp"] = time.time()
+    return data
+
+
+class StreamDecoder:
+    """
+    Decode a serial stream in either protocol, detected automatically
+
+    Until the protocol is known, received bytes are kept and probed: a frame
+    with a valid CRC selects ``"binary"``, a line starting with ``{`` selects
+    ``"json"``. The choice then sticks for the life of the connection.
+
+    JSON lines are resynchronised at their first ``{`` so noise before a
+    record does not lose it; lines without one (the startup banner) are
+    counted in ``skipped``, unparseable lines and sensor error reports in
+    ``errors``.
+    """
+
+    PROTOCOLS = ("auto", "json", "binary")
+
+    def __init__(self, protocol: str = "auto", max_probe: int = 4096):
+        if protocol not in self.PROTOCOLS:
+            raise ValueError(f"Unknown protocol: {protocol}")
+        self.protocol = None if protocol == "auto" else protocol
+        self.max_probe = max_probe
+        self.lines = LineFramer()
+        self.frames = FrameDecoder()
+        self.errors = 0
+        self.skipped = 0
+        self._probe = bytearray()
+
+    def _detect(self) -> Optional[str]:
+        if SYNC in self._probe and len(decode_frames(self._probe)[0]):
+            return "binary"
+        for line in self._probe.split(b"\n")[:-1]:
+            if line.strip().startswith(b"{"):
+                return "json"
+        return None
+
+    def feed(self, data: bytes) -> list[dict]:
+        """Add received bytes and return the parsed readings"""
+        started = time.perf_counter()
+        records = self._decode(data)
+        DECODE_SECONDS[self.protocol or "auto"].observe(time.perf_counter() - started)
+        return records
+
+    def _decode(self, data: bytes) -> list[dict]:
+        if self.protocol is None:
+            self._probe += data
+            self.protocol = self._detect()
+            if self.protocol is None:
+                if len(self._probe) > self.max_probe:
+                    del self._probe[: -self.max_probe]
+                return []
+            logger.info(f"Detected {self.protocol} protocol")
+            data = bytes(self._probe)
+            self._probe.clear()
+
+        if self.protocol == "binary":
+            discarded = self.frames.discarded
+            frames = self.frames.feed(data)
+            DISCARDED_BYTES.inc(self.frames.discarded - discarded)
+            return frames_to_records(frames)
+
+        records = []
+        for line in self.lines.feed(data):
+            start = line.find(b"{")
+            if start < 0:
+                self.skipped += 1
+                logger.debug(f"Skipping non-JSON line {line[:40]!r}")
+                continue
+            record = parse_json_line(line[start:])
+            if record is None or "error" in record:
+                if record is not None:
+                    logger.warning(f"Sensor reported an error: {record['error']}")
+                self.errors += 1
+                PARSE_ERRORS.inc()
+            else:
+                records.append(record)
+        return records
+
 
 class DHT22SerialReader:
-    """Handles serial communication with Arduino DHT22 sensor"""
+    """
+    Handles serial communication with Arduino DHT22 sensor
+
+    ``connect``/``read_batch`` can be driven directly, or ``run_forever``
+    manages the connection in a background thread: it reconnects with
+    exponential backoff, retries at once when the port reappears in
+    ``get_available_ports`` (hot-plug), and reports each state change to
+    ``on_state_change(port, state)``. With a ``capture`` writer every chunk
+    read from the port is also recorded for later replay.
+    """
 
-    def __init__(self, port: str = "COM3", baudrate: int = 9600, timeout: float = 1.0):
+    def __init__(
+        self,
+        port: str = "COM3",
+        baudrate: int = 9600,
+        timeout: float = 1.0,
+        protocol: str = "auto",
+        read_size: int = 4096,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        hotplug_interval: float = 1.0,
+        on_state_change: Optional[Callable[[str, str], None]] = None,
+        capture: Optional["CaptureWriter"] = None,
+    ):
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
+        self.protocol = protocol
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.hotplug_interval = hotplug_interval
+        self.on_state_change = on_state_change
+        self.capture = capture
         self.connection: Optional[serial.Serial] = None
         self.is_connected = False
+        self.state = STATE_DISCONNECTED
+        self.last_error: Optional[str] = None
+        self.decoder = StreamDecoder(protocol)
+        self._pending: deque = deque()
+        self._read_buffer = bytearray(read_size)
+        self._stop = threading.Event()
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        if self.on_state_change is not None:
+            try:
+                self.on_state_change(self.port, state)
+            except Exception as e:
+                logger.warning(f"State change callback failed: {e}")
 
     def connect(self) -> bool:
-        """Establish serial connection"""
+        """
+        Establish serial connection
+
+        Does not wait for the Arduino to finish its reset; the decoder
+        skips the startup banner once data arrives.
+        """
         try:
             self.connection = serial.Serial(
                 port=self.port, baudrate=self.baudrate, timeout=self.timeout
             )
-            time.sleep(2)  # Allow Arduino to reset
-            self.is_connected = True
+            self._start_decoding()
             logger.info(f"Connected to {self.port} at {self.baudrate} baud")
             return True
         except serial.SerialException as e:
             logger.error(f"Failed to connect to {self.port}: {e}")
             self.is_connected = False
+            self.last_error = str(e)
             return False
 
+    def _start_decoding(self) -> None:
+        """Reset decoding state for a freshly opened connection"""
+        self.decoder = StreamDecoder(self.protocol)
+        self._pending.clear()
+        self.is_connected = True
+        self.last_error = None
+        self._set_state(STATE_CONNECTED)
+
     def disconnect(self) -> None:
         """Close serial connection"""
         if self.connection and self.connection.is_open:
             self.connection.close()
             self.is_connected = False
             logger.info("Serial connection closed")
+        self._set_state(STATE_DISCONNECTED)
 
-    def read_sensor_data(self) -> Optional[dict]:
-        """Read and parse sensor data from Arduino"""
-        if not self.is_connected or not self.connection:
-            return None
-
+    def _connection_lost(self, error: Exception) -> None:
+        logger.warning(f"Lost {self.port}: {error}")
+        RECONNECTS.inc()
+        self.last_error = str(error)
+        self.is_connected = False
         try:
-            # Read line from serial
-            line = self.connection.readline().decode("utf-8").strip()
+            self.connection.close()
+        except (serial.SerialException, OSError):
+            pass
+        self._set_state(STATE_RECONNECTING)
+
+    def _wait_for_port(self, delay: float) -> None:
+        """Sleep up to ``delay`` seconds, returning early if the port appears"""
+        deadline = time.monotonic() + delay
+        present = self.port in self.get_available_ports()
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if self._stop.wait(min(self.hotplug_interval, remaining)):
+                return
+            available = self.port in self.get_available_ports()
+            if available and not present:
+                logger.info(f"{self.port} appeared, reconnecting")
+                return
+            present = available
+
+    def run_forever(self, sink: Callable[[list[dict]], None]) -> None:
+        """
+        Keep the port connected and hand each batch of readings to ``sink``
+
+        Blocks until ``stop`` is called; run it in a background thread.
+        """
+        self._stop.clear()
+        backoff = Backoff(self.reconnect_delay, self.max_reconnect_delay)
+        while not self._stop.is_set():
+            if not self.is_connected:
+                self._set_state(
+                    STATE_CONNECTING if not backoff.attempts else STATE_RECONNECTING
+                )
+                if not self.connect():
+                    self._wait_for_port(backoff.next())
+                    continue
+                backoff.reset()
+            batch = self.read_batch()
+            if batch:
+                sink(batch)
+        self.disconnect()
+
+    def stop(self) -> None:
+        """Stop ``run_forever`` (safe to call from any thread)"""
+        self._stop.set()
 
-            if not line:
-                return None
+    def read_batch(self) -> list[dict]:
+        """
+        Read everything the port has buffered and parse it in one go
 
-            # Parse JSON data
-            data = json.loads(line)
+        Waits up to ``timeout`` for the first complete reading, then keeps
+        reading while ``in_waiting`` reports more bytes. Bytes are read in
+        bulk into a reusable bytearray.
 
-            # Add Python timestamp
-            data["python_timestamp"] = time.time()
+        Returns:
+            Parsed readings in arrival order (empty on timeout or error)
+        """
+        records = list(self._pending)
+        self._pending.clear()
+        if not self.is_connected or not self.connection:
+            return records
+
+        view = memoryview(self._read_buffer)
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                waiting = self.connection.in_waiting
+                if records and not waiting:
+                    break
+                if not records and time.monotonic() >= deadline:
+                    break
+                size = min(max(waiting, 1), len(view))
+                started = time.perf_counter()
+                received = self.connection.readinto(view[:size])
+                SERIAL_READ_SECONDS.observe(time.perf_counter() - started)
+                if not received:
+                    break
+                if self.capture is not None:
+                    self.capture.write(view[:received])
+                records.extend(self.decoder.feed(view[:received]))
+        except (serial.SerialException, OSError) as e:
+            self._connection_lost(e)
+        return records
 
-            return data
+    def read_sensor_data(self) -> Optional[dict]:
+        """
+        Read and parse sensor data from Arduino
 
-        except (json.JSONDecodeError, UnicodeDecodeError, serial.SerialException) as e:
-            logger.warning(f"Error reading sensor data: {e}")
-            return None
+        Readings beyond the first of a batch are returned by later calls.
+        """
+        if not self._pending:
+            self._pending.extend(self.read_batch())
+        return self._pending.popleft() if self._pending else None
 
     def get_available_ports(self) -> list:
         """Get list of available serial ports"""
         import serial.tools.list_ports
 
-        ports = serial.tools.list_ports.comports()
+        try:
+            ports = serial.tools.list_ports.comports()
+        except OSError as e:
+            logger.debug(f"Could not list serial ports: {e}")
+            return []
         return [port.device for port in ports]
 
 
@@ -112,3 +436,7 @@ class DHT22Simulator:
             "status": "OK",
             "python_timestamp": current_time,
         }
+
+    def read_batch(self) -> list[dict]:
+        """Generate one simulated reading as a batch"""
+        return [self.read_sensor_data()]
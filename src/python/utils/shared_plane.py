@@ -0,0 +1,331 @@
+"""
+Shared-memory data plane between one collector and many dashboard workers
+
+The collector process owns the serial ports and writes every processed
+reading into per-sensor ring buffers in a ``multiprocessing.shared_memory``
+block, together with a small JSON state document (connection states,
+simulator flag). Any number of worker processes attach read-only and copy
+a consistent view out under a seqlock, so callbacks can be served from
+several processes while the serial port keeps exactly one owner.
+"""
+
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+from .data_processor import NUMERIC_FIELDS
+from .sensor_registry import sensor_id_for
+
+logger = logging.getLogger(__name__)
+
+PLANE_MAGIC = 0x444854323250  # "DHT22P"
+PLANE_FIELDS = NUMERIC_FIELDS
+NAME_SIZE = 64
+
+# Control words at the start of the block
+(
+    _MAGIC,
+    _SEQ,
+    _VERSION,
+    _SENSORS,
+    _STATE_LENGTH,
+    _MAX_SENSORS,
+    _CAPACITY,
+    _STATE_SIZE,
+    _FIELDS,
+    _OWNER_PID,
+) = range(10)
+_CONTROL_WORDS = 16
+
+# Blocks created (and so registered with the resource tracker) by this process
+_created: set[str] = set()
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether process ``pid`` is running (without signalling it)"""
+    if pid <= 0:
+        return False
+    if sys.platform == "win32":
+        import ctypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # QUERY_LIMITED_INFO
+        if not handle:
+            return ctypes.get_last_error() == 5  # Access denied: it exists
+        exit_code = ctypes.c_ulong()
+        queried = kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return not queried or exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _layout(max_sensors: int, capacity: int, state_size: int) -> dict:
+    """Byte offsets of every region, and the total size"""
+    offsets = {}
+    position = _CONTROL_WORDS * 8
+    for name, size in (
+        ("names", max_sensors * NAME_SIZE),
+        ("heads", max_sensors * 8),
+        ("sizes", max_sensors * 8),
+        ("columns", max_sensors * len(PLANE_FIELDS) * capacity * 8),
+        ("state", state_size),
+    ):
+        offsets[name] = position
+        position += size
+    offsets["total"] = position
+    return offsets
+
+
+class SharedDataPlane:
+    """
+    Seqlock-protected per-sensor ring buffers in shared memory
+
+    Create it in the collector with ``create`` and write with ``publish``
+    and ``set_state``; attach from workers with ``attach`` and copy out with
+    ``read``. Writers bump the sequence word to an odd value before
+    changing anything and to the next even value afterwards; readers retry
+    while it is odd or changed during their copy. Only one process may
+    write.
+
+    Python has no memory barriers, so the check relies on the writer's
+    stores becoming visible in order (as on x86). Every index a reader
+    derives is bounded, so on weaker orderings a torn copy can at worst
+    yield one inconsistent reading, never a crash.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        buffer = shm.buf
+        self._control = np.ndarray((_CONTROL_WORDS,), np.uint64, buffer)
+        if int(self._control[_MAGIC]) != PLANE_MAGIC:
+            raise ValueError(f"{shm.name} is not a DHT22 data plane")
+        if int(self._control[_FIELDS]) != len(PLANE_FIELDS):
+            raise ValueError(f"{shm.name} was created with different fields")
+
+        self.max_sensors = int(self._control[_MAX_SENSORS])
+        self.capacity = int(self._control[_CAPACITY])
+        self.state_size = int(self._control[_STATE_SIZE])
+        offsets = _layout(self.max_sensors, self.capacity, self.state_size)
+        self._names = np.ndarray(
+            (self.max_sensors,), f"S{NAME_SIZE}", buffer, offsets["names"]
+        )
+        self._heads = np.ndarray(
+            (self.max_sensors,), np.int64, buffer, offsets["heads"]
+        )
+        self._sizes = np.ndarray(
+            (self.max_sensors,), np.int64, buffer, offsets["sizes"]
+        )
+        self._columns = np.ndarray(
+            (self.max_sensors, len(PLANE_FIELDS), self.capacity),
+            np.float64,
+            buffer,
+            offsets["columns"],
+        )
+        self._state = np.ndarray((self.state_size,), np.uint8, buffer, offsets["state"])
+
+        # Writer side only
+        self._lock = threading.Lock()
+        self._slots = {
+            name.decode(): slot
+            for slot, name in enumerate(
+                self._names[: int(self._control[_SENSORS])].tolist()
+            )
+        }
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        max_sensors: int = 64,
+        capacity: int = 1024,
+        state_size: int = 65536,
+    ) -> "SharedDataPlane":
+        """
+        Create (or replace a stale) shared block as its single writer
+
+        The creating process's pid is kept in the block. An existing block
+        is only replaced once that process is gone (it did not shut down
+        cleanly); while it runs, ``create`` refuses, so a second collector
+        cannot take over the plane and the serial ports behind it.
+
+        Args:
+            name: Shared memory name workers attach to
+            max_sensors: Sensor slots; readings from further sensors are dropped
+            capacity: Readings kept per sensor
+            state_size: Bytes reserved for the JSON state document
+
+        Raises:
+            FileExistsError: If the block's collector is still running
+        """
+        size = _layout(max_sensors, capacity, state_size)["total"]
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            owner = 0
+            if stale.size >= _CONTROL_WORDS * 8:
+                control = np.ndarray((_CONTROL_WORDS,), np.uint64, stale.buf)
+                if int(control[_MAGIC]) == PLANE_MAGIC:
+                    owner = int(control[_OWNER_PID])
+                del control
+            if owner != os.getpid() and _process_alive(owner):
+                stale.close()
+                # Keep this process's resource tracker off the live block
+                resource_tracker.unregister(stale._name, "shared_memory")
+                raise FileExistsError(
+                    f"Data plane {name} is owned by running process {owner}"
+                ) from None
+            # Left behind by a collector that did not shut down cleanly
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        control = np.ndarray((_CONTROL_WORDS,), np.uint64, shm.buf)
+        control[:] = 0
+        control[_MAX_SENSORS] = max_sensors
+        control[_CAPACITY] = capacity
+        control[_STATE_SIZE] = state_size
+        control[_FIELDS] = len(PLANE_FIELDS)
+        control[_OWNER_PID] = os.getpid()
+        control[_MAGIC] = PLANE_MAGIC
+        del control
+        _created.add(shm._name)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedDataPlane":
+        """
+        Attach read-only to a collector's block
+
+        Raises:
+            FileNotFoundError: If no collector has created ``name``
+        """
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            # Stop this process's resource tracker unlinking it on exit
+            if shm._name not in _created:
+                resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def version(self) -> int:
+        """Publish counter; changes whenever readings or state change"""
+        return int(self._control[_VERSION])
+
+    def _begin_write(self) -> None:
+        self._control[_SEQ] += 1
+
+    def _end_write(self) -> None:
+        self._control[_VERSION] += 1
+        self._control[_SEQ] += 1
+
+    def _slot(self, sensor_id: str) -> Optional[int]:
+        slot = self._slots.get(sensor_id)
+        if slot is None:
+            slot = len(self._slots)
+            if slot >= self.max_sensors:
+                return None
+            self._names[slot] = sensor_id.encode()[:NAME_SIZE]
+            self._heads[slot] = 0
+            self._sizes[slot] = 0
+            self._slots[sensor_id] = slot
+            self._control[_SENSORS] = slot + 1
+        return slot
+
+    def publish(self, readings: list[dict]) -> None:
+        """Append processed readings to their sensors' rings"""
+        with self._lock:
+            self._begin_write()
+            try:
+                for data_point in readings:
+                    slot = self._slot(sensor_id_for(data_point))
+                    if slot is None:
+                        continue
+                    head = int(self._heads[slot])
+                    self._columns[slot, :, head] = [
+                        math.nan if data_point.get(f) is None else data_point[f]
+                        for f in PLANE_FIELDS
+                    ]
+                    self._heads[slot] = (head + 1) % self.capacity
+                    self._sizes[slot] = min(self._sizes[slot] + 1, self.capacity)
+            finally:
+                self._end_write()
+
+    def set_state(self, state: dict) -> None:
+        """Replace the JSON state document"""
+        data = json.dumps(state).encode()
+        if len(data) > self.state_size:
+            raise ValueError(f"State of {len(data)} bytes exceeds {self.state_size}")
+        with self._lock:
+            self._begin_write()
+            try:
+                self._state[: len(data)] = np.frombuffer(data, np.uint8)
+                self._control[_STATE_LENGTH] = len(data)
+            finally:
+                self._end_write()
+
+    def read(self, timeout: float = 1.0) -> Optional[dict]:
+        """
+        Copy out a consistent view
+
+        Returns:
+            ``{"version", "sensors": {sensor_id: {field: array}}, "state"}``
+            with each sensor's readings oldest first, or None if no
+            consistent copy could be made within ``timeout`` seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            sequence = int(self._control[_SEQ])
+            if not sequence & 1:
+                version = int(self._control[_VERSION])
+                count = min(int(self._control[_SENSORS]), self.max_sensors)
+                names = self._names[:count].tolist()
+                heads = self._heads[:count].copy()
+                sizes = self._sizes[:count].copy()
+                columns = self._columns[:count].copy()
+                length = min(int(self._control[_STATE_LENGTH]), self.state_size)
+                state = self._state[:length].tobytes()
+                if int(self._control[_SEQ]) == sequence:
+                    break
+            if time.monotonic() >= deadline:
+                logger.warning("Timed out waiting for a consistent data plane read")
+                return None
+            time.sleep(0)
+
+        sensors = {}
+        for slot, name in enumerate(names):
+            size = min(max(int(sizes[slot]), 0), self.capacity)
+            order = (int(heads[slot]) - size + np.arange(size)) % self.capacity
+            sensors[name.decode()] = {
+                field: columns[slot, i, order] for i, field in enumerate(PLANE_FIELDS)
+            }
+        try:
+            state = json.loads(state) if state else {}
+        except ValueError:
+            state = {}
+        return {"version": version, "sensors": sensors, "state": state}
+
+    def close(self) -> None:
+        """Detach; the creating process also removes the block"""
+        self._control = self._names = self._heads = self._sizes = None
+        self._columns = self._state = None
+        self._shm.close()
+        if self.owner:
+            _created.discard(self._shm._name)
+            self._shm.unlink()
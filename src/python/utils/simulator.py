@@ -0,0 +1,185 @@
+"""
+Seeded, vectorized fleet of virtual DHT22 sensors for load generation
+
+Unlike DHT22Simulator (one reading per call from the wall clock), a
+SimulatorFleet produces readings for many sensors at once as NumPy column
+batches. Given the same seed, start time and batch lengths it always
+produces the same readings, so ingestion, storage and dashboard load tests
+are reproducible.
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+# Raw fields of a batch, in the same form the Arduino sends them
+BATCH_FIELDS = ("python_timestamp", "timestamp", "temperature", "humidity")
+
+
+class SimulatorFleet:
+    """
+    N virtual sensors sampled on a fixed grid of simulated time
+
+    Each sensor has its own base level, daily-style sine swing, phase and
+    sampling offset. Readings get Gaussian noise, rare spikes and random
+    dropouts (missing readings). Simulated time starts at ``start_time`` and
+    only advances through ``next_batch``; ``realtime`` makes ``read_batch``
+    pace it to the wall clock, otherwise batches are produced as fast as
+    they are requested.
+    """
+
+    def __init__(
+        self,
+        sensors: int = 10,
+        rate: float = 1.0,
+        seed: int = 0,
+        noise: float = 0.05,
+        spike_probability: float = 0.001,
+        spike_size: float = 5.0,
+        dropout_probability: float = 0.01,
+        period: float = 600.0,
+        realtime: bool = True,
+        batch_seconds: float = 1.0,
+        start_time: Optional[float] = None,
+        prefix: str = "SIM",
+    ):
+        """
+        Args:
+            sensors: Number of virtual sensors
+            rate: Readings per second per sensor
+            seed: Seed for every random draw
+            noise: Standard deviation of measurement noise (°C / %RH)
+            spike_probability: Chance that a reading is a spike
+            spike_size: Magnitude of a spike
+            dropout_probability: Chance that a reading is missing
+            period: Period of the temperature swing in seconds
+            realtime: Pace ``read_batch`` to the wall clock
+            batch_seconds: Simulated seconds covered by ``read_batch``
+            start_time: Epoch seconds of the first reading (default now)
+            prefix: Sensor names are ``<prefix>_<index>``
+        """
+        if sensors <= 0 or rate <= 0:
+            raise ValueError("sensors and rate must be positive")
+        self.sensors = sensors
+        self.rate = rate
+        self.seed = seed
+        self.noise = noise
+        self.spike_probability = spike_probability
+        self.spike_size = spike_size
+        self.dropout_probability = dropout_probability
+        self.period = period
+        self.realtime = realtime
+        self.batch_seconds = batch_seconds
+        self.start_time = time.time() if start_time is None else start_time
+        self.sensor_ids = np.array(
+            [f"{prefix}_{i:03d}" for i in range(sensors)], dtype=object
+        )
+
+        rng = np.random.default_rng(seed)
+        self._base_temperature = rng.uniform(20.0, 26.0, sensors)
+        self._base_humidity = rng.uniform(40.0, 60.0, sensors)
+        self._swing = rng.uniform(1.0, 3.0, sensors)
+        self._phase = rng.uniform(0.0, 2 * math.pi, sensors)
+        self._offset = rng.uniform(0.0, 1.0 / rate, sensors)
+        self._rng = rng
+        self._clock = self.start_time
+        self._stop = threading.Event()
+
+    @property
+    def clock(self) -> float:
+        """Simulated time up to which readings have been produced"""
+        return self._clock
+
+    def next_batch(self, seconds: Optional[float] = None) -> dict[str, np.ndarray]:
+        """
+        Produce every reading in the next ``seconds`` of simulated time
+
+        Returns:
+            Columns of ``BATCH_FIELDS`` plus ``sensor`` and ``source``
+            (sensor name) arrays, sorted by ``python_timestamp``
+        """
+        seconds = self.batch_seconds if seconds is None else seconds
+        start = self._clock
+        end = start + seconds
+        self._clock = end
+
+        # Sample k of sensor i is at start_time + offset_i + k / rate
+        elapsed = start - self.start_time
+        first = np.ceil((elapsed - self._offset) * self.rate).astype(np.int64)
+        last = np.ceil((elapsed + seconds - self._offset) * self.rate).astype(np.int64)
+        steps = np.arange(int((last - first).max()))
+        k = first[:, None] + steps
+        valid = k < last[:, None]
+        sensor = np.broadcast_to(np.arange(self.sensors)[:, None], k.shape)[valid]
+        k = k[valid]
+        offset_seconds = self._offset[sensor] + k / self.rate
+
+        keep = self._rng.random(len(k)) >= self.dropout_probability
+        sensor, offset_seconds = sensor[keep], offset_seconds[keep]
+        n = len(sensor)
+
+        angle = 2 * math.pi * offset_seconds / self.period + self._phase[sensor]
+        swing = self._swing[sensor] * np.sin(angle)
+        temperature = (
+            self._base_temperature[sensor]
+            + swing
+            + self._rng.normal(0.0, self.noise, n)
+        )
+        humidity = (
+            self._base_humidity[sensor]
+            - 2.0 * swing
+            + self._rng.normal(0.0, self.noise, n)
+        )
+        spikes = self._rng.random(n) < self.spike_probability
+        temperature[spikes] += self._rng.choice((-1.0, 1.0), spikes.sum()) * (
+            self.spike_size
+        )
+
+        order = np.argsort(offset_seconds, kind="stable")
+        sensor_names = self.sensor_ids[sensor[order]]
+        return {
+            "python_timestamp": self.start_time + offset_seconds[order],
+            "timestamp": np.round(offset_seconds[order] * 1000).astype(np.int64),
+            "temperature": np.round(temperature[order], 2),
+            "humidity": np.round(np.clip(humidity[order], 0.0, 100.0), 2),
+            "sensor": sensor_names,
+            "source": sensor_names,
+        }
+
+    @staticmethod
+    def to_records(batch: dict[str, np.ndarray]) -> list[dict]:
+        """Convert a batch to reading dicts like the serial readers return"""
+        names = list(batch)
+        columns = [batch[name].tolist() for name in names]
+        records = [dict(zip(names, row)) for row in zip(*columns)]
+        for record in records:
+            record["status"] = "OK"
+        return records
+
+    def read_batch(self) -> list[dict]:
+        """
+        Readings for the next ``batch_seconds`` as dicts
+
+        In real-time mode this waits until the wall clock has reached the
+        end of the batch, so the fleet emits at its configured rate.
+        """
+        if self.realtime:
+            delay = self._clock + self.batch_seconds - time.time()
+            if delay > 0:
+                self._stop.wait(delay)
+        return self.to_records(self.next_batch())
+
+    def run_forever(self, sink: Callable[[list[dict]], None]) -> None:
+        """Hand each batch of readings to ``sink`` until ``stop`` is called"""
+        self._stop.clear()
+        while not self._stop.is_set():
+            records = self.read_batch()
+            if records and not self._stop.is_set():
+                sink(records)
+
+    def stop(self) -> None:
+        """Stop ``run_forever`` (safe to call from any thread)"""
+        self._stop.set()
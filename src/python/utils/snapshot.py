@@ -0,0 +1,77 @@
+"""
+Tick-versioned snapshots shared by all dashboard callbacks and clients
+"""
+
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Optional
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Immutable view of the latest data at one version
+
+    Derived artifacts (figures, tables) are memoised per snapshot with
+    ``get_or_build`` so every callback and client asking for the same
+    version shares one computation.
+    """
+
+    version: int
+    created: float
+    latest: Optional[Mapping[str, Any]]
+    stats: Mapping[str, Any]
+    _cache: dict = field(default_factory=dict, repr=False, compare=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def get_or_build(self, key: Any, builder: Callable[[], Any]) -> Any:
+        """Return the artifact cached under ``key``, building it once"""
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = builder()
+            return self._cache[key]
+
+
+class SnapshotPublisher:
+    """Single-writer publisher of monotonically versioned snapshots"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._current = Snapshot(
+            version=0, created=time.time(), latest=None, stats=MappingProxyType({})
+        )
+
+    @property
+    def current(self) -> Snapshot:
+        """Most recently published snapshot"""
+        return self._current
+
+    def publish(self, latest: Mapping[str, Any], stats: Mapping[str, Any]) -> Snapshot:
+        """
+        Publish a new snapshot
+
+        Args:
+            latest: Newest processed reading (copied)
+            stats: Statistics at this point (copied)
+
+        Returns:
+            The published snapshot
+        """
+        with self._lock:
+            snapshot = Snapshot(
+                version=self._current.version + 1,
+                created=time.time(),
+                latest=MappingProxyType(dict(latest)),
+                stats=MappingProxyType(dict(stats)),
+            )
+            self._current = snapshot
+        return snapshot
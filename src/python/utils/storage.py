@@ -0,0 +1,455 @@
+"""
+Append-only on-disk time-series storage for DHT22 sensor readings
+
+Readings are stored as fixed-width binary records in segment files, one file
+per ``segment_seconds`` window. Each segment starts with a small header that
+carries the min/max ``python_timestamp`` of its records so range queries can
+skip segments without reading them.
+"""
+
+import logging
+import mmap
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b"DHT22SEG"
+SEGMENT_VERSION = 1
+SEGMENT_SUFFIX = ".seg"
+
+# One reading on disk (32 bytes)
+RECORD_DTYPE = np.dtype(
+    [
+        ("python_timestamp", "<f8"),
+        ("temperature", "<f4"),
+        ("humidity", "<f4"),
+        ("dew_point", "<f4"),
+        ("discomfort_index", "<f4"),
+        ("heat_index", "<f4"),
+        ("timestamp", "<u4"),
+    ]
+)
+
+# Segment file header (32 bytes)
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u2"),
+        ("record_size", "<u2"),
+        ("reserved", "<u4"),
+        ("min_ts", "<f8"),
+        ("max_ts", "<f8"),
+    ]
+)
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+# Segment maps a SegmentReader keeps open (each holds a file descriptor)
+MAX_MAPPED_SEGMENTS = 32
+
+
+@dataclass
+class SegmentInfo:
+    """Location and time bounds of one segment file"""
+
+    path: Path
+    start: int
+    min_ts: float
+    max_ts: float
+
+    def overlaps(self, start: Optional[float], end: Optional[float]) -> bool:
+        """Whether the segment may hold records in ``[start, end)``"""
+        if start is not None and self.max_ts < start:
+            return False
+        if end is not None and self.min_ts >= end:
+            return False
+        return True
+
+
+def to_records(data_points: Iterable[dict]) -> np.ndarray:
+    """
+    Convert processed data points to fixed-width records
+
+    Args:
+        data_points: Dicts as produced by process_sensor_data
+
+    Returns:
+        Structured array with RECORD_DTYPE (missing values become NaN/0)
+    """
+    points = list(data_points)
+    records = np.zeros(len(points), dtype=RECORD_DTYPE)
+    for name in RECORD_DTYPE.names:
+        missing = 0 if name == "timestamp" else np.nan
+        records[name] = [
+            missing if point.get(name) is None else point[name] for point in points
+        ]
+    return records
+
+
+def read_header(path: Path) -> Optional[np.void]:
+    """Read and validate a segment header, None if the file is not a segment"""
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        return None
+    header = np.frombuffer(raw, dtype=HEADER_DTYPE)[0]
+    if (
+        header["magic"] != SEGMENT_MAGIC
+        or header["record_size"] != RECORD_DTYPE.itemsize
+    ):
+        return None
+    return header
+
+
+def segment_start(path: Path) -> Optional[int]:
+    """Window start encoded in a segment file name, None if it has none"""
+    return int(path.stem) if path.stem.isdigit() else None
+
+
+def map_segment(path: Path, count: int) -> np.ndarray:
+    """Read-only array over the first ``count`` records of a segment file"""
+    with open(path, "rb") as f:
+        if sys.version_info >= (3, 13):
+            # The map then needs no file descriptor of its own
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ, trackfd=False)
+        else:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(mapped, RECORD_DTYPE, count, HEADER_SIZE)
+
+
+def read_segment(path: Path) -> np.ndarray:
+    """Read all complete records of a segment file"""
+    count = (path.stat().st_size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count <= 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.fromfile(path, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+
+
+class SegmentStore:
+    """
+    Append-only segment store with a background writer
+
+    ``append`` only enqueues the reading; a daemon thread batches queued
+    readings into the segment for their time window. When the queue is full
+    readings are dropped (and counted) rather than blocking the collector.
+
+    A ``read_only`` store never writes; it serves reads of files written by
+    another process and re-checks them at most every ``refresh_interval``
+    seconds.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_seconds: int = 3600,
+        queue_size: int = 10000,
+        read_only: bool = False,
+        refresh_interval: float = 1.0,
+    ):
+        self.directory = Path(directory)
+        self.read_only = read_only
+        if not read_only:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_seconds = segment_seconds
+        self.refresh_interval = refresh_interval
+        self.dropped = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._segments: dict[int, SegmentInfo] = {}
+        self._writer: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._scan()
+        self._refreshed = time.monotonic()
+        self.reader = SegmentReader(self)
+
+    def _scan(self) -> None:
+        """Load headers of existing segments"""
+        for path in sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}")):
+            start = segment_start(path)
+            header = read_header(path) if start is not None else None
+            if header is None:
+                logger.warning(f"Skipping invalid segment file {path}")
+                continue
+            self._segments[start] = SegmentInfo(
+                path, start, float(header["min_ts"]), float(header["max_ts"])
+            )
+
+    def refresh(self) -> None:
+        """Pick up segments created or extended by the writing process"""
+        with self._lock:
+            recent = sorted(self._segments)[-2:]
+        for path in sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}")):
+            start = segment_start(path)
+            if start is None or (start in self._segments and start not in recent):
+                continue
+            header = read_header(path)
+            if header is not None:
+                with self._lock:
+                    self._segments[start] = SegmentInfo(
+                        path, start, float(header["min_ts"]), float(header["max_ts"])
+                    )
+        self._refreshed = time.monotonic()
+
+    def start(self) -> None:
+        """Start the background writer thread"""
+        if self._writer and self._writer.is_alive():
+            return
+        self._stopping.clear()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="segment-writer", daemon=True
+        )
+        self._writer.start()
+
+    def close(self) -> None:
+        """Flush pending readings, stop the writer thread and unmap segments"""
+        if self._writer:
+            self.flush()
+            self._stopping.set()
+            self._writer.join()
+            self._writer = None
+        self.reader.close()
+
+    def flush(self) -> None:
+        """Block until every queued reading has been written"""
+        if self._writer and self._writer.is_alive():
+            self._queue.join()
+
+    def append(self, data_point: dict) -> bool:
+        """
+        Queue a processed reading for writing without blocking
+
+        Returns:
+            False if the reading was dropped because the queue is full (or
+            the store is read-only)
+        """
+        if self.read_only:
+            return False
+        if self._writer is None:
+            self.start()
+        try:
+            self._queue.put_nowait(data_point)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _write_loop(self) -> None:
+        """Writer thread: drain the queue in batches and write them"""
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < 1024:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write(to_records(batch))
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} readings: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def write(self, records: np.ndarray) -> None:
+        """Synchronously append records, rotating segments by time"""
+        if not len(records):
+            return
+        starts = (records["python_timestamp"] // self.segment_seconds).astype(
+            np.int64
+        ) * self.segment_seconds
+        for start in np.unique(starts):
+            self._write_segment(int(start), records[starts == start])
+
+    def _write_segment(self, start: int, records: np.ndarray) -> None:
+        timestamps = records["python_timestamp"]
+        with self._lock:
+            info = self._segments.get(start)
+            if info is None:
+                path = self.directory / f"{start:010d}{SEGMENT_SUFFIX}"
+                info = SegmentInfo(
+                    path, start, float(timestamps.min()), float(timestamps.max())
+                )
+                mode = "w+b"
+            else:
+                info.min_ts = min(info.min_ts, float(timestamps.min()))
+                info.max_ts = max(info.max_ts, float(timestamps.max()))
+                mode = "r+b"
+
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = SEGMENT_MAGIC
+            header["version"] = SEGMENT_VERSION
+            header["record_size"] = RECORD_DTYPE.itemsize
+            header["min_ts"] = info.min_ts
+            header["max_ts"] = info.max_ts
+
+            with open(info.path, mode) as f:
+                f.seek(0, 2)
+                size = max(f.tell(), HEADER_SIZE)
+                torn = (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+                if torn:
+                    # Drop a torn trailing record left by an interrupted write
+                    size -= torn
+                    f.truncate(size)
+                f.seek(size)
+                f.write(records.tobytes())
+                f.seek(0)
+                f.write(header.tobytes())
+            self._segments[start] = info
+
+    def segments(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> list[SegmentInfo]:
+        """Segments that may hold records in ``[start, end)``, oldest first"""
+        if (
+            self.read_only
+            and time.monotonic() - self._refreshed >= self.refresh_interval
+        ):
+            self.refresh()
+        with self._lock:
+            infos = sorted(self._segments.values(), key=lambda info: info.start)
+        return [info for info in infos if info.overlaps(start, end)]
+
+    def query(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Read stored records in a time range
+
+        Args:
+            start: Inclusive lower bound on python_timestamp (None for all)
+            end: Exclusive upper bound on python_timestamp (None for all)
+
+        Returns:
+            Structured array with RECORD_DTYPE, oldest first
+        """
+        return self.reader.read_range(start, end, copy=True)
+
+    def tail(self, count: int) -> np.ndarray:
+        """Read the most recent ``count`` stored records"""
+        parts: list[np.ndarray] = []
+        remaining = count
+        for info in reversed(self.segments()):
+            if remaining <= 0:
+                break
+            records = read_segment(info.path)[-remaining:]
+            parts.insert(0, records)
+            remaining -= len(records)
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.concatenate(parts)
+
+
+class SegmentReader:
+    """
+    Zero-copy range reads over segment files
+
+    Segments are memory-mapped (remapped when they grow) and the
+    ``python_timestamp`` column is binary-searched, so a ``[start, end)``
+    range comes back as NumPy views into the page cache instead of Python
+    objects; callers copy once, when they concatenate the parts. Records
+    within a segment must be in timestamp order, which holds for the
+    append-only writer.
+
+    Only the ``max_maps`` most recently used maps are cached. Before Python
+    3.13 each map holds a file descriptor until it is dropped from the cache
+    and the last view into it is gone, so a range read holds one descriptor
+    per segment while its views are alive. An evicted map is not closed
+    explicitly, since views handed out earlier may still use it.
+    """
+
+    def __init__(self, store: SegmentStore, max_maps: int = MAX_MAPPED_SEGMENTS):
+        self.store = store
+        self.max_maps = max_maps
+        self._lock = threading.Lock()
+        self._maps: OrderedDict[Path, np.ndarray] = OrderedDict()
+
+    def _map(self, path: Path) -> np.ndarray:
+        """Memory-map every complete record of a segment"""
+        count = (path.stat().st_size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count <= 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        with self._lock:
+            mapped = self._maps.get(path)
+            if mapped is None or len(mapped) != count:
+                mapped = map_segment(path, count)
+                self._maps[path] = mapped
+            self._maps.move_to_end(path)
+            while len(self._maps) > self.max_maps:
+                self._maps.popitem(last=False)
+        return mapped
+
+    def close(self) -> None:
+        """Drop every cached map (views still in use keep theirs open)"""
+        with self._lock:
+            self._maps.clear()
+
+    def iter_range(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Iterator[np.ndarray]:
+        """
+        Yield per-segment record views for a time range
+
+        Args:
+            start: Inclusive lower bound on python_timestamp (None for all)
+            end: Exclusive upper bound on python_timestamp (None for all)
+
+        Yields:
+            Read-only structured views with RECORD_DTYPE, oldest first
+        """
+        for info in self.store.segments(start, end):
+            records = self._map(info.path)
+            timestamps = records["python_timestamp"]
+            lo = 0 if start is None else int(np.searchsorted(timestamps, start))
+            hi = len(records) if end is None else int(np.searchsorted(timestamps, end))
+            if hi > lo:
+                yield records[lo:hi]
+
+    def read_range(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        copy: bool = False,
+    ) -> np.ndarray:
+        """
+        Records in a time range as one array
+
+        A range cut from a single segment is returned as a view unless
+        ``copy`` is set; ranges spanning segments are concatenated into a new
+        array.
+        """
+        parts = list(self.iter_range(start, end))
+        if not parts:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        if len(parts) == 1:
+            return np.array(parts[0]) if copy else parts[0]
+        return np.concatenate(parts)
+
+    def read_columns(
+        self,
+        fields: Iterable[str],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> dict[str, np.ndarray]:
+        """Column arrays for a time range (views when it fits one segment)"""
+        parts = list(self.iter_range(start, end))
+        if len(parts) == 1:
+            return {field: parts[0][field] for field in fields}
+        return {
+            field: np.concatenate([part[field] for part in parts])
+            if parts
+            else np.empty(0, RECORD_DTYPE[field])
+            for field in fields
+        }
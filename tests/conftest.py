@@ -0,0 +1,10 @@
+"""Shared pytest setup: make the dashboard's packages importable"""
+
+import sys
+from pathlib import Path
+
+PYTHON_DIR = Path(__file__).resolve().parents[1] / "src" / "python"
+
+for path in (PYTHON_DIR, PYTHON_DIR / "dashboard"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
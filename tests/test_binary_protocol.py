@@ -0,0 +1,125 @@
+"""Binary frame encoding, CRC checks and protocol auto-detection"""
+
+import json
+
+import numpy as np
+from utils.binary_protocol import (
+    FLAG_READ_ERROR,
+    FRAME_SIZE,
+    FrameDecoder,
+    crc16_ccitt,
+    crc16_ccitt_rows,
+    decode_frames,
+    encode_frame,
+    frames_to_records,
+)
+from utils.data_processor import calculate_heat_index, process_sensor_data
+from utils.serial_reader import StreamDecoder
+
+BANNER = b"DHT22 Sensor Ready\r\n"
+
+
+def test_crc_check_value() -> None:
+    """The standard CRC-16/CCITT-FALSE check value, scalar and per row"""
+    assert crc16_ccitt(b"123456789") == 0x29B1
+    rows = np.frombuffer(b"123456789" * 3, dtype=np.uint8).reshape(3, -1)
+    assert crc16_ccitt_rows(rows).tolist() == [0x29B1] * 3
+
+
+def test_round_trip() -> None:
+    """Encoded frames decode to the same fields, in stream order"""
+    readings = [(0, 1000, 23.45, 51.2, 0), (1, 3000, -5.5, 99.99, 3)]
+    data = b"".join(
+        encode_frame(seq, millis, temp, hum, sensor_id=sensor_id)
+        for seq, millis, temp, hum, sensor_id in readings
+    )
+    assert len(data) == 2 * FRAME_SIZE
+
+    frames, consumed = decode_frames(data)
+    assert consumed == len(data)
+    assert frames["seq"].tolist() == [0, 1]
+    assert frames["millis"].tolist() == [1000, 3000]
+    assert frames["temperature"].tolist() == [2345, -550]
+    assert frames["humidity"].tolist() == [5120, 9999]
+    assert frames["sensor_id"].tolist() == [0, 3]
+
+    records = frames_to_records(frames, now=100.0)
+    assert [r["temperature"] for r in records] == [23.45, -5.5]
+    assert [r["humidity"] for r in records] == [51.2, 99.99]
+    assert [r["sensor"] for r in records] == ["DHT22", "DHT22_3"]
+    assert [r["python_timestamp"] for r in records] == [98.0, 100.0]
+
+
+def test_corrupted_crc_dropped() -> None:
+    """A frame with a bad CRC is skipped without losing its neighbours"""
+    good = encode_frame(1, 1000, 21.0, 40.0)
+    bad = bytearray(encode_frame(2, 2000, 22.0, 41.0))
+    bad[8] ^= 0x01  # Flip a temperature bit
+    frames, _ = decode_frames(good + bytes(bad) + encode_frame(3, 3000, 23.0, 42.0))
+    assert frames["seq"].tolist() == [1, 3]
+
+
+def test_partial_frame_kept() -> None:
+    """A frame split across chunks is decoded once complete"""
+    decoder = FrameDecoder()
+    data = b"\x00\x13" + encode_frame(7, 500, 20.0, 30.0)
+    assert not len(decoder.feed(data[:9]))
+    frames = decoder.feed(data[9:])
+    assert frames["seq"].tolist() == [7]
+    assert decoder.discarded == 2
+
+
+def test_read_errors_skipped() -> None:
+    """Frames flagged as sensor read errors produce no record"""
+    data = encode_frame(1, 1000, 0, 0, flags=FLAG_READ_ERROR) + encode_frame(
+        2, 3000, 24.0, 50.0
+    )
+    records = frames_to_records(decode_frames(data)[0], now=10.0)
+    assert [r["seq"] for r in records] == [2]
+
+
+def test_binary_reading_gets_heat_index() -> None:
+    """Binary frames carry no heat index, so processing computes it"""
+    data = encode_frame(1, 1000, 31.5, 70.0) + encode_frame(2, 3000, 20.0, 50.0)
+    for record in frames_to_records(decode_frames(data)[0]):
+        assert "heat_index" not in record
+        processed = process_sensor_data(record)
+        assert processed["heat_index"] == calculate_heat_index(
+            record["temperature"], record["humidity"]
+        )
+
+    # A sensor-supplied value is kept
+    reading = {"temperature": 31.5, "humidity": 70.0, "heat_index": 40.0}
+    assert process_sensor_data(reading)["heat_index"] == 40.0
+
+
+def test_detects_binary_after_banner_and_garbage() -> None:
+    """The banner and noise before the first frame do not hide it"""
+    decoder = StreamDecoder()
+    stream = (
+        BANNER
+        + b"\x01\xaa\x13"
+        + encode_frame(1, 1000, 22.0, 45.0)
+        + b"\xaa\x55\xff"
+        + encode_frame(2, 3000, 22.5, 46.0)
+    )
+    records = []
+    for offset in range(0, len(stream), 5):  # Arrives in small chunks
+        records += decoder.feed(stream[offset : offset + 5])
+    assert decoder.protocol == "binary"
+    assert [r["seq"] for r in records] == [1, 2]
+    assert [r["temperature"] for r in records] == [22.0, 22.5]
+
+
+def test_detects_json_after_banner_and_garbage() -> None:
+    """JSON is detected from its first record; noise before a record is cut"""
+    decoder = StreamDecoder()
+    first = json.dumps({"temperature": 22.0, "humidity": 45.0}).encode()
+    second = json.dumps({"temperature": 22.5, "humidity": 46.0}).encode()
+    records = decoder.feed(BANNER + b"\x00\xff\n")
+    assert records == [] and decoder.protocol is None
+
+    records = decoder.feed(b"\x13" + first + b"\r\n" + second + b"\n")
+    assert decoder.protocol == "json"
+    assert [r["temperature"] for r in records] == [22.0, 22.5]
+    assert decoder.skipped == 2  # Banner and the noise line
@@ -0,0 +1,132 @@
+"""LTTB selection and rollup tiers against direct numpy reductions"""
+
+import numpy as np
+import pytest
+from utils.downsample import RollupPyramid, RollupTier, lttb_indices
+
+BUCKET = 60
+FIELDS = ("temperature", "humidity")
+
+
+def sample_columns(count: int = 5000, seed: int = 3) -> dict[str, np.ndarray]:
+    """Irregular readings over ~3 hours with NaN gaps"""
+    rng = np.random.default_rng(seed)
+    timestamps = 1_700_000_000 + np.cumsum(rng.uniform(0.5, 3.5, count))
+    columns = {
+        "python_timestamp": timestamps,
+        "temperature": 20 + 5 * np.sin(timestamps / 900) + rng.standard_normal(count),
+        "humidity": 50 + 10 * rng.random(count),
+    }
+    for field in FIELDS:
+        columns[field][rng.choice(count, count // 20, replace=False)] = np.nan
+    return columns
+
+
+def grouped(columns: dict[str, np.ndarray], field: str) -> dict[str, np.ndarray]:
+    """Per-bucket min/max/mean/count computed directly with numpy"""
+    buckets = columns["python_timestamp"] // BUCKET
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    values = columns[field]
+    result = {"time": keys * BUCKET, "min": [], "max": [], "mean": [], "count": []}
+    for k in range(len(keys)):
+        group = values[inverse == k]
+        group = group[~np.isnan(group)]
+        result["count"].append(len(group))
+        result["min"].append(group.min() if len(group) else np.nan)
+        result["max"].append(group.max() if len(group) else np.nan)
+        result["mean"].append(group.mean() if len(group) else np.nan)
+    return {name: np.asarray(values) for name, values in result.items()}
+
+
+def assert_tier_matches(tier: RollupTier, columns: dict[str, np.ndarray]) -> None:
+    buckets = tier.get_range()
+    for field in FIELDS:
+        expected = grouped(columns, field)
+        np.testing.assert_array_equal(buckets["time"], expected["time"])
+        np.testing.assert_array_equal(buckets[f"{field}_count"], expected["count"])
+        for name in ("min", "max", "mean"):
+            np.testing.assert_allclose(
+                buckets[f"{field}_{name}"], expected[name], rtol=1e-12, equal_nan=True
+            )
+
+
+def test_lttb_keeps_endpoints_and_threshold() -> None:
+    columns = sample_columns()
+    x, y = columns["python_timestamp"], columns["temperature"]
+    for threshold in (3, 10, 500, 1500):
+        indices = lttb_indices(x, y, threshold)
+        assert len(indices) == threshold
+        assert indices[0] == 0 and indices[-1] == len(x) - 1
+        assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_returns_small_inputs_unchanged() -> None:
+    x = np.arange(10.0)
+    np.testing.assert_array_equal(lttb_indices(x, x, 10), np.arange(10))
+    np.testing.assert_array_equal(lttb_indices(x, x, 50), np.arange(10))
+
+
+def test_lttb_keeps_spike() -> None:
+    x = np.arange(1000.0)
+    y = np.zeros(1000)
+    y[437] = 100.0
+    assert 437 in lttb_indices(x, y, 50)
+
+
+def test_tier_add_matches_groupby() -> None:
+    columns = sample_columns()
+    tier = RollupTier(BUCKET, capacity=1000, fields=FIELDS)
+    for i, timestamp in enumerate(columns["python_timestamp"]):
+        tier.add(timestamp, {field: columns[field][i] for field in FIELDS})
+    assert_tier_matches(tier, columns)
+
+
+@pytest.mark.parametrize("split", [0, 1, 2500, 4999])
+def test_tier_extend_matches_groupby(split: int) -> None:
+    """Extending in two calls, splitting a bucket, equals one reduction"""
+    columns = sample_columns()
+    tier = RollupTier(BUCKET, capacity=1000, fields=FIELDS)
+    timestamps = columns["python_timestamp"]
+    for part in (slice(0, split), slice(split, None)):
+        tier.extend(timestamps[part], {f: columns[f][part] for f in FIELDS})
+    assert_tier_matches(tier, columns)
+
+
+def test_tier_merge_combines_partials() -> None:
+    tier = RollupTier(BUCKET, capacity=10, fields=("temperature",))
+    tier.merge(5, {"temperature": (1.0, 4.0, 10.0, 4)})
+    tier.merge(5, {"temperature": (0.5, 3.0, 5.0, 2)})
+    tier.merge(4, {"temperature": (-9.0, 9.0, 0.0, 1)})  # Older bucket: ignored
+    buckets = tier.get_range()
+    assert buckets["time"].tolist() == [5 * BUCKET]
+    assert buckets["temperature_min"][0] == 0.5
+    assert buckets["temperature_max"][0] == 4.0
+    assert buckets["temperature_mean"][0] == pytest.approx(2.5)
+    assert buckets["temperature_count"][0] == 6
+
+
+def test_tier_keeps_newest_capacity_buckets() -> None:
+    columns = sample_columns()
+    tier = RollupTier(BUCKET, capacity=50, fields=FIELDS)
+    tier.extend(columns["python_timestamp"], columns)
+    expected = grouped(columns, "temperature")
+    buckets = tier.get_range()
+    assert len(tier) == 50
+    np.testing.assert_array_equal(buckets["time"], expected["time"][-50:])
+    np.testing.assert_array_equal(buckets["temperature_count"], expected["count"][-50:])
+
+
+@pytest.mark.parametrize(
+    "span, bucket_seconds",
+    [(3600, 10), (24 * 3600, 60), (7 * 24 * 3600, 600)],
+)
+def test_pyramid_selects_tier(span: int, bucket_seconds: int) -> None:
+    """1h/1d/1w windows at the dashboard's 6000-bucket budget"""
+    pyramid = RollupPyramid(max_buckets=6000)
+    end = 1_700_000_000.0
+    assert pyramid.select(end - span, end, 6000).bucket_seconds == bucket_seconds
+
+
+def test_pyramid_falls_back_to_coarsest_tier() -> None:
+    pyramid = RollupPyramid(max_buckets=100)
+    assert pyramid.select(0, 365 * 24 * 3600, 6000).bucket_seconds == 3600
@@ -0,0 +1,59 @@
+"""Import-time budget and lazy imports of the dashboard's entry points"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_spec = importlib.util.spec_from_file_location(
+    "check_import_time", ROOT / "tools" / "check_import_time.py"
+)
+check_import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check_import_time)
+
+COLLECTOR_PROBE = """
+import json, sys
+sys.path[:0] = [{python_dir!r}, {dashboard_dir!r}]
+import app
+runtime = app.DashboardRuntime(app.load_config())
+runtime.start()
+runtime.stop()
+print(json.dumps(sorted(name.split(".")[0] for name in sys.modules)))
+"""
+
+
+@pytest.mark.parametrize("module", sorted(check_import_time.TARGETS))
+def test_import_within_budget(module: str) -> None:
+    """Each entry point imports within budget and without heavy packages"""
+    _, failures = check_import_time.check(module)
+    assert not failures
+
+
+def test_collector_never_imports_dash(tmp_path: Path) -> None:
+    """A running collector (simulator source) loads no web/plotting stack"""
+    env = {
+        **os.environ,
+        "DASHBOARD_ROLE": "collector",
+        "SHARED_MEMORY_NAME": f"dht22_test_{os.getpid()}",
+        "DATA_DIR": str(tmp_path),
+    }
+    probe = COLLECTOR_PROBE.format(
+        python_dir=str(check_import_time.PYTHON_DIR),
+        dashboard_dir=str(check_import_time.PYTHON_DIR / "dashboard"),
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=60,
+        check=True,
+    )
+    loaded = set(json.loads(result.stdout.splitlines()[-1]))
+    assert not loaded.intersection({"dash", "flask", "plotly"})
@@ -0,0 +1,171 @@
+"""BoundedQueue backpressure policies and Pipeline delivery counters"""
+
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from utils.pipeline import (
+    POLICY_BLOCK,
+    POLICY_DROP_OLDEST,
+    POLICY_SAMPLE,
+    BoundedQueue,
+    Pipeline,
+)
+from utils.storage import SegmentStore
+
+
+def test_drop_oldest_keeps_newest() -> None:
+    """A full queue discards its oldest items and counts them"""
+    queue = BoundedQueue(maxsize=5, policy=POLICY_DROP_OLDEST)
+    queue.put_many(range(3))
+    queue.put_many(range(3, 12))
+    assert queue.get_batch(100) == [7, 8, 9, 10, 11]
+    stats = queue.metrics()
+    assert stats["dropped"] == 7
+    assert stats["max_depth"] == 5
+    assert stats["depth"] == 0
+
+
+def test_block_applies_backpressure() -> None:
+    """A producer into a full queue waits until a consumer makes room"""
+    queue = BoundedQueue(maxsize=3, policy=POLICY_BLOCK)
+    queue.put_many(range(3))
+    producer = threading.Thread(target=queue.put_many, args=([3, 4],), daemon=True)
+    producer.start()
+
+    producer.join(timeout=0.2)
+    assert producer.is_alive()
+    assert len(queue) == 3
+
+    assert queue.get_batch(2) == [0, 1]
+    producer.join(timeout=2.0)
+    assert not producer.is_alive()
+    assert queue.get_batch(10) == [2, 3, 4]
+    assert queue.metrics()["dropped"] == 0
+
+
+def test_block_released_by_close() -> None:
+    """Closing wakes a blocked producer without enqueuing its items"""
+    queue = BoundedQueue(maxsize=1, policy=POLICY_BLOCK)
+    queue.put_many([0])
+    producer = threading.Thread(target=queue.put_many, args=([1],), daemon=True)
+    producer.start()
+    producer.join(timeout=0.1)
+    queue.close()
+    producer.join(timeout=2.0)
+    assert not producer.is_alive()
+    assert queue.get_batch(10) == [0]
+
+
+def test_sample_keeps_one_in_n() -> None:
+    """Above half full only every sample_every-th item is admitted"""
+    queue = BoundedQueue(maxsize=100, policy=POLICY_SAMPLE, sample_every=4)
+    queue.put_many(range(50))  # Fills the queue to half
+    queue.put_many(range(50, 90))
+    kept = queue.get_batch(1000)
+    assert kept[:50] == list(range(50))
+    assert kept[50:] == [i for i in range(50, 90) if (i + 1) % 4 == 0]
+    assert queue.metrics()["sampled"] == 30
+    assert queue.metrics()["dropped"] == 0
+
+
+def test_sample_drops_when_full() -> None:
+    """Admitted samples that no longer fit are dropped"""
+    queue = BoundedQueue(maxsize=4, policy=POLICY_SAMPLE, sample_every=1)
+    queue.put_many(range(10))
+    assert queue.get_batch(10) == [0, 1, 2, 3]
+    assert queue.metrics()["dropped"] == 6
+
+
+def test_get_batch_timeout() -> None:
+    """An empty queue returns an empty batch after the timeout"""
+    assert BoundedQueue().get_batch(10, timeout=0.01) == []
+
+
+def test_unknown_policy_rejected() -> None:
+    """Only the known policies are accepted"""
+    with pytest.raises(ValueError):
+        BoundedQueue(policy="lifo")
+
+
+def test_pipeline_counters_match() -> None:
+    """Every submitted reading is counted once as delivered, failed or dropped"""
+    delivered = []
+
+    def process(records: list[dict]) -> list[dict]:
+        return [record for record in records if record["value"] % 10]
+
+    pipeline = Pipeline([delivered.extend], process=process, workers=3, batch_size=16)
+    pipeline.start()
+    for start in range(0, 1000, 25):
+        pipeline.submit([{"value": i} for i in range(start, start + 25)])
+    pipeline.stop()
+
+    stats = pipeline.metrics()
+    counters = stats["counters"]
+    assert counters["submitted"] == 1000
+    assert counters["processed"] == counters["delivered"] == len(delivered) == 900
+    assert counters["failed"] == 100
+    assert stats["stages"]["ingest"]["dropped"] == 0
+    assert stats["stages"]["ingest"]["depth"] == 0
+    assert stats["sink_errors"] == {}
+    assert sorted(record["value"] for record in delivered) == [
+        i for i in range(1000) if i % 10
+    ]
+
+
+def test_pipeline_sink_errors_counted() -> None:
+    """A failing sink is counted and does not stop the others"""
+    delivered = []
+
+    def broken(records: list[dict]) -> None:
+        raise RuntimeError("down")
+
+    pipeline = Pipeline([broken, delivered.extend], process=list)
+    pipeline.start()
+    pipeline.submit([{"value": i} for i in range(10)])
+    pipeline.stop()
+
+    stats = pipeline.metrics()
+    assert len(delivered) == stats["counters"]["delivered"] == 10
+    assert stats["sink_errors"]["broken"] >= 1
+
+
+def test_pipeline_delivers_in_order_with_workers(tmp_path: Path) -> None:
+    """Batches finished out of order by several workers are stored in order"""
+    t0 = 1_700_000_000.0
+    points = [
+        {"python_timestamp": t0 + i, "temperature": 20.0 + i % 7, "humidity": 50.0}
+        for i in range(400)
+    ]
+
+    def slow_process(records: list[dict]) -> list[dict]:
+        if records[0]["python_timestamp"] % 40 < 8:  # Every fifth batch lags
+            time.sleep(0.02)
+        return records
+
+    store = SegmentStore(str(tmp_path), segment_seconds=60)
+    pipeline = Pipeline(
+        [lambda batch: [store.append(point) for point in batch]],
+        process=slow_process,
+        workers=4,
+        batch_size=8,
+    )
+    pipeline.submit(points)  # Queued up front so all workers get batches
+    pipeline.start()
+    pipeline.stop()
+    store.flush()
+
+    try:
+        assert pipeline.metrics()["max_reorder"] > 0
+        parts = list(store.reader.iter_range(t0 + 50.5, t0 + 350))
+        assert len(parts) > 1  # The range spans several segments
+        timestamps = np.concatenate([part["python_timestamp"] for part in parts])
+        np.testing.assert_array_equal(timestamps, t0 + np.arange(51, 350))
+        records = np.concatenate(list(store.reader.iter_range()))
+        assert len(records) == len(points)
+        assert np.all(np.diff(records["python_timestamp"]) > 0)
+    finally:
+        store.close()
@@ -0,0 +1,193 @@
+"""History queries: pagination, bucket percentiles, parsing and /api/query"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from utils.data_processor import DataBuffer
+from utils.query import bucket_percentile, parse_duration, parse_time, query
+from utils.storage import SegmentStore, to_records
+
+T0 = 1_700_000_000.0
+COUNT = 500
+
+
+def make_points(count: int = COUNT) -> list[dict]:
+    """Readings in pairs sharing a timestamp, spread over several segments"""
+    return [
+        {
+            "python_timestamp": T0 + (i // 2) * 1.5,
+            "temperature": float(i),
+            "humidity": 50.0 + i % 13,
+        }
+        for i in range(count)
+    ]
+
+
+def write_history(directory: Path, points: list[dict]) -> None:
+    store = SegmentStore(str(directory), segment_seconds=60)
+    store.write(to_records(points))
+    store.close()
+
+
+@pytest.fixture
+def buffer(tmp_path: Path):
+    write_history(tmp_path, make_points())
+    store = SegmentStore(str(tmp_path), segment_seconds=60)
+    yield DataBuffer(max_size=50, store=store)
+    store.close()
+
+
+def read_pages(buffer: DataBuffer, limit: int, **options) -> list[dict]:
+    pages = []
+    cursor = None
+    while True:
+        page = query(buffer, limit=limit, cursor=cursor, **options)
+        pages.append(page["columns"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 7, 64, COUNT, 2 * COUNT])
+def test_raw_pages_cover_everything_once(buffer: DataBuffer, limit: int) -> None:
+    """Raw pages add up to the whole range without repeats at page edges"""
+    pages = read_pages(buffer, limit, bucket=None, fields=["temperature"])
+    # A run of equal timestamps (here 2) is never split, even past the limit
+    assert all(len(page["time"]) <= max(limit, 2) for page in pages)
+    assert all(len(page["time"]) for page in pages[:-1])
+    temperature = np.concatenate([page["temperature"] for page in pages])
+    np.testing.assert_array_equal(temperature, np.arange(COUNT))
+    times = np.concatenate([page["time"] for page in pages])
+    np.testing.assert_array_equal(times, T0 + np.arange(COUNT) // 2 * 1.5)
+
+
+@pytest.mark.parametrize("agg", ["mean", "min", "max", "p95"])
+def test_bucket_pages_match_single_query(buffer: DataBuffer, agg: str) -> None:
+    """Paging buckets returns the same buckets as one unlimited query"""
+    options = {"bucket": "10s", "agg": agg, "fields": ["temperature", "humidity"]}
+    whole = query(buffer, **options)["columns"]
+    pages = read_pages(buffer, 9, **options)
+    assert sum(len(page["time"]) for page in pages) == len(whole["time"])
+    for name, values in whole.items():
+        np.testing.assert_array_equal(
+            np.concatenate([page[name] for page in pages]), values
+        )
+    assert whole["count"].sum() == COUNT
+
+
+def test_query_range_bounds(buffer: DataBuffer) -> None:
+    """start is inclusive, end exclusive"""
+    result = query(buffer, start=T0 + 3.0, end=T0 + 9.0, bucket=None)
+    np.testing.assert_array_equal(
+        result["columns"]["time"],
+        T0 + np.array([3.0, 3.0, 4.5, 4.5, 6.0, 6.0, 7.5, 7.5]),
+    )
+
+
+def expected_percentiles(values: np.ndarray, starts: np.ndarray, q: float) -> list:
+    bounds = np.append(starts, len(values))
+    expected = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        bucket = values[lo:hi]
+        bucket = bucket[~np.isnan(bucket)]
+        expected.append(np.percentile(bucket, q) if len(bucket) else np.nan)
+    return expected
+
+
+@pytest.mark.parametrize("q", [0.0, 50.0, 95.0, 100.0])
+def test_bucket_percentile_matches_numpy(q: float) -> None:
+    """Grid path: similar bucket sizes, with NaNs and an all-NaN bucket"""
+    rng = np.random.default_rng(3)
+    sizes = rng.integers(1, 40, 50)
+    values = rng.normal(20, 5, sizes.sum())
+    values[rng.choice(len(values), 60, replace=False)] = np.nan
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    values[starts[7] : starts[8]] = np.nan
+    np.testing.assert_allclose(
+        bucket_percentile(values, starts, q), expected_percentiles(values, starts, q)
+    )
+
+
+@pytest.mark.parametrize("q", [5.0, 95.0])
+def test_bucket_percentile_uneven_buckets(q: float) -> None:
+    """Sort path: one huge bucket among many single-value ones"""
+    rng = np.random.default_rng(4)
+    sizes = np.array([1] * 30 + [5000] + [1, 2] * 20)
+    values = rng.normal(-3, 50, sizes.sum())
+    values[rng.choice(len(values), 100, replace=False)] = np.nan
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    np.testing.assert_allclose(
+        bucket_percentile(values, starts, q), expected_percentiles(values, starts, q)
+    )
+
+
+def test_parse_duration() -> None:
+    assert parse_duration("30s") == 30
+    assert parse_duration("1m") == 60
+    assert parse_duration("1.5h") == 5400
+    assert parse_duration(" 2d ") == 2 * 86400
+    assert parse_duration("45") == 45
+    assert parse_duration(0.5) == 0.5
+    for value in (None, "", "raw"):
+        assert parse_duration(value) is None
+    for value in ("abc", "-1m", "0", "0s", 0, -5, "1y", "1 m s", "nan"):
+        with pytest.raises(ValueError):
+            parse_duration(value)
+
+
+def test_parse_time() -> None:
+    assert parse_time("1700000000.5") == 1_700_000_000.5
+    assert parse_time("2023-11-14T22:13:20+00:00") == 1_700_000_000.0
+    assert parse_time(None) is None
+    assert parse_time("") is None
+    for value in ("nan", "inf", "-inf", "yesterday", "2023-13-01"):
+        with pytest.raises(ValueError):
+            parse_time(value)
+
+
+def test_query_rejects_bad_options(buffer: DataBuffer) -> None:
+    for options in (
+        {"fields": ["pressure"]},
+        {"fields": []},
+        {"agg": "median"},
+        {"limit": 0},
+        {"cursor": "nan"},
+        {"cursor": "abc"},
+    ):
+        with pytest.raises(ValueError):
+            query(buffer, **options)
+
+
+@pytest.fixture
+def client(tmp_path: Path):
+    from dashboard.app import create_app
+    from dashboard.runtime import load_config
+
+    write_history(tmp_path / "DHT22", make_points())
+    config = load_config()
+    config["server"]["role"] = "standalone"
+    config["storage"]["data_dir"] = str(tmp_path)
+    app = create_app(config, start=False)
+    yield app.server.test_client()
+    app.runtime.registry.close()
+
+
+def test_api_query(client) -> None:
+    """Streamed JSON pages; 404 for unknown sensors, 400 for bad parameters"""
+    response = client.get("/api/query?sensor=DHT22&bucket=raw&limit=300")
+    assert response.status_code == 200
+    result = json.loads(response.data)
+    assert result["sensor"] == "DHT22"
+    assert len(result["columns"]["time"]) == 300
+    response = client.get(
+        f"/api/query?sensor=DHT22&bucket=raw&cursor={result['next_cursor']}"
+    )
+    assert len(json.loads(response.data)["columns"]["time"]) == COUNT - 300
+
+    assert client.get("/api/query?sensor=nope").status_code == 404
+    for params in ("start=nan", "end=inf", "start=soon", "cursor=nan", "agg=median"):
+        response = client.get(f"/api/query?sensor=DHT22&{params}")
+        assert response.status_code == 400, params
+        assert "error" in response.get_json()
@@ -0,0 +1,85 @@
+"""SlidingWindowStats and DataBuffer.get_stats against pandas rolling windows"""
+
+import math
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.data_processor import DataBuffer
+from utils.running_stats import SlidingWindowStats
+
+WINDOW = 20
+
+
+def sample_stream(length: int = 300, seed: int = 7) -> list[Optional[float]]:
+    """Temperatures with NaN and None gaps, including an all-missing stretch"""
+    rng = np.random.default_rng(seed)
+    values: list[Optional[float]] = list(20 + 5 * rng.standard_normal(length))
+    for i in rng.choice(length, length // 6, replace=False):
+        values[i] = None if i % 2 else math.nan
+    for i in range(100, 100 + WINDOW + 5):
+        values[i] = None
+    return values
+
+
+def rolling_expected(values: list[Optional[float]]) -> pd.DataFrame:
+    """pandas rolling min/max/mean/std(ddof=1)/count after every sample"""
+    rolling = pd.Series(values, dtype=float).rolling(WINDOW, min_periods=1)
+    return pd.DataFrame(
+        {
+            "min": rolling.min(),
+            "max": rolling.max(),
+            "mean": rolling.mean(),
+            "std": rolling.std(ddof=1),
+            "count": rolling.count(),
+        }
+    )
+
+
+def assert_matches(actual: dict, expected: pd.Series) -> None:
+    for name in ("min", "max", "mean", "std"):
+        assert actual[name] == pytest.approx(
+            expected[name], rel=1e-9, abs=1e-9, nan_ok=True
+        ), name
+    assert actual["count"] == expected["count"]
+
+
+def test_sliding_window_stats_match_pandas() -> None:
+    """Every push, with evictions and missing samples, matches pandas"""
+    values = sample_stream()
+    expected = rolling_expected(values)
+    stats = SlidingWindowStats(WINDOW)
+    samples = [math.nan if value is None else value for value in values]
+
+    for i, value in enumerate(samples):
+        evicted = samples[i - WINDOW] if i >= WINDOW else None
+        stats.push(value, evicted)
+        assert_matches(stats.as_dict(), expected.iloc[i])
+
+
+def test_data_buffer_stats_match_pandas() -> None:
+    """get_stats after every add matches pandas over the buffered window"""
+    values = sample_stream()
+    expected = rolling_expected(values)
+    buffer = DataBuffer(max_size=WINDOW)
+
+    for i, value in enumerate(values):
+        buffer.add({"temperature": value, "python_timestamp": float(i)})
+        stats = buffer.get_stats()
+        if expected.iloc[i]["count"] == 0:
+            assert "temperature" not in stats
+            continue
+        assert_matches(stats["temperature"], expected.iloc[i])
+        assert stats["temperature"]["current"] == pytest.approx(
+            math.nan if value is None else value, nan_ok=True
+        )
+
+
+def test_clear_resets_stats() -> None:
+    stats = SlidingWindowStats(3)
+    for value in (1.0, 2.0, 3.0):
+        stats.push(value)
+    stats.clear()
+    assert stats.count == 0
+    assert math.isnan(stats.mean) and math.isnan(stats.min)
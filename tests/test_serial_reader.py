@@ -0,0 +1,52 @@
+"""Line framing and JSON resynchronisation of the serial stream"""
+
+import json
+import logging
+
+import pytest
+from utils.serial_reader import LineFramer, StreamDecoder
+
+
+def test_lines_split_across_chunks() -> None:
+    """Partial lines are kept until their newline arrives; blanks are dropped"""
+    framer = LineFramer()
+    assert framer.feed(b'{"a": 1}\r\n{"b"') == [b'{"a": 1}']
+    assert framer.feed(b": 2}\n\r\n") == [b'{"b": 2}']
+    assert framer.feed(b"") == []
+
+
+def test_resync_after_overlong_line(caplog: pytest.LogCaptureFixture) -> None:
+    """A line growing past max_line is dropped and the next one still parses"""
+    framer = LineFramer(max_line=16)
+    with caplog.at_level(logging.WARNING):
+        assert framer.feed(b"x" * 40) == []
+    assert "Discarding 40 bytes" in caplog.text
+    # The rest of the runaway line ends at the next newline
+    assert framer.feed(b"xxxx\n{}\n") == [b"xxxx", b"{}"]
+    assert framer.feed(b'{"ok": 1}\n') == [b'{"ok": 1}']
+
+
+def test_resync_after_invalid_line() -> None:
+    """Invalid and truncated JSON lines are counted, later records survive"""
+    decoder = StreamDecoder(protocol="json")
+    good = json.dumps({"temperature": 21.5, "humidity": 40.0}).encode()
+    stream = (
+        b'{"temperature": 21.\n'  # Truncated record
+        + b"garbage\xff{not json}\n"
+        + b"\x00\x00"
+        + good
+        + b"\n"
+        + b'{"error":"Failed to read from DHT sensor!"}\n'
+        + good
+        + b"\n"
+    )
+    records = decoder.feed(stream)
+    assert [r["temperature"] for r in records] == [21.5, 21.5]
+    assert decoder.errors == 3
+    assert decoder.skipped == 0
+
+
+def test_unknown_protocol_rejected() -> None:
+    """Only the known protocol names are accepted"""
+    with pytest.raises(ValueError):
+        StreamDecoder(protocol="xml")
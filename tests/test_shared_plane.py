@@ -0,0 +1,113 @@
+"""Shared-memory data plane: publish/read and single-owner creation"""
+
+import os
+import subprocess
+import sys
+import uuid
+
+import numpy as np
+import pytest
+from conftest import PYTHON_DIR
+from utils.shared_plane import PLANE_FIELDS, SharedDataPlane
+
+# Creates a plane, reports ready, then waits to be killed without cleanup
+OWNER_SCRIPT = """
+import sys, time
+from multiprocessing import resource_tracker
+from utils.shared_plane import SharedDataPlane
+
+plane = SharedDataPlane.create(sys.argv[1], max_sensors=2, capacity=4)
+# A crashed collector leaves its block behind
+resource_tracker.unregister(plane._shm._name, "shared_memory")
+print("ready", flush=True)
+time.sleep(60)
+"""
+
+
+@pytest.fixture
+def name() -> str:
+    return f"dht22_test_{uuid.uuid4().hex[:12]}"
+
+
+def reading(sensor: str, timestamp: float) -> dict:
+    return {
+        "sensor": sensor,
+        "python_timestamp": timestamp,
+        "temperature": 20.0 + timestamp,
+        "humidity": None,  # Missing values become NaN
+    }
+
+
+def test_publish_and_read(name: str) -> None:
+    """A reader attached to the block sees every sensor's ring oldest first"""
+    plane = SharedDataPlane.create(name, max_sensors=2, capacity=4)
+    worker = SharedDataPlane.attach(name)
+    try:
+        assert worker.read()["sensors"] == {}
+
+        plane.set_state({"simulator": True})
+        plane.publish([reading("a", t) for t in range(6)])  # Wraps the ring
+        plane.publish([reading("b", 10.0), reading("c", 11.0)])  # c has no slot
+
+        view = worker.read()
+        assert view["version"] == plane.version == 3
+        assert view["state"] == {"simulator": True}
+        assert set(view["sensors"]) == {"a", "b"}
+        a = view["sensors"]["a"]
+        assert set(a) == set(PLANE_FIELDS)
+        np.testing.assert_array_equal(a["python_timestamp"], [2.0, 3.0, 4.0, 5.0])
+        np.testing.assert_array_equal(a["temperature"], [22.0, 23.0, 24.0, 25.0])
+        assert np.isnan(a["humidity"]).all()
+        np.testing.assert_array_equal(view["sensors"]["b"]["python_timestamp"], [10.0])
+    finally:
+        worker.close()
+        plane.close()
+
+
+def test_state_too_large(name: str) -> None:
+    """The state document must fit in the reserved bytes"""
+    plane = SharedDataPlane.create(name, state_size=16)
+    try:
+        with pytest.raises(ValueError):
+            plane.set_state({"message": "x" * 32})
+    finally:
+        plane.close()
+
+
+def test_attach_missing() -> None:
+    """Attaching before a collector created the block fails"""
+    with pytest.raises(FileNotFoundError):
+        SharedDataPlane.attach(f"dht22_missing_{uuid.uuid4().hex[:12]}")
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32", reason="blocks do not outlive their last handle"
+)
+def test_single_owner(name: str) -> None:
+    """create refuses a running owner's block and replaces a dead owner's"""
+    owner = subprocess.Popen(
+        [sys.executable, "-c", OWNER_SCRIPT, name],
+        stdout=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(PYTHON_DIR)},
+    )
+    try:
+        assert owner.stdout.readline().strip() == "ready"
+        with pytest.raises(FileExistsError, match=str(owner.pid)):
+            SharedDataPlane.create(name)
+
+        # Workers can still attach to the running owner's block
+        worker = SharedDataPlane.attach(name)
+        assert worker.capacity == 4
+        worker.close()
+    finally:
+        owner.kill()
+        owner.wait()
+
+    plane = SharedDataPlane.create(name, max_sensors=1, capacity=8)
+    try:
+        assert plane.capacity == 8
+        plane.publish([reading("a", 1.0)])
+        assert plane.read()["sensors"]["a"]["temperature"].tolist() == [21.0]
+    finally:
+        plane.close()
@@ -0,0 +1,149 @@
+"""Segment store: writing, rollover, pruning, reopening and damaged files"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pytest
+from utils.storage import (
+    HEADER_SIZE,
+    RECORD_DTYPE,
+    SegmentStore,
+    read_header,
+    to_records,
+)
+
+T0 = 1_700_000_070.0  # 30 s into a 60 s window
+
+
+def make_points(count: int, start: float = T0, step: float = 2.0) -> list[dict]:
+    return [
+        {
+            "python_timestamp": start + i * step,
+            "temperature": 20.0 + i,
+            "humidity": 50.0 + i / 2,
+            "timestamp": i,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path: Path):
+    store = SegmentStore(str(tmp_path), segment_seconds=60)
+    yield store
+    store.close()
+
+
+def test_append_flush_round_trip(store: SegmentStore) -> None:
+    points = make_points(50)
+    for point in points:
+        assert store.append(point)
+    store.flush()
+
+    records = np.concatenate(list(store.reader.iter_range()))
+    expected = to_records(points)
+    assert len(records) == len(points)
+    for name in RECORD_DTYPE.names:
+        np.testing.assert_array_equal(records[name], expected[name])
+    assert store.dropped == 0
+
+
+def test_segments_roll_over_by_time(store: SegmentStore, tmp_path: Path) -> None:
+    store.write(to_records(make_points(60)))  # 120 s from 30 s into a window
+
+    starts = [info.start for info in store.segments()]
+    assert starts == [1_700_000_040, 1_700_000_100, 1_700_000_160]
+    assert sorted(path.name for path in tmp_path.glob("*.seg")) == [
+        f"{start:010d}.seg" for start in starts
+    ]
+    for info in store.segments():
+        records = store.reader.read_range(info.start, info.start + 60)
+        assert len(records)
+        assert (records["python_timestamp"] // 60 * 60 == info.start).all()
+
+
+def test_header_bounds_prune_segments(store: SegmentStore) -> None:
+    store.write(to_records(make_points(60)))
+    for info in store.segments():
+        header = read_header(info.path)
+        records = store.reader.read_range(info.start, info.start + 60)
+        assert header["min_ts"] == info.min_ts == records["python_timestamp"][0]
+        assert header["max_ts"] == info.max_ts == records["python_timestamp"][-1]
+
+    middle = store.segments()[1]
+    assert store.segments(middle.min_ts, middle.max_ts) == [middle]
+    assert store.segments(end=T0) == []
+    assert store.segments(start=T0 + 1000) == []
+
+    records = store.query(T0 + 30, T0 + 90)
+    timestamps = records["python_timestamp"]
+    assert timestamps[0] >= T0 + 30 and timestamps[-1] < T0 + 90
+    assert len(records) == 30
+
+
+def test_reopen_existing_directory(tmp_path: Path) -> None:
+    first = SegmentStore(str(tmp_path), segment_seconds=60)
+    first.write(to_records(make_points(40)))
+    first.close()
+
+    reopened = SegmentStore(str(tmp_path), segment_seconds=60)
+    assert len(reopened.query()) == 40
+    reopened.write(to_records(make_points(5, start=T0 + 80)))
+    records = reopened.query()
+    assert len(records) == 45
+    assert reopened.segments()[-1].max_ts == T0 + 88
+    assert read_header(reopened.segments()[-1].path)["max_ts"] == T0 + 88
+    reopened.close()
+
+
+def test_empty_and_partial_last_segment(store: SegmentStore, tmp_path: Path) -> None:
+    store.write(to_records(make_points(10)))
+    last = store.segments()[-1].path
+    with open(last, "ab") as f:
+        f.write(b"\x01" * (RECORD_DTYPE.itemsize // 2))  # Torn trailing record
+
+    assert len(store.query()) == 10
+    assert len(SegmentStore(str(tmp_path), segment_seconds=60).tail(100)) == 10
+
+    # The next write drops the torn record instead of misaligning the file
+    store.write(to_records(make_points(1, start=T0 + 20)))
+    assert (last.stat().st_size - HEADER_SIZE) % RECORD_DTYPE.itemsize == 0
+    assert len(store.query()) == 11
+
+    # A segment holding only its header reads as empty
+    empty = SegmentStore(str(tmp_path / "empty"), segment_seconds=60)
+    empty.write(to_records(make_points(1)))
+    path = empty.segments()[0].path
+    with open(path, "r+b") as f:
+        f.truncate(HEADER_SIZE)
+    assert len(empty.query()) == 0
+    assert list(empty.reader.iter_range(T0 - 10, T0 + 10)) == []
+    empty.close()
+
+
+def test_stray_files_are_skipped(tmp_path: Path, caplog) -> None:
+    store = SegmentStore(str(tmp_path), segment_seconds=60)
+    store.write(to_records(make_points(3)))
+    segment = store.segments()[0].path.read_bytes()
+    (tmp_path / "foo.seg").write_bytes(segment)  # Valid header, stray name
+    (tmp_path / "1700000040.bak.seg").write_bytes(segment)
+    (tmp_path / "0000000060.seg").write_bytes(b"short")
+
+    with caplog.at_level(logging.WARNING, logger="utils.storage"):
+        reopened = SegmentStore(str(tmp_path), segment_seconds=60)
+    assert len(reopened.query()) == 3
+    assert len(caplog.records) == 3
+    reopened.refresh()
+    assert len(reopened.segments()) == 1
+
+
+def test_mapped_segments_are_bounded(store: SegmentStore) -> None:
+    store.reader.max_maps = 4
+    store.write(to_records(make_points(600, step=1.0)))  # 10 segments
+    for info in store.segments():
+        # Cut by both bounds, so the segment is mapped
+        assert len(store.reader.read_range(info.min_ts + 1, info.max_ts))
+    assert len(store.reader._maps) == 4
+    store.reader.close()
+    assert len(store.reader._maps) == 0
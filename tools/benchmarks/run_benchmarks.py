@@ -0,0 +1,284 @@
+"""
+Benchmarks for the DHT22 data path with baseline regression checks
+
+Usage:
+    python tools/benchmarks/run_benchmarks.py                  # run and compare
+    python tools/benchmarks/run_benchmarks.py --save-baseline  # store baseline
+    python tools/benchmarks/run_benchmarks.py --quick -k buffer
+
+Results are written to tools/benchmarks/results/ as JSON. When a baseline
+exists (tools/benchmarks/baseline.json by default), every benchmark present
+in both is compared and the run fails (exit code 1) if any is slower than
+the baseline by more than --threshold. Baselines are machine specific:
+save one on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "src" / "python"))
+
+from utils.binary_protocol import encode_frame  # noqa: E402
+from utils.data_processor import (  # noqa: E402
+    DataBuffer,
+    process_sensor_batch,
+    process_sensor_data,
+)
+from utils.serial_reader import DHT22SerialReader  # noqa: E402
+from utils.simulator import SimulatorFleet  # noqa: E402
+
+BUFFER_SIZES = (200, 10_000, 1_000_000)
+QUICK_BUFFER_SIZES = (200, 10_000)
+BATCH_SIZE = 1000
+
+# A benchmark yields (name, function, calls per timing); function is timed
+Case = tuple[str, Callable[[], object], int]
+
+
+def make_readings(count: int, seed: int = 0) -> list[dict]:
+    """Raw readings from the simulator fleet (deterministic)"""
+    fleet = SimulatorFleet(
+        sensors=10, rate=10, seed=seed, realtime=False, start_time=1.7e9
+    )
+    records = []
+    while len(records) < count:
+        records += fleet.to_records(fleet.next_batch(10.0))
+    return records[:count]
+
+
+def filled_buffer(size: int) -> DataBuffer:
+    buffer = DataBuffer(max_size=size)
+    for reading in map(process_sensor_data, make_readings(size)):
+        buffer.add(reading)
+    return buffer
+
+
+class MemorySerial:
+    """Serial-like connection that serves the same bytes on every pass"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+        self.is_open = True
+
+    def rewind(self) -> None:
+        self.position = 0
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.data) - self.position
+
+    def readinto(self, buffer) -> int:
+        chunk = self.data[self.position : self.position + len(buffer)]
+        buffer[: len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+
+def buffer_cases(sizes: tuple[int, ...]) -> Iterator[Case]:
+    readings = [process_sensor_data(r) for r in make_readings(1000)]
+    for size in sizes:
+        buffer = filled_buffer(size)
+        position = iter(range(10**12))
+
+        def add(buffer=buffer, position=position):
+            buffer.add(readings[next(position) % len(readings)])
+
+        yield f"buffer.add[{size}]", add, 1000
+        yield f"buffer.get_recent(50)[{size}]", lambda b=buffer: b.get_recent(50), 100
+        yield f"buffer.get_recent[{size}]", buffer.get_recent, 1
+        yield f"buffer.get_stats[{size}]", buffer.get_stats, 1000
+        yield f"buffer.to_dataframe[{size}]", buffer.to_dataframe, 1
+
+
+def processing_cases() -> Iterator[Case]:
+    raw = make_readings(BATCH_SIZE)
+    columns = {
+        "temperature": np.array([r["temperature"] for r in raw]),
+        "humidity": np.array([r["humidity"] for r in raw]),
+    }
+
+    def scalar():
+        for record in raw:
+            process_sensor_data(record)
+
+    yield f"process_sensor_data.scalar[{BATCH_SIZE}]", scalar, 1
+    yield (
+        f"process_sensor_batch[{BATCH_SIZE}]",
+        lambda: process_sensor_batch(columns),
+        10,
+    )
+
+
+def parsing_cases() -> Iterator[Case]:
+    raw = make_readings(BATCH_SIZE)
+    streams = {
+        "json": b"".join(
+            json.dumps(
+                {k: r[k] for k in ("timestamp", "temperature", "humidity", "status")}
+            ).encode()
+            + b"\r\n"
+            for r in raw
+        ),
+        "binary": b"".join(
+            encode_frame(i, r["timestamp"], r["temperature"], r["humidity"])
+            for i, r in enumerate(raw)
+        ),
+    }
+    for protocol, data in streams.items():
+        reader = DHT22SerialReader(protocol=protocol)
+        connection = MemorySerial(data)
+
+        def read_all(reader=reader, connection=connection):
+            connection.rewind()
+            reader.connection = connection
+            reader.is_connected = True
+            reader._start_decoding()
+            records = []
+            while connection.in_waiting:
+                records += reader.read_batch()
+            assert len(records) == BATCH_SIZE
+
+        yield f"read_batch.{protocol}[{BATCH_SIZE}]", read_all, 1
+
+
+def chart_cases() -> Iterator[Case]:
+    os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="dht22-bench-"))
+    from dashboard import ui
+    from dashboard.runtime import DashboardRuntime, load_config
+
+    runtime = DashboardRuntime(load_config())
+    runtime.store_readings([process_sensor_data(r) for r in make_readings(200)])
+    selection = runtime.registry.sensor_ids()[0]
+    channel = runtime.registry.get(selection)
+
+    def figure():
+        series = ui.get_chart_series(channel, "temperature", "live")
+        ui.build_chart_figure({selection: series}, "live", ui.CHARTS["temperature"])
+
+    def callback():
+        # Fresh figure each call: no cursor, no cached snapshot artifact
+        ui.build_chart(runtime.registry, "temperature", "live", selection)
+
+    yield "chart.build_chart_figure[live]", figure, 10
+    yield "chart.update_temperature_chart[live]", callback, 10
+
+
+def time_case(function: Callable[[], object], number: int, repeat: int) -> dict:
+    """Per-call seconds over ``repeat`` timings of ``number`` calls"""
+    function()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    return {
+        "median_us": statistics.median(timings) * 1e6,
+        "min_us": min(timings) * 1e6,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Names of benchmarks slower than the baseline by more than threshold"""
+    regressions = []
+    print(f"\n{'benchmark':48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["median_us"]
+        after = result["median_us"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:48} {before:10.1f}us {after:10.1f}us {change:+7.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", "--filter", help="Only run benchmarks containing this")
+    parser.add_argument("--quick", action="store_true", help="Skip 1M buffers")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=str(BENCH_DIR / "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown vs baseline (0.25 = 25%%)",
+    )
+    parser.add_argument("--output", help="Result file (default: results/<time>.json)")
+    args = parser.parse_args()
+
+    sizes = QUICK_BUFFER_SIZES if args.quick else BUFFER_SIZES
+    groups = (
+        lambda: buffer_cases(sizes),
+        processing_cases,
+        parsing_cases,
+        chart_cases,
+    )
+
+    results = {}
+    for group in groups:
+        for name, function, number in group():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = time_case(function, number, args.repeat)
+            print(f"{name:48} {results[name]['median_us']:12.1f}us")
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    output = Path(
+        args.output
+        or BENCH_DIR / "results" / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults saved to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("No baseline found; run with --save-baseline to create one")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Import-time budget check for the dashboard's entry points
+
+Usage:
+    python tools/check_import_time.py                  # check every target
+    python tools/check_import_time.py --budget-ms 300 --top 15
+
+tests/test_import_time.py runs the same check under pytest.
+
+Each target is imported in a fresh interpreter under ``python -X importtime``.
+The check fails (exit code 1) when a target takes longer than the budget or
+pulls in a module it must not load: importing ``app`` must not open sensors
+or import Dash, and a headless collector (``dashboard.runtime``) must never
+need Dash, Flask or Plotly. Neither may import pandas, which is reserved for
+export and analytics.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PYTHON_DIR = ROOT / "src" / "python"
+
+DEFAULT_BUDGET_MS = 500.0
+
+# Module -> top-level packages it must not import
+TARGETS = {
+    "app": ("dash", "flask", "plotly", "pandas"),
+    "dashboard.runtime": ("dash", "flask", "plotly", "pandas"),
+}
+
+PROBE = """
+import json, sys
+sys.path[:0] = [{python_dir!r}, {dashboard_dir!r}]
+import {module}
+print(json.dumps(sorted(name.split(".")[0] for name in sys.modules)))
+"""
+
+
+def measure(module: str) -> tuple[list[tuple[int, str]], set[str]]:
+    """
+    Import ``module`` in a fresh interpreter
+
+    Returns:
+        ([(cumulative microseconds, module name)], loaded top-level packages)
+    """
+    probe = PROBE.format(
+        python_dir=str(PYTHON_DIR),
+        dashboard_dir=str(PYTHON_DIR / "dashboard"),
+        module=module,
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        timings.append((int(cumulative), name.strip()))
+    return timings, set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def check(
+    module: str, budget_ms: float = DEFAULT_BUDGET_MS
+) -> tuple[list[tuple[int, str]], list[str]]:
+    """
+    Import ``module`` and check it against the budget and TARGETS
+
+    Returns:
+        (timings as returned by ``measure``, failure messages)
+    """
+    timings, loaded = measure(module)
+    total_ms = next(us for us, name in timings if name == module) / 1000
+    failures = []
+    if total_ms > budget_ms:
+        failures.append(f"{module} took {total_ms:.1f} ms")
+    forbidden = sorted(loaded.intersection(TARGETS.get(module, ())))
+    if forbidden:
+        failures.append(f"{module} imported {', '.join(forbidden)}")
+    return timings, failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "modules", nargs="*", default=list(TARGETS), help="Modules to check"
+    )
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports shown")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        timings, module_failures = check(module, args.budget_ms)
+        total_ms = next(us for us, name in timings if name == module) / 1000
+        print(f"{module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        for us, name in sorted(timings, reverse=True)[1 : args.top + 1]:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+        failures.extend(module_failures)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())